@@ -1,3 +1,4 @@
+-- Superseded by migrations/postgres (python migrate.py up); kept for reference.
 -- Add poll_type column to polls table
 -- 'multiple_choice' = traditional voting with options
 -- 'text_response' = students write text answers
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Cross-poll voter analytics: turnout, voter overlap between polls and
+co-voting between options ("people who voted Alice for Best Staff also
+voted Bob for Best Tutor").
+
+Votes are loaded once into NumPy arrays of small integers (usernames, polls
+and options each encoded as 0..n-1). The matrices are then built as
+incidence products B.T @ B, one block of voters at a time, so memory stays
+bounded by OVERLAP_BLOCK voters × columns however many votes there are.
+
+numpy is optional for the rest of the app (pip install numpy); without it
+GET /api/admin/analytics answers 501.
+
+Usage:
+    python analytics.py                                  # local backend
+    python analytics.py --backend supabase --polls 3,4,5 --top 10
+    python analytics.py --json > analytics.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+OVERLAP_BLOCK = 4096        # voters per incidence block
+MAX_OPTION_MATRIX = 4000    # options beyond this need a ?polls= selection
+PAGE_SIZE = 1000            # PostgREST's default max rows per request
+
+
+class VoteArrays:
+    """Votes as parallel integer arrays, sorted by voter"""
+
+    def __init__(self, users, polls, options, poll_ids, option_ids, option_poll, n_users):
+        self.users = users              # voter index per vote
+        self.polls = polls              # poll index per vote
+        self.options = options          # option index per vote
+        self.poll_ids = poll_ids        # poll index -> polls.id
+        self.option_ids = option_ids    # option index -> options.id
+        self.option_poll = option_poll  # option index -> poll index
+        self.n_users = n_users
+
+    def __len__(self):
+        return len(self.users)
+
+    @classmethod
+    def from_columns(cls, usernames, poll_ids, option_ids):
+        """Encode raw columns (sequences of equal length) as dense indexes"""
+        # Usernames are strings: a dict assigns indexes faster than sorting an object array
+        index = {}
+        users = np.fromiter((index.setdefault(u, len(index)) for u in usernames), dtype=np.int32, count=len(usernames))
+        poll_keys, polls = np.unique(np.asarray(poll_ids, dtype=np.int64), return_inverse=True)
+        option_keys, first, options = np.unique(np.asarray(option_ids, dtype=np.int64),
+                                                return_index=True, return_inverse=True)
+        order = np.argsort(users, kind='stable')
+        return cls(
+            users=users[order].astype(np.int32),
+            polls=polls[order].astype(np.int32),
+            options=options[order].astype(np.int32),
+            poll_ids=poll_keys,
+            option_ids=option_keys,
+            option_poll=polls[first].astype(np.int32),
+            n_users=len(index),
+        )
+
+
+def require_numpy():
+    if np is None:
+        raise RuntimeError('Analytics needs numpy: pip install numpy')
+
+
+def load_votes(client, poll_ids=None, page_size=PAGE_SIZE):
+    """Read (username, poll_id, option_id) of every vote, keyset-paged on id"""
+    require_numpy()
+    usernames, polls, options, cursor = [], [], [], 0
+    while True:
+        query = client.table('votes').select('id, username, poll_id, option_id').gt('id', cursor)
+        if poll_ids:
+            query = query.in_('poll_id', poll_ids)
+        rows = query.order('id').limit(page_size).execute().data
+        usernames.extend(r['username'] for r in rows)
+        polls.extend(r['poll_id'] for r in rows)
+        options.extend(r['option_id'] for r in rows)
+        if len(rows) < page_size:
+            break
+        cursor = rows[-1]['id']
+    return VoteArrays.from_columns(usernames, polls, options)
+
+
+def turnout(votes):
+    """Distinct voters per poll (a voter votes at most once per poll)"""
+    return np.bincount(votes.polls, minlength=len(votes.poll_ids))
+
+
+def _incidence_product(votes, columns, width):
+    """
+    width × width matrix M with M[i, j] = voters having both column i and j,
+    accumulated over blocks of OVERLAP_BLOCK voters.
+    """
+    total = np.zeros((width, width), dtype=np.float64)
+    bounds = np.searchsorted(votes.users, np.arange(0, votes.n_users + OVERLAP_BLOCK, OVERLAP_BLOCK))
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        if start == end:
+            continue
+        block_users = votes.users[start:end]
+        rows = block_users - block_users[0]
+        block = np.zeros((int(rows[-1]) + 1, width), dtype=np.float32)
+        block[rows, columns[start:end]] = 1.0
+        total += block.T @ block
+    return np.rint(total).astype(np.int64)
+
+
+def poll_overlap(votes):
+    """Polls × polls: voters who voted in both (the diagonal is each poll's turnout)"""
+    return _incidence_product(votes, votes.polls, len(votes.poll_ids))
+
+
+def option_cooccurrence(votes):
+    """Options × options: voters who picked both (the diagonal is each option's votes)"""
+    if len(votes.option_ids) > MAX_OPTION_MATRIX:
+        raise ValueError(f'{len(votes.option_ids)} options: select at most {MAX_OPTION_MATRIX} through polls')
+    return _incidence_product(votes, votes.options, len(votes.option_ids))
+
+
+def top_pairs(matrix, k):
+    """
+    The k off-diagonal pairs (i < j) with the most shared voters, with their
+    Jaccard similarity |i ∩ j| / |i ∪ j|: [(i, j, shared, jaccard)].
+    """
+    sizes = np.diag(matrix)
+    i, j = np.triu_indices(len(matrix), k=1)
+    shared = matrix[i, j]
+    keep = shared > 0
+    i, j, shared = i[keep], j[keep], shared[keep]
+    if len(shared) > k:
+        best = np.argpartition(-shared, k - 1)[:k]
+        i, j, shared = i[best], j[best], shared[best]
+    jaccard = shared / (sizes[i] + sizes[j] - shared)
+    order = np.lexsort((-jaccard, -shared))
+    return [(int(i[n]), int(j[n]), int(shared[n]), round(float(jaccard[n]), 4)) for n in order]
+
+
+def report(client, poll_ids=None, top=20):
+    """Everything the admin endpoint and the CLI show, as plain JSON-ready data"""
+    votes = load_votes(client, poll_ids)
+    query = client.table('polls').select('id, title, options(id, name)')
+    if poll_ids:
+        query = query.in_('id', poll_ids)
+    polls = query.order('id').execute().data
+    titles = {p['id']: p['title'] for p in polls}
+    option_names = {o['id']: o['name'] for p in polls for o in p.get('options') or []}
+
+    voters = turnout(votes)
+    overlap = poll_overlap(votes)
+    cooccurrence = option_cooccurrence(votes)
+
+    def option(index):
+        option_id = int(votes.option_ids[index])
+        return {'id': option_id, 'name': option_names.get(option_id),
+                'pollId': int(votes.poll_ids[votes.option_poll[index]])}
+
+    return {
+        'votes': len(votes),
+        'voters': votes.n_users,
+        'polls': [
+            {'id': int(pid), 'title': titles.get(int(pid)), 'voters': int(n),
+             'turnout': round(int(n) / votes.n_users, 4) if votes.n_users else 0.0}
+            for pid, n in zip(votes.poll_ids, voters)
+        ],
+        'pollOverlap': {'pollIds': [int(p) for p in votes.poll_ids], 'matrix': overlap.tolist()},
+        'topPollPairs': [
+            {'a': int(votes.poll_ids[i]), 'b': int(votes.poll_ids[j]), 'sharedVoters': shared, 'jaccard': jac}
+            for i, j, shared, jac in top_pairs(overlap, top)
+        ],
+        'topOptionPairs': [
+            {'a': option(i), 'b': option(j), 'sharedVoters': shared, 'jaccard': jac}
+            for i, j, shared, jac in top_pairs(cooccurrence, top)
+        ],
+    }
+
+
+def main():
+    from generate_dataset import get_client
+
+    parser = argparse.ArgumentParser(description='Turnout, voter overlap and co-voting across polls')
+    parser.add_argument('--polls', help='Comma-separated poll IDs (default: all)')
+    parser.add_argument('--top', type=int, default=10, help='Pairs to list')
+    parser.add_argument('--json', action='store_true', help='Print the full report as JSON')
+    parser.add_argument('--backend', choices=['local', 'supabase'], default='local')
+    parser.add_argument('--db', default=os.getenv('LOCAL_DB_PATH', 'polls.db'), help='SQLite file for the local backend')
+    args = parser.parse_args()
+
+    if np is None:
+        print('❌ Analytics needs numpy: pip install numpy')
+        return 1
+    poll_ids = [int(p) for p in args.polls.split(',')] if args.polls else None
+    client = get_client(args.backend, args.db)
+    t0 = time.perf_counter()
+    data = report(client, poll_ids, args.top)
+    elapsed = time.perf_counter() - t0
+    if args.json:
+        print(json.dumps(data, indent=2, ensure_ascii=False))
+        return 0
+
+    print(f"✅ {data['votes']} votes by {data['voters']} voters in {elapsed:.2f}s")
+    print('\nTurnout')
+    for p in data['polls']:
+        print(f"   • #{p['id']} {p['title']}: {p['voters']} voters ({p['turnout']:.0%})")
+    print('\nPolls with the most voters in common')
+    for pair in data['topPollPairs']:
+        print(f"   • #{pair['a']} & #{pair['b']}: {pair['sharedVoters']} shared (Jaccard {pair['jaccard']:.2f})")
+    print('\nOptions picked together most often')
+    for pair in data['topOptionPairs']:
+        a, b = pair['a'], pair['b']
+        print(f"   • {a['name']} (#{a['pollId']}) & {b['name']} (#{b['pollId']}): {pair['sharedVoters']} voters")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,23 +1,73 @@
 'use strict';
 
 // In-memory state loaded from backend API
-let state = { polls: [] };
+// revision and horizon are the cursor for /api/polls/changes
+let state = { polls: [], revision: null, horizon: null };
+
+// Voters of these poll types pick several options (ranked_choice: in order of preference)
+const BALLOT_POLL_TYPES = ['approval', 'ranked_choice'];
+
+// Real schedule when the poll has one, otherwise the cosmetic label
+function scheduleLabel(poll) {
+  const when = (iso) => new Date(iso).toLocaleString([], { dateStyle: 'short', timeStyle: 'short' });
+  if (poll.status === 'closed') return 'Closed';
+  if (poll.status === 'scheduled' && poll.opensAt) return `Opens ${when(poll.opensAt)}`;
+  if (poll.closesAt) return `Closes ${when(poll.closesAt)}`;
+  return poll.closesLabel || '';
+}
 
-async function apiGetPolls() {
-  const res = await fetch('/api/polls');
-  if (!res.ok) throw new Error('Failed to load polls');
-  const data = await res.json();
-  
+function sortPolls(polls) {
   // Sort polls by the number in their title (e.g., "1. Best Staff", "2. Volume Icon")
-  const polls = data.polls || [];
   polls.sort((a, b) => {
     // Extract the number from the title (e.g., "1." or "2.")
     const numA = parseInt(a.title.match(/(\d+)\./)?.[1] || '999');
     const numB = parseInt(b.title.match(/(\d+)\./)?.[1] || '999');
     return numA - numB;
   });
+  return polls;
+}
+
+async function apiGetPolls() {
+  const res = await fetch('/api/polls');
+  if (!res.ok) throw new Error('Failed to load polls');
+  const data = await res.json();
   
-  state.polls = polls;
+  state.polls = sortPolls(data.polls || []);
+  state.revision = data.revision ?? null;
+  state.horizon = data.horizon ?? null;
+}
+
+// Fetch only what changed since the last load and patch it into state.
+// Falls back to a full reload when the server asks for one.
+async function apiSyncPolls() {
+  if (state.revision === null) return apiGetPolls();
+  const horizon = state.horizon === null ? '' : `&horizon=${state.horizon}`;
+  const res = await fetch(`/api/polls/changes?since=${state.revision}${horizon}`);
+  if (!res.ok) return apiGetPolls();
+  const data = await res.json();
+  if (data.full_reload) return apiGetPolls();
+
+  const deleted = new Set(data.deleted || []);
+  const replaced = new Map((data.polls || []).map((p) => [p.id, p]));
+  const counts = new Map((data.options || []).map((o) => [o.id, o.votes]));
+
+  const polls = state.polls
+    .filter((p) => !deleted.has(p.id))
+    .map((p) => {
+      if (replaced.has(p.id)) {
+        const fresh = replaced.get(p.id);
+        replaced.delete(p.id);
+        return fresh;
+      }
+      if (!p.options.some((o) => counts.has(o.id))) return p;
+      return { ...p, options: p.options.map((o) => (counts.has(o.id) ? { ...o, votes: counts.get(o.id) } : o)) };
+    });
+  // Anything left in `replaced` is a poll created since the last sync
+  replaced.forEach((p) => polls.push(p));
+
+  state.polls = replaced.size ? sortPolls(polls) : polls;
+  state.revision = data.revision;
+  state.horizon = data.horizon ?? null;
 }
 
 async function apiCreatePoll({ title, description, poll_type, options }) {
@@ -36,7 +86,7 @@ async function apiCreatePoll({ title, description, poll_type, options }) {
   }
   const result = await res.json();
   console.log('Poll created successfully:', result);
-  await apiGetPolls();
+  await apiSyncPolls();
 }
 
 async function apiDeletePoll(pollId) {
@@ -45,7 +95,7 @@ async function apiDeletePoll(pollId) {
     alert('Failed to delete poll');
     return;
   }
-  await apiGetPolls();
+  await apiSyncPolls();
 }
 
 async function apiUpdatePoll(pollId, data) {
@@ -60,7 +110,7 @@ async function apiUpdatePoll(pollId, data) {
     alert(err.error || 'Failed to update poll');
     return false;
   }
-  await apiGetPolls();
+  await apiSyncPolls();
   return true;
 }
 
@@ -75,7 +125,21 @@ async function apiCastVote(pollId, optionId, username) {
     alert(err.error || 'Failed to cast vote');
     return;
   }
-  await apiGetPolls();
+  await apiSyncPolls();
+}
+
+async function apiCastBallot(pollId, optionIds, username) {
+  const res = await fetch(`/api/polls/${pollId}/vote`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ option_ids: optionIds, username }),
+  });
+  if (!res.ok) {
+    const err = await res.json().catch(() => ({}));
+    alert(err.error || 'Failed to cast vote');
+    return;
+  }
+  await apiSyncPolls();
 }
 
 async function apiSubmitTextResponse(pollId, responseText, username) {
@@ -89,7 +153,7 @@ async function apiSubmitTextResponse(pollId, responseText, username) {
     alert(err.error || 'Failed to submit response');
     return;
   }
-  await apiGetPolls();
+  await apiSyncPolls();
 }
 
 async function apiGetPollVotes(pollId) {
@@ -180,8 +244,15 @@ function showEditPollDialog(poll) {
   const optionText = createElement('option', null, 'Text Response');
   optionText.value = 'text_response';
   
+  const optionApproval = createElement('option', null, 'Approval');
+  optionApproval.value = 'approval';
+  const optionRanked = createElement('option', null, 'Ranked Choice');
+  optionRanked.value = 'ranked_choice';
+  
   typeSelect.appendChild(optionMultiple);
   typeSelect.appendChild(optionText);
+  typeSelect.appendChild(optionApproval);
+  typeSelect.appendChild(optionRanked);
   typeSelect.value = poll.poll_type || 'multiple_choice';
   
   typeGroup.appendChild(typeLabel);
@@ -229,7 +300,7 @@ function showEditPollDialog(poll) {
   
   // Toggle options visibility based on poll type
   function updateOptionsVisibility() {
-    optionsContainer.style.display = typeSelect.value === 'multiple_choice' ? 'block' : 'none';
+    optionsContainer.style.display = typeSelect.value !== 'text_response' ? 'block' : 'none';
   }
   updateOptionsVisibility();
   typeSelect.onchange = updateOptionsVisibility;
@@ -264,14 +335,14 @@ function showEditPollDialog(poll) {
     
     const data = { title, description, poll_type };
     
-    // Collect options if multiple_choice
-    if (poll_type === 'multiple_choice') {
+    // Collect options for every type but text_response
+    if (poll_type !== 'text_response') {
       const options = Array.from(optionsList.querySelectorAll('.option-input'))
         .map(input => input.value.trim())
         .filter(val => val);
       
       if (options.length < 2) {
-        alert('Please provide at least 2 options for multiple choice polls');
+        alert('Please provide at least 2 options');
         return;
       }
       
@@ -336,8 +407,15 @@ function renderCreatePollForm() {
   const optionText = createElement('option', null, 'Text Response');
   optionText.value = 'text_response';
   
+  const optionApproval = createElement('option', null, 'Approval');
+  optionApproval.value = 'approval';
+  const optionRanked = createElement('option', null, 'Ranked Choice');
+  optionRanked.value = 'ranked_choice';
+  
   typeSelect.appendChild(optionMultiple);
   typeSelect.appendChild(optionText);
+  typeSelect.appendChild(optionApproval);
+  typeSelect.appendChild(optionRanked);
   
   typeGroup.appendChild(typeLabel);
   typeGroup.appendChild(typeSelect);
@@ -352,7 +430,7 @@ function renderCreatePollForm() {
 
   // Toggle options visibility based on poll type
   function updateOptionsVisibility() {
-    optionsGroup.style.display = typeSelect.value === 'multiple_choice' ? 'block' : 'none';
+    optionsGroup.style.display = typeSelect.value !== 'text_response' ? 'block' : 'none';
   }
   
   typeSelect.addEventListener('change', updateOptionsVisibility);
@@ -379,8 +457,8 @@ function renderCreatePollForm() {
       return;
     }
 
-    if (poll_type === 'multiple_choice' && optionsRaw.length < 2) {
-      alert('Please enter at least two options for multiple choice polls.');
+    if (poll_type !== 'text_response' && optionsRaw.length < 2) {
+      alert('Please enter at least two options.');
       return;
     }
 
@@ -543,7 +621,7 @@ function renderPollCard(poll, forAdmin) {
     (function () {
       const box = createElement('div', 'poll-stat');
       box.appendChild(createElement('div', 'poll-stat-label stat-label-cyan', 'TIME'));
-      box.appendChild(createElement('div', 'poll-stat-value', poll.closesLabel || '')); 
+      box.appendChild(createElement('div', 'poll-stat-value', scheduleLabel(poll)));
       return box;
     })(),
   ]);
@@ -551,6 +629,9 @@ function renderPollCard(poll, forAdmin) {
   const votedKey = `poll-voted-${poll.id}-${currentUsername || 'anon'}`;
   const alreadyVoted = !!localStorage.getItem(votedKey);
   let selectedId = null;
+  // approval and ranked_choice: every option picked, in the order picked
+  const ballot = BALLOT_POLL_TYPES.includes(poll.poll_type);
+  const picked = [];
 
   const candidatesList = createElement('div', 'candidates-list');
   
@@ -574,6 +655,12 @@ function renderPollCard(poll, forAdmin) {
       const thankYou = createElement('div', 'text-response-submitted', '✅ Thank you for voting!');
       candidatesList.appendChild(thankYou);
     } else {
+      if (ballot) {
+        candidatesList.appendChild(createElement('div', 'ballot-hint', poll.poll_type === 'ranked_choice'
+          ? 'Click candidates in order of preference'
+          : 'Pick every candidate you approve of'));
+      }
+      const buttons = [];
       // Show voting buttons if not voted yet
       poll.options.forEach((option) => {
         const btn = createElement('button', 'candidate-button candidate-button-cyan', null);
@@ -587,11 +674,24 @@ function renderPollCard(poll, forAdmin) {
         checkbox.appendChild(dot);
 
         const label = createElement('span', null, option.name);
-        const content = createElement('div', 'candidate-content', [checkbox, label]);
+        const rank = createElement('span', 'candidate-rank');
+        const content = createElement('div', 'candidate-content', [checkbox, label, rank]);
         btn.appendChild(content);
+        buttons.push({ id: option.id, btn, rank });
 
         btn.onclick = () => {
           if (alreadyVoted) return;
+          if (ballot) {
+            const at = picked.indexOf(option.id);
+            if (at === -1) picked.push(option.id);
+            else picked.splice(at, 1);
+            buttons.forEach((b) => {
+              const position = picked.indexOf(b.id);
+              b.btn.classList.toggle('selected', position !== -1);
+              b.rank.textContent = poll.poll_type === 'ranked_choice' && position !== -1 ? `#${position + 1}` : '';
+            });
+            return;
+          }
           selectedId = option.id;
           Array.from(candidatesList.querySelectorAll('.candidate-button')).forEach((b) => {
             b.classList.remove('selected', 'candidate-button-cyan');
@@ -638,6 +738,19 @@ function renderPollCard(poll, forAdmin) {
         })
         .catch(() => alert('Failed to submit response'));
     }
+    // Handle approval and ranked choice ballots
+    else if (ballot) {
+      if (!picked.length) {
+        alert('Please select at least one candidate before voting.');
+        return;
+      }
+      apiCastBallot(poll.id, picked.slice(), currentUsername)
+        .then(() => {
+          localStorage.setItem(votedKey, '1');
+          render();
+        })
+        .catch(() => alert('Failed to cast vote'));
+    }
     // Handle multiple choice vote
     else {
       if (!selectedId) {
@@ -748,6 +861,92 @@ function renderVoteOptions(poll) {
   return container;
 }
 
+function textResponseCard(r) {
+  return createElement('div', 'admin-text-response-card', [
+    createElement('div', 'admin-text-response-user', `👤 ${r.username}`),
+    createElement('div', 'admin-text-response-text', r.response_text),
+    createElement('div', 'admin-text-response-time', new Date(r.created_at).toLocaleString()),
+  ]);
+}
+
+// Text responses are paged (nextCursor) and searched server-side, so thousands of answers stay fast
+function renderTextResponses(container, pollId) {
+  const title = createElement('div', 'admin-votes-title', '📝 Text Responses');
+  const searchInput = createElement('input', 'admin-text-search');
+  searchInput.type = 'search';
+  searchInput.placeholder = 'Search responses...';
+  const userInput = createElement('input', 'admin-text-search');
+  userInput.type = 'search';
+  userInput.placeholder = 'Username';
+  const list = createElement('div', 'admin-text-responses-list');
+  const moreBtn = createElement('button', 'button button-secondary', 'Load more');
+  moreBtn.type = 'button';
+
+  const cloud = createElement('div', 'admin-term-cloud');
+
+  container.innerHTML = '';
+  container.appendChild(createElement('div', 'admin-votes-header', [title]));
+  container.appendChild(cloud);
+  container.appendChild(createElement('div', 'admin-text-search-bar', [searchInput, userInput]));
+  container.appendChild(list);
+  container.appendChild(moreBtn);
+
+  let cursor = null;
+  let request = 0;
+
+  async function loadPage(reset) {
+    const current = ++request;
+    const params = new URLSearchParams();
+    if (searchInput.value.trim()) params.set('q', searchInput.value.trim());
+    if (userInput.value.trim()) params.set('username', userInput.value.trim());
+    if (!reset && cursor !== null) params.set('cursor', cursor);
+    const res = await fetch(`/api/polls/${pollId}/text-responses?${params}`);
+    const data = await res.json();
+    if (current !== request) return; // a newer search is on its way
+
+    if (reset) {
+      list.innerHTML = '';
+      title.textContent = `📝 Text Responses (${data.total} ${params.has('q') || params.has('username') ? 'matching' : 'total'})`;
+      if (!data.responses.length) {
+        list.appendChild(createElement('div', 'admin-votes-empty', '📭 No responses found.'));
+      }
+    }
+    data.responses.forEach((r) => list.appendChild(textResponseCard(r)));
+    cursor = data.nextCursor;
+    moreBtn.style.display = cursor === null ? 'none' : '';
+  }
+
+  let timer = null;
+  const search = () => {
+    clearTimeout(timer);
+    timer = setTimeout(() => loadPage(true), 250);
+  };
+  searchInput.addEventListener('input', search);
+  userInput.addEventListener('input', search);
+  moreBtn.addEventListener('click', () => loadPage(false));
+  loadPage(true);
+  renderTermCloud(cloud, pollId, (term) => {
+    searchInput.value = term;
+    loadPage(true);
+  });
+}
+
+// Most mentioned words, sized by how many answers use them; clicking one searches for it
+async function renderTermCloud(cloud, pollId, onPick) {
+  const res = await fetch(`/api/polls/${pollId}/text-responses/terms?kind=word&limit=30`);
+  const data = await res.json();
+  const words = data.words || [];
+  if (!words.length) return;
+  const top = words[0].count;
+  words.forEach((w) => {
+    const chip = createElement('button', 'admin-term', `${w.term} ${w.count}`);
+    chip.type = 'button';
+    chip.style.fontSize = `${0.75 + 0.75 * (w.count / top)}rem`;
+    chip.addEventListener('click', () => onPick(w.term));
+    cloud.appendChild(chip);
+  });
+}
+
 async function toggleAdminVotes(pollId, container, buttonEl) {
   // If this card is already open, close it
   if (container.dataset.open === '1') {
@@ -778,37 +977,7 @@ async function toggleAdminVotes(pollId, container, buttonEl) {
   const poll = state.polls.find(p => p.id === pollId);
   
   if (poll && poll.poll_type === 'text_response') {
-    // Handle text responses
-    const res = await fetch(`/api/polls/${pollId}/text-responses`);
-    const data = await res.json();
-    const responses = data.responses || [];
-    
-    container.innerHTML = '';
-    
-    if (!responses.length) {
-      const emptyMsg = createElement('div', 'admin-votes-empty', '📭 No responses yet for this poll.');
-      container.appendChild(emptyMsg);
-    } else {
-      const header = createElement('div', 'admin-votes-header', [
-        createElement('div', 'admin-votes-title', `📝 Text Responses (${responses.length} total)`),
-      ]);
-      container.appendChild(header);
-      
-      const responsesList = createElement('div', 'admin-text-responses-list');
-      responses.forEach((r) => {
-        const responseCard = createElement('div', 'admin-text-response-card');
-        const userHeader = createElement('div', 'admin-text-response-user', `👤 ${r.username}`);
-        const responseText = createElement('div', 'admin-text-response-text', r.response_text);
-        const timestamp = createElement('div', 'admin-text-response-time', new Date(r.created_at).toLocaleString());
-        
-        responseCard.appendChild(userHeader);
-        responseCard.appendChild(responseText);
-        responseCard.appendChild(timestamp);
-        responsesList.appendChild(responseCard);
-      });
-      
-      container.appendChild(responsesList);
-    }
+    renderTextResponses(container, pollId);
   } else {
     // Handle multiple choice votes
     const data = await apiGetPollVotes(pollId);
@@ -1,12 +1,12 @@
 from flask import Flask, jsonify, request, send_from_directory, Response, session, redirect, url_for
 from flask_cors import CORS
 import os
-from supabase import create_client, Client
 from dotenv import load_dotenv
-import csv
-from io import StringIO
-from datetime import datetime
+import json
+import re
+from datetime import datetime, timezone
 from functools import wraps
+import threading
 
 # Load environment variables
 load_dotenv()
@@ -19,16 +19,91 @@ app.secret_key = os.getenv('SECRET_KEY', 'your-secret-key-change-in-production-'
 
 CORS(app, resources={r"/api/*": {"origins": "*"}})
 
+# orjson-backed jsonify plus brotli/gzip for large JSON responses
+import payloads
+payloads.init_app(app)
+
+# Optional JSONL capture of API traffic for replay.py
+REQUEST_LOG_PATH = os.getenv('REQUEST_LOG_PATH')
+if REQUEST_LOG_PATH:
+    import request_log
+    request_log.init_app(app, REQUEST_LOG_PATH)
+
 # Initialize Supabase client
 SUPABASE_URL = os.getenv('SUPABASE_URL')
 SUPABASE_KEY = os.getenv('SUPABASE_KEY')
 ADMIN_USERNAME = os.getenv('ADMIN_USERNAME', 'admin')
 ADMIN_PASSWORD = os.getenv('ADMIN_PASSWORD', 'admin123')
 
-if not SUPABASE_URL or not SUPABASE_KEY:
+# POLLS_BACKEND=local swaps Supabase for the SQLite stand-in (benchmarks, offline dev)
+POLLS_BACKEND = os.getenv('POLLS_BACKEND', 'supabase')
+LOCAL_DB_PATH = os.getenv('LOCAL_DB_PATH', os.path.join(BASE_DIR, 'polls.db'))
+
+
+class LazyClient:
+    """
+    Builds the backend client on first use. Importing app.py stays cheap, and
+    with gunicorn's preload_app each worker builds its own client after the
+    fork instead of inheriting the master's connections.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        client = self._client
+        if client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+                client = self._client
+        return getattr(client, name)
+
+
+def create_backend_client():
+    if POLLS_BACKEND == 'local':
+        import local_backend
+        return local_backend.create_client(LOCAL_DB_PATH)
+
+    # supabase-py pulls in httpx, gotrue, postgrest and realtime: deferred until the first query
+    from supabase import create_client
+    return create_client(SUPABASE_URL, SUPABASE_KEY)
+
+
+if POLLS_BACKEND != 'local' and (not SUPABASE_URL or not SUPABASE_KEY):
     raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in .env file")
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+supabase = LazyClient(create_backend_client)
+
+
+# Long-poll waiters (GET /api/polls/<id>/wait) share one change poller per process
+import live_updates
+change_hub = live_updates.ChangeHub(supabase)
+LONG_POLL_MAX_TIMEOUT = float(os.getenv('LONG_POLL_MAX_TIMEOUT', '55'))
+_tally_cache = {}  # poll_id -> (version, encoded /wait Payload, current_revision() when read, expires at)
+_tally_lock = threading.Lock()
+_polls_cache = {}  # response variant -> (current_revision(), encoded /api/polls Payload, expires at)
+_final_cache = {}  # poll_id -> Payload of its frozen results (immutable, kept for the process lifetime)
+FINAL_RESULTS_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+_analytics_cache = {}  # (poll IDs, top) -> (current_revision(), analytics report)
+_ballot_tally_cache = {}  # poll_id -> ((newest ballot ID, option IDs), encoded /tally Payload, tally.tally() result)
+_ballot_tally_lock = threading.Lock()
+_polls_lock = threading.Lock()
+
+# Live channel (/ws): subscriptions and votes over one socket, tallies coalesced per interval
+from flask_sock import Sock
+sock = Sock(app)
+broadcaster = live_updates.Broadcaster(supabase, change_hub, interval=float(os.getenv('LIVE_TALLY_INTERVAL', '0.5')))
+
+# VOTE_COUNTER_SHARDS > 1: votes land on shard rows that a compactor folds into options.votes
+import counters
+vote_compactor = counters.Compactor(supabase, on_compact=change_hub.notify)
+
+# HyperLogLog sketches of distinct participants, event-wide and per poll
+import participants
+participant_sketches = participants.Sketches(supabase)
 
 
 # Authentication decorator
@@ -41,23 +116,33 @@ def admin_required(f):
     return decorated_function
 
 
-# Frontend routes
+# Frontend routes: pages reference fingerprinted, precompressed copies under /assets/
+import static_assets
+static_assets.build()
+
+
 @app.route('/')
 def index():
-    return send_from_directory(BASE_DIR, 'index.html')
+    return static_assets.send_page('index.html')
 
 
 @app.route('/admin')
 @app.route('/admin/')
 def admin_page():
-    return send_from_directory(BASE_DIR, 'admin.html')
+    return static_assets.send_page('admin.html')
 
 
 @app.route('/login.html')
 def login_page():
-    return send_from_directory(BASE_DIR, 'login.html')
+    return static_assets.send_page('login.html')
 
 
+@app.route('/assets/<path:filename>')
+def fingerprinted_asset(filename):
+    return static_assets.send_asset(filename)
+
+
+# Unhashed URLs for pages cached before fingerprinting
 @app.route('/style.css')
 def style_css():
     return send_from_directory(BASE_DIR, 'style.css')
@@ -97,32 +182,273 @@ def check_admin():
     return jsonify({'logged_in': session.get('admin_logged_in', False)})
 
 
+# Poll schedule: opens_at / closes_at are optional; NULL means no limit
+from poll_schedule import parse_timestamp, format_timestamp, parse_schedule
+
+
+def poll_status(p, now=None):
+    """'scheduled', 'open' or 'closed' at `now`"""
+    now = now or datetime.now(timezone.utc)
+    opens_at, closes_at = parse_timestamp(p.get('opens_at')), parse_timestamp(p.get('closes_at'))
+    if opens_at and now < opens_at:
+        return 'scheduled'
+    if closes_at and now >= closes_at:
+        return 'closed'
+    return 'open'
+
+
+def schedule_error(p):
+    """Why poll p does not accept answers right now, or None"""
+    status = poll_status(p)
+    if status == 'scheduled':
+        return f"This poll opens at {format_timestamp(p['opens_at'])}."
+    if status == 'closed':
+        return f"This poll closed at {format_timestamp(p['closes_at'])}."
+    return None
+
+
+def next_schedule_change(polls, now=None):
+    """Earliest future opens_at/closes_at: cached responses that include `status` expire then"""
+    now = now or datetime.now(timezone.utc)
+    moments = [parse_timestamp(p.get(column)) for p in polls for column in ('opens_at', 'closes_at')]
+    return min((m for m in moments if m and m > now), default=None)
+
+
 # API routes
+def serialize_poll(p):
+    """Shape a polls row (with embedded options) the way app.js expects it"""
+    return {
+        'id': p['id'],
+        'title': p.get('title'),
+        'description': p.get('description') or '',
+        'poll_type': p.get('poll_type', 'multiple_choice'),  # Add poll_type field
+        'opensLabel': p.get('opens_label', 'Opens today'),
+        'closesLabel': p.get('closes_label', 'Closes in 3 days'),
+        'opensAt': format_timestamp(p.get('opens_at')),
+        'closesAt': format_timestamp(p.get('closes_at')),
+        'status': poll_status(p),
+        'options': [
+            {
+                'id': o['id'],
+                'name': o.get('name'),
+                'votes': o.get('votes'),
+            }
+            for o in (p.get('options') or [])
+        ],
+    }
+
+
+# ?fields= names (as returned by serialize_poll) -> polls columns
+POLL_FIELDS = {
+    'id': ('id',),
+    'title': ('title',),
+    'description': ('description',),
+    'poll_type': ('poll_type',),
+    'opensLabel': ('opens_label',),
+    'closesLabel': ('closes_label',),
+    'opensAt': ('opens_at',),
+    'closesAt': ('closes_at',),
+    'status': ('opens_at', 'closes_at'),
+}
+OPTION_FIELDS = ('id', 'name', 'votes')
+SUMMARY_SELECT = 'id, title, poll_type, opens_at, closes_at, revision, options(id, name, votes, revision)'
+
+
+def parse_fields(raw):
+    """
+    Turn ?fields=title,options.votes into (poll fields, option fields or None).
+    id is always included; bare 'options' means every option field.
+    """
+    names = {name.strip() for name in raw.split(',') if name.strip()}
+    unknown = sorted(n for n in names if n not in POLL_FIELDS and n != 'options'
+                     and not (n.startswith('options.') and n[len('options.'):] in OPTION_FIELDS))
+    if unknown:
+        allowed = list(POLL_FIELDS) + ['options'] + [f'options.{f}' for f in OPTION_FIELDS]
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+    poll_fields = [f for f in POLL_FIELDS if f == 'id' or f in names]
+    option_fields = None
+    if 'options' in names:
+        option_fields = list(OPTION_FIELDS)
+    elif any(n.startswith('options.') for n in names):
+        option_fields = [f for f in OPTION_FIELDS if f == 'id' or f'options.{f}' in names]
+    return poll_fields, option_fields
+
+
+def fields_select(poll_fields, option_fields):
+    """Backend select() for a projection; revisions are always needed for the cursor"""
+    columns = list(dict.fromkeys(c for f in poll_fields for c in POLL_FIELDS[f])) + ['revision']
+    if option_fields is not None:
+        columns.append(f"options({', '.join(option_fields + ['revision'])})")
+    return ', '.join(columns)
+
+
+def project_poll(p, poll_fields, option_fields):
+    data = serialize_poll(p)
+    projected = {f: data[f] for f in poll_fields}
+    if option_fields is not None:
+        projected['options'] = [{f: o[f] for f in option_fields} for o in data['options']]
+    return projected
+
+
+def summarize_poll(p):
+    """Totals and the leading option only, for views that do not list every nominee"""
+    options = p.get('options') or []
+    leader = max(options, key=lambda o: (o['votes'], -o['id']), default=None)
+    return {
+        'id': p['id'],
+        'title': p['title'],
+        'poll_type': p.get('poll_type', 'multiple_choice'),
+        'status': poll_status(p),
+        'totalVotes': sum(o['votes'] for o in options),
+        'optionCount': len(options),
+        'leader': {'id': leader['id'], 'name': leader['name'], 'votes': leader['votes']}
+        if leader and leader['votes'] > 0 else None,
+    }
+
+
+def rank_options(options):
+    """
+    Options ordered by votes with percent of the total and a competition rank
+    (1, 2, 2, 4): tied options share a rank and are flagged `tied`.
+    """
+    total = sum(o['votes'] or 0 for o in options)
+    ordered = sorted(options, key=lambda o: (-(o['votes'] or 0), o['id']))
+    ranked, rank, previous = [], 0, None
+    for position, o in enumerate(ordered, 1):
+        votes = o['votes'] or 0
+        if votes != previous:
+            rank, previous = position, votes
+        ranked.append({
+            'id': o['id'],
+            'name': o['name'],
+            'votes': votes,
+            'percent': round(100 * votes / total, 1) if total else 0.0,
+            'rank': rank,
+        })
+    ranks = [o['rank'] for o in ranked]
+    for o in ranked:
+        o['tied'] = ranks.count(o['rank']) > 1
+    return total, ranked
+
+
+def max_revision(polls):
+    """Highest revision stamped on any of these polls or their options"""
+    revisions = [p.get('revision') or 0 for p in polls]
+    revisions += [o.get('revision') or 0 for p in polls for o in (p.get('options') or [])]
+    return max(revisions, default=0)
+
+
+def revision_state():
+    """
+    {'revision': newest revision in polls, options or deletions, 'horizon': ID of the oldest
+    transaction still in flight, 'pending': whether one is}, from one snapshot (migration 0016)
+    """
+    data = supabase.rpc('revision_state', {}).execute().data
+    return data[0] if isinstance(data, list) else data
+
+
+def current_revision():
+    """
+    Cache key that changes whenever /api/polls would: the newest revision, plus the horizon while a
+    transaction is in flight, since it may still commit changes stamped below that revision
+    """
+    state = revision_state()
+    return state['revision'], state['horizon'] if state['pending'] else None
+
+
 @app.route('/api/polls', methods=['GET'])
 def list_polls():
-    # Fetch all polls ordered by ID ascending (oldest first)
-    response = supabase.table('polls').select('*, options(*)').order('id', desc=False).execute()
-    polls = response.data
-    
-    data = []
-    for p in polls:
-        data.append({
-            'id': p['id'],
-            'title': p['title'],
-            'description': p.get('description') or '',
-            'poll_type': p.get('poll_type', 'multiple_choice'),  # Add poll_type field
-            'opensLabel': p.get('opens_label', 'Opens today'),
-            'closesLabel': p.get('closes_label', 'Closes in 3 days'),
-            'options': [
-                {
-                    'id': o['id'],
-                    'name': o['name'],
-                    'votes': o['votes'],
-                }
-                for o in (p.get('options') or [])
-            ],
-        })
-    return jsonify({'polls': data})
+    """
+    All polls; ?fields= projects columns in the backend query, ?summary=1 returns totals and leaders.
+    Vote counts follow options.votes: with VOTE_COUNTER_SHARDS they trail by up to one compaction
+    interval, since a sharded vote moves no revision until it is compacted.
+    """
+    summary = request.args.get('summary') in ('1', 'true')
+    fields = request.args.get('fields')
+    if summary and fields:
+        return jsonify({'error': 'Use either fields or summary, not both'}), 400
+    if summary:
+        variant, select, shape = 'summary', SUMMARY_SELECT, summarize_poll
+    elif fields:
+        try:
+            poll_fields, option_fields = parse_fields(fields)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        variant = (tuple(poll_fields), tuple(option_fields) if option_fields is not None else None)
+        select = fields_select(poll_fields, option_fields)
+
+        def shape(p):
+            return project_poll(p, poll_fields, option_fields)
+    else:
+        variant, select, shape = 'full', '*, options(*)', serialize_poll
+
+    def stale(entry):
+        # A poll opening or closing changes `status` without touching any revision
+        return entry is None or entry[0] != revision or (entry[2] and datetime.now(timezone.utc) >= entry[2])
+
+    # One call of index-only lookups decides whether the encoded response is still current
+    state = revision_state()
+    revision = (state['revision'], state['horizon'] if state['pending'] else None)
+    entry = _polls_cache.get(variant)
+    if stale(entry):
+        with _polls_lock:
+            entry = _polls_cache.get(variant)
+            if stale(entry):
+                # Fetch all polls ordered by ID ascending (oldest first)
+                response = supabase.table('polls').select(select).order('id', desc=False).execute()
+                polls = response.data
+
+                data = [shape(p) for p in polls]
+                payload = payloads.Payload({'polls': data, 'revision': max(state['revision'], max_revision(polls)),
+                                            'horizon': state['horizon']})
+                entry = (revision, payload, next_schedule_change(polls))
+                _polls_cache[variant] = entry
+    return entry[1].response()
+
+
+@app.route('/api/polls/changes', methods=['GET'])
+def poll_changes():
+    """
+    Return only what changed since the revision and horizon returned by /api/polls or a previous
+    call (?since=&horizon=)
+    """
+    since = request.args.get('since', type=int)
+    horizon = request.args.get('horizon', type=int)
+    if since is None or since < 0:
+        # No usable cursor: the client has to start over from /api/polls
+        return jsonify({'full_reload': True, 'revision': None, 'horizon': None})
+
+    # Rows stamped past `since`, and rows of transactions that were still in flight when the cursor
+    # was read (whatever revision they hold), from one snapshot; see migration 0016
+    data = supabase.rpc('poll_changes', {'p_since': since, 'p_horizon': horizon}).execute().data
+    changes = data[0] if isinstance(data, list) else data
+    # Polls whose metadata or option set changed are sent whole, otherwise only the option counts that moved
+    changed_polls, changed_options, tombstones = changes['polls'], changes['options'], changes['tombstones']
+    changed_ids = {p['id'] for p in changed_polls}
+
+    # Everything newer than `since` is in these results, so their maximum is the new cursor; whatever
+    # is still in flight below it comes through the new horizon
+    revision = max(
+        [since, max_revision(changed_polls)]
+        + [o['revision'] for o in changed_options]
+        + [t['revision'] for t in tombstones]
+    )
+    return payloads.respond({
+        'full_reload': False,
+        'revision': revision,
+        'horizon': changes['horizon'],
+        'polls': [serialize_poll(p) for p in changed_polls],
+        'options': [
+            {'id': o['id'], 'poll_id': o['poll_id'], 'votes': o['votes']}
+            for o in changed_options if o['poll_id'] not in changed_ids
+        ],
+        'deleted': [t['poll_id'] for t in tombstones if t['poll_id'] not in changed_ids],
+    })
+
+
+# approval and ranked_choice polls take ballots listing several options (tally.py)
+POLL_TYPES = ('multiple_choice', 'text_response', 'approval', 'ranked_choice')
+BALLOT_POLL_TYPES = ('approval', 'ranked_choice')
 
 
 @app.route('/api/polls', methods=['POST'])
@@ -137,26 +463,34 @@ def create_poll():
 
         options = [str(o).strip() for o in options if str(o).strip()]
 
-        # Validation: text_response polls don't need options, multiple_choice polls do
-        if poll_type == 'multiple_choice' and len(options) < 2:
-            return jsonify({'error': 'Multiple choice polls require at least two options.'}), 400
+        # Validation: text_response polls don't need options, the other types do
+        if poll_type not in POLL_TYPES:
+            return jsonify({'error': 'Invalid poll type'}), 400
+        if poll_type != 'text_response' and len(options) < 2:
+            return jsonify({'error': 'Polls with options require at least two options.'}), 400
         
         if not title:
             return jsonify({'error': 'Title is required.'}), 400
 
+        try:
+            schedule = parse_schedule(payload)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
         # Insert poll with poll_type
         poll_response = supabase.table('polls').insert({
             'title': title,
             'description': description,
             'poll_type': poll_type,
             'opens_label': 'Opens today',
-            'closes_label': 'Closes in 3 days'
+            'closes_label': 'Closes in 3 days',
+            **schedule,
         }).execute()
         
         poll_id = poll_response.data[0]['id']
         
-        # Insert options (only for multiple_choice polls)
-        if poll_type == 'multiple_choice' and options:
+        # Insert options (every type but text_response)
+        if poll_type != 'text_response' and options:
             options_data = [{'name': name, 'poll_id': poll_id, 'votes': 0} for name in options]
             supabase.table('options').insert(options_data).execute()
 
@@ -168,11 +502,40 @@ def create_poll():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/polls/import', methods=['POST'])
+@admin_required
+def import_polls():
+    """Bulk import polls and options from a JSON or CSV manifest"""
+    import bulk_import
+
+    try:
+        if request.mimetype == 'text/csv':
+            raw_polls = bulk_import.parse_manifest(request.get_data(as_text=True), 'csv')
+        else:
+            raw_polls = bulk_import.parse_manifest(request.get_data(as_text=True), 'json')
+        polls = bulk_import.validate_manifest(raw_polls)
+    except bulk_import.ManifestError as e:
+        return jsonify({'error': str(e), 'details': e.errors}), 400
+
+    try:
+        ids = bulk_import.import_polls(supabase, polls)
+        return jsonify({'imported': len(ids), 'ids': ids}), 201
+    except Exception as e:
+        print(f"Error importing polls: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/api/polls/<int:poll_id>', methods=['DELETE'])
 @admin_required
 def delete_poll(poll_id):
     # Delete poll (options and votes will be cascade deleted by database)
     supabase.table('polls').delete().eq('id', poll_id).execute()
+    supabase.table('participant_sketches').delete().eq('scope', participants.poll_scope(poll_id)).execute()
+    participant_sketches.forget(poll_id)
+    _final_cache.pop(poll_id, None)
+    change_hub.notify(poll_id)
     return jsonify({'status': 'deleted'})
 
 
@@ -193,22 +556,31 @@ def update_poll(poll_id):
             return jsonify({'error': 'Title is required'}), 400
         
         # Validate poll_type
-        if poll_type not in ['multiple_choice', 'text_response']:
+        if poll_type not in POLL_TYPES:
             return jsonify({'error': 'Invalid poll type'}), 400
+
+        try:
+            schedule = parse_schedule(payload)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if schedule and supabase.table('poll_results').select('poll_id').eq('poll_id', poll_id).execute().data:
+            return jsonify({'error': 'This poll is closed and its results are frozen'}), 409
         
         # Update the poll
         update_data = {
             'title': title,
             'description': description,
-            'poll_type': poll_type
+            'poll_type': poll_type,
+            **schedule,
         }
         
         supabase.table('polls').update(update_data).eq('id', poll_id).execute()
         
-        # Update options for multiple_choice polls
-        if poll_type == 'multiple_choice' and options:
-            # Delete existing options
+        # Update options (every type but text_response)
+        if poll_type != 'text_response' and options:
+            # Delete existing options (votes cascade; ballots name option IDs, so they go too)
             supabase.table('options').delete().eq('poll_id', poll_id).execute()
+            supabase.table('ballots').delete().eq('poll_id', poll_id).execute()
             
             # Insert new options
             options_data = [{'name': str(opt).strip(), 'poll_id': poll_id, 'votes': 0} 
@@ -216,6 +588,7 @@ def update_poll(poll_id):
             
             if options_data:
                 supabase.table('options').insert(options_data).execute()
+        change_hub.notify(poll_id)
         
         return jsonify({'status': 'updated', 'id': poll_id})
     except Exception as e:
@@ -225,31 +598,37 @@ def update_poll(poll_id):
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/api/polls/<int:poll_id>/vote', methods=['POST'])
-def vote(poll_id):
-    payload = request.get_json(force=True)
-    option_id = payload.get('option_id')
-    username = (payload.get('username') or '').strip()
-
+def cast_vote(poll_id, option_id, username):
+    """Validate and record one vote; shared by the HTTP route and the live socket"""
     if option_id is None:
-        return jsonify({'error': 'option_id is required'}), 400
+        return {'error': 'option_id is required'}, 400
 
     if not username:
-        return jsonify({'error': 'username is required'}), 400
+        return {'error': 'username is required'}, 400
 
-    # Check if option exists
-    option_response = supabase.table('options').select('*').eq('id', option_id).eq('poll_id', poll_id).execute()
+    # Check if option exists (and fetch the poll's schedule in the same round trip)
+    option_response = (supabase.table('options').select('*, polls(opens_at, closes_at, poll_type, participants_reset_at)')
+                       .eq('id', option_id).eq('poll_id', poll_id).execute())
     if not option_response.data:
-        return jsonify({'error': 'Option not found'}), 404
+        return {'error': 'Option not found'}, 404
+    if option_response.data[0]['polls'].get('poll_type') in BALLOT_POLL_TYPES:
+        return {'error': 'This poll takes a ballot: send option_ids instead of option_id'}, 400
+    closed = schedule_error(option_response.data[0]['polls'])
+    if closed:
+        return {'error': closed}, 403
 
     # Enforce one vote per poll per username
     existing_vote = supabase.table('votes').select('*').eq('poll_id', poll_id).eq('username', username).execute()
     if existing_vote.data:
-        return jsonify({'error': 'You have already voted on this poll.'}), 400
+        return {'error': 'You have already voted on this poll.'}, 400
 
     # Increment vote count
     option = option_response.data[0]
-    supabase.table('options').update({'votes': option['votes'] + 1}).eq('id', option_id).execute()
+    if counters.enabled():
+        counters.increment(supabase, poll_id, option_id)
+        vote_compactor.touch()
+    else:
+        supabase.table('options').update({'votes': option['votes'] + 1}).eq('id', option_id).execute()
     
     # Record the vote
     supabase.table('votes').insert({
@@ -257,8 +636,588 @@ def vote(poll_id):
         'poll_id': poll_id,
         'option_id': option_id
     }).execute()
+    count_participant(poll_id, username, option['polls'].get('participants_reset_at'))
+    change_hub.notify(poll_id)
 
-    return jsonify({'status': 'ok'})
+    return {'status': 'ok'}, 200
+
+
+def count_participant(poll_id, username, reset_at=None):
+    """
+    Add a voter to the participant sketches (reset_at: the poll's participants_reset_at); the vote
+    stands either way (participants.py --rebuild catches up)
+    """
+    try:
+        participant_sketches.add(poll_id, username, reset_at)
+    except Exception as e:
+        print(f"Error counting participant of poll {poll_id}: {e}")
+
+
+def cast_ballot(poll_id, option_ids, username):
+    """Validate and record the ballot of an approval or ranked_choice poll (option_ids in order of preference)"""
+    import tally
+
+    if not username:
+        return {'error': 'username is required'}, 400
+
+    polls = supabase.table('polls').select('poll_type, opens_at, closes_at, participants_reset_at, options(id)').eq('id', poll_id).execute().data
+    if not polls:
+        return {'error': 'Poll not found'}, 404
+    poll = polls[0]
+    if poll.get('poll_type') not in BALLOT_POLL_TYPES:
+        return {'error': 'option_ids is for approval and ranked_choice polls; send option_id'}, 400
+    if tally.np is None:
+        return {'error': 'Ballots need numpy on the server (pip install numpy)'}, 501
+    closed = schedule_error(poll)
+    if closed:
+        return {'error': closed}, 403
+    try:
+        ballot = tally.validate_ballot(poll['poll_type'], [o['id'] for o in poll['options']], option_ids)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+
+    try:
+        tally.cast_ballot(supabase, poll_id, username, ballot)
+    except Exception as e:
+        if getattr(e, 'code', None) == '23505':
+            return {'error': 'You have already voted on this poll.'}, 400
+        raise
+    count_participant(poll_id, username, poll.get('participants_reset_at'))
+    change_hub.notify(poll_id)
+    return {'status': 'ok'}, 200
+
+
+@app.route('/api/polls/<int:poll_id>/vote', methods=['POST'])
+def vote(poll_id):
+    """{"option_id", "username"}, or {"option_ids": [...], "username"} for approval and ranked_choice polls"""
+    payload = request.get_json(force=True)
+    username = (payload.get('username') or '').strip()
+
+    if 'option_ids' in payload:
+        body, status = cast_ballot(poll_id, payload.get('option_ids'), username)
+    else:
+        body, status = cast_vote(poll_id, payload.get('option_id'), username)
+    return jsonify(body), status
+
+
+@app.route('/api/polls/<int:poll_id>/wait', methods=['GET'])
+def wait_for_poll_change(poll_id):
+    """
+    Long-poll until the poll's tally version moves past ?version= or ?timeout= seconds pass. With
+    VOTE_COUNTER_SHARDS a vote moves the version only once compacted, so the tally trails by up
+    to one compaction interval.
+    """
+    version = request.args.get('version', default=0, type=int)
+    timeout = min(max(request.args.get('timeout', default=25.0, type=float), 0.0), LONG_POLL_MAX_TIMEOUT)
+
+    current = change_hub.poll_version(poll_id)
+    if current is None:
+        return jsonify({'error': 'Poll not found'}), 404
+    if current <= version:
+        current = change_hub.wait(poll_id, version, timeout)
+        if current == live_updates.DELETED:
+            return jsonify({'error': 'Poll not found'}), 404
+        if current is None:
+            return jsonify({'pollId': poll_id, 'version': version, 'changed': False})
+
+    # Waiters woken by the same change share one tally fetch and one encoding
+    with _tally_lock:
+        cached = _tally_cache.get(poll_id)
+        # A tally read while a transaction was in flight may miss a change it commits below the
+        # poll's version; it is only reused until the horizon moves. Opening or closing changes
+        # `status` without a new version.
+        if cached is None or cached[0] < current or (cached[3] and datetime.now(timezone.utc) >= cached[3]) \
+                or (cached[2][1] is not None and cached[2] != current_revision()):
+            built = current_revision()
+            polls = supabase.table('polls').select('*, options(*)').eq('id', poll_id).execute().data
+            if not polls:
+                return jsonify({'error': 'Poll not found'}), 404
+            version = max_revision(polls)
+            cached = (version, payloads.Payload(
+                {'pollId': poll_id, 'version': version, 'changed': True, 'poll': serialize_poll(polls[0])}
+            ), built, next_schedule_change(polls))
+            _tally_cache[poll_id] = cached
+    return cached[1].response()
+
+
+@sock.route('/ws')
+def live_channel(ws):
+    """
+    Client frames:  {"type": "subscribe"|"unsubscribe", "polls": [ids]}
+                    {"type": "vote", "poll_id", "option_id", "username", "ref"}
+    Server frames:  {"type": "snapshot", "poll", "version"} once per subscribed poll,
+                    {"type": "ack", "ref", "status", "error"?} for each vote,
+                    {"type": "tally", "poll_id", "version", "total", "options"} at most
+                    once per poll per interval, {"type": "deleted", "poll_id"}, {"type": "error"}
+    Tallies follow options.votes: with VOTE_COUNTER_SHARDS they trail by up to one compaction interval.
+    """
+    conn = live_updates.LiveConnection(ws)
+    try:
+        while True:
+            message = ws.receive(timeout=0.1)
+            if message is not None:
+                handle_live_message(conn, message)
+            conn.flush()
+    finally:
+        broadcaster.unsubscribe(conn)
+
+
+def handle_live_message(conn, message):
+    try:
+        frame = json.loads(message)
+        kind = frame.get('type')
+    except (ValueError, AttributeError):
+        conn.send({'type': 'error', 'error': 'Frames must be JSON objects'})
+        return
+
+    if kind in ('subscribe', 'unsubscribe'):
+        try:
+            poll_ids = {int(pid) for pid in frame.get('polls') or []}
+        except (TypeError, ValueError):
+            conn.send({'type': 'error', 'error': 'polls must be a list of poll IDs'})
+            return
+        if kind == 'unsubscribe':
+            broadcaster.unsubscribe(conn, poll_ids)
+            return
+        polls = supabase.table('polls').select('*, options(*)').in_('id', list(poll_ids)).execute().data if poll_ids else []
+        versions = {p['id']: max_revision([p]) for p in polls}
+        broadcaster.subscribe(conn, versions, versions)
+        for p in polls:
+            conn.send({'type': 'snapshot', 'version': versions[p['id']], 'poll': serialize_poll(p)})
+        for missing in sorted(poll_ids - set(versions)):
+            conn.send({'type': 'error', 'poll_id': missing, 'error': 'Poll not found'})
+    elif kind == 'vote':
+        try:
+            poll_id = int(frame.get('poll_id'))
+        except (TypeError, ValueError):
+            conn.send({'type': 'ack', 'ref': frame.get('ref'), 'status': 400, 'error': 'poll_id is required'})
+            return
+        username = str(frame.get('username') or '').strip()
+        if 'option_ids' in frame:
+            body, status = cast_ballot(poll_id, frame.get('option_ids'), username)
+        else:
+            body, status = cast_vote(poll_id, frame.get('option_id'), username)
+        conn.send({'type': 'ack', 'ref': frame.get('ref'), 'poll_id': poll_id, **body, 'status': status})
+    else:
+        conn.send({'type': 'error', 'error': f'Unknown frame type: {kind}'})
+
+
+def tally_available():
+    import tally
+
+    return tally.np is not None
+
+
+def ballot_leaders(result):
+    """Winning option IDs of a tally.tally() result (None without one)"""
+    if result is None:
+        return []
+    if result['method'] == 'instant_runoff':
+        return [result['winner']] if result['winner'] is not None else result['tied']
+    top = max((o['approvals'] for o in result['options']), default=0)
+    return sorted(o['id'] for o in result['options'] if top and o['approvals'] == top)
+
+
+def freeze_results(poll):
+    """Write the immutable final snapshot of a closed poll; the first writer wins"""
+    if counters.enabled():
+        poll = counters.with_pending(supabase, poll)
+    options = sorted(poll.get('options') or [], key=lambda o: o['id'])
+    results = {
+        'pollId': poll['id'],
+        'title': poll['title'],
+        'poll_type': poll.get('poll_type', 'multiple_choice'),
+        'closedAt': format_timestamp(poll['closes_at']),
+        'totalVotes': sum(o['votes'] for o in options),
+        'options': [{'id': o['id'], 'name': o['name'], 'votes': o['votes']} for o in options],
+    }
+    if results['poll_type'] == 'text_response':
+        count = supabase.table('text_responses').select('id', count='exact').eq('poll_id', poll['id']).execute().count
+        results['responses'] = count or 0
+    elif results['poll_type'] in BALLOT_POLL_TYPES and tally_available():
+        # options.votes of a ranked_choice poll holds first preferences; the winner is the runoff's
+        results['tally'] = ballot_tally(poll)[1]
+    try:
+        return supabase.table('poll_results').insert({
+            'poll_id': poll['id'],
+            'closed_at': results['closedAt'],
+            'results': results,
+            'frozen_at': datetime.now(timezone.utc).isoformat(),
+        }).execute().data[0]
+    except Exception as e:
+        if getattr(e, 'code', None) != '23505':
+            raise
+        # Another worker froze it first; theirs is the record
+        return supabase.table('poll_results').select('*').eq('poll_id', poll['id']).execute().data[0]
+
+
+@app.route('/api/polls/<int:poll_id>/final-results', methods=['GET'])
+def final_results(poll_id):
+    """Frozen results of a closed poll: computed once, then served from memory with a long cache lifetime"""
+    payload = _final_cache.get(poll_id)
+    if payload is None:
+        records = supabase.table('poll_results').select('*').eq('poll_id', poll_id).execute().data
+        if not records:
+            polls = supabase.table('polls').select('*, options(*)').eq('id', poll_id).execute().data
+            if not polls:
+                archived = supabase.table('poll_archive').select('snapshot').eq('poll_id', poll_id).execute().data
+                if not archived:
+                    return jsonify({'error': 'Poll not found'}), 404
+                # Archived polls carry their results in the snapshot
+                records = [archived[0]['snapshot']]
+            elif poll_status(polls[0]) != 'closed':
+                return jsonify({
+                    'error': 'This poll has not closed yet',
+                    'status': poll_status(polls[0]),
+                    'closesAt': format_timestamp(polls[0].get('closes_at')),
+                }), 409
+            else:
+                records = [freeze_results(polls[0])]
+        record = records[0]
+        payload = payloads.Payload({**record['results'], 'frozenAt': format_timestamp(record['frozen_at'])})
+        _final_cache[poll_id] = payload
+
+    response = payload.response()
+    response.headers['Cache-Control'] = FINAL_RESULTS_CACHE_CONTROL
+    return response
+
+
+@app.route('/api/polls/<int:poll_id>/results', methods=['GET'])
+def get_poll_results(poll_id):
+    """
+    Per-option counts, percentages, ranks and ties, aggregated server-side from the option counters
+    (or the frozen snapshot once the poll has closed). ?top=k keeps ranks 1..k, ties at k included.
+    Approval and ranked_choice polls add their ballot tally, which also names the leaders.
+    """
+    top = request.args.get('top', type=int)
+    if top is not None and top < 1:
+        return jsonify({'error': 'top must be a positive integer'}), 400
+
+    polls = supabase.table('polls').select('id, title, poll_type, opens_at, closes_at, options(id, name, votes)') \
+        .eq('id', poll_id).execute().data
+    if polls:
+        poll = polls[0]
+        status = poll_status(poll)
+        final = status == 'closed'
+        if final:
+            # Same numbers as /final-results, whatever happens to the counters after closing
+            records = supabase.table('poll_results').select('results').eq('poll_id', poll_id).execute().data
+            frozen = (records[0] if records else freeze_results(poll))['results']
+            options = frozen['options']
+        elif counters.enabled():
+            options = counters.with_pending(supabase, poll)['options']
+        else:
+            options = poll.get('options') or []
+    else:
+        archived = supabase.table('poll_archive').select('snapshot').eq('poll_id', poll_id).execute().data
+        if not archived:
+            return jsonify({'error': 'Poll not found'}), 404
+        poll, status, final = archived[0]['snapshot']['poll'], 'archived', True
+        options = archived[0]['snapshot']['results']['options']
+        frozen = archived[0]['snapshot']['results']
+
+    total, ranked = rank_options(options)
+    body = {
+        'pollId': poll_id,
+        'title': poll['title'],
+        'poll_type': poll.get('poll_type') or 'multiple_choice',
+        'status': status,
+        'final': final,
+        'totalVotes': total,
+        'optionCount': len(ranked),
+        'leaders': [o['id'] for o in ranked if o['rank'] == 1 and o['votes'] > 0],
+        'options': [o for o in ranked if top is None or o['rank'] <= top],
+    }
+    if body['poll_type'] in BALLOT_POLL_TYPES:
+        # A ranked_choice poll's counters hold first preferences: its leaders come from the runoff
+        if status == 'archived':
+            result = archived_tally(archived[0]['snapshot'])
+        elif final and 'tally' in frozen:
+            result = frozen['tally']
+        else:
+            result = ballot_tally(poll)[1] if tally_available() else None
+        body['tally'] = result
+        body['leaders'] = ballot_leaders(result)
+    if body['poll_type'] == 'text_response':
+        if status == 'archived':
+            body['responses'] = len(archived[0]['snapshot']['text_responses'])
+        else:
+            body['responses'] = supabase.table('text_responses').select('id', count='exact') \
+                .eq('poll_id', poll_id).limit(1).execute().count or 0
+    return payloads.respond(body)
+
+
+BUCKET_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+MAX_TIMELINE_BUCKET = 7 * 86400
+
+
+def parse_bucket(raw):
+    """'30s', '1m', '15m', '1h', '1d' -> seconds; raises ValueError"""
+    match = re.fullmatch(r'(\d+)([smhd])', (raw or '').strip())
+    seconds = int(match.group(1)) * BUCKET_UNITS[match.group(2)] if match else 0
+    if not 1 <= seconds <= MAX_TIMELINE_BUCKET:
+        raise ValueError('bucket must look like 30s, 1m, 15m, 1h or 1d (at most 7d)')
+    return seconds
+
+
+def timeline_params():
+    """?bucket=, ?since=, ?until= of a timeline request; raises ValueError"""
+    bucket = request.args.get('bucket', '1m')
+    try:
+        since, until = format_timestamp(request.args.get('since')), format_timestamp(request.args.get('until'))
+    except (TypeError, ValueError):
+        raise ValueError('since and until must be ISO-8601 timestamps')
+    return {'bucket': bucket, 'bucketSeconds': parse_bucket(bucket), 'since': since, 'until': until}
+
+
+def fetch_timeline(poll_id, params):
+    """Grouped counts from the vote_timeline database function (poll_id None: every poll)"""
+    return supabase.rpc('vote_timeline', {
+        'p_poll_id': poll_id,
+        'p_bucket_seconds': params['bucketSeconds'],
+        'p_since': params['since'],
+        'p_until': params['until'],
+    }).execute().data
+
+
+def group_buckets(rows, key, field):
+    """Sparse histogram: one entry per non-empty bucket with {key value: votes}"""
+    buckets = []
+    for row in rows:
+        start = format_timestamp(row['bucket_start'])
+        if not buckets or buckets[-1]['start'] != start:
+            buckets.append({'start': start, 'total': 0, field: {}})
+        buckets[-1]['total'] += row['votes']
+        buckets[-1][field][str(row[key])] = row['votes']
+    return buckets
+
+
+@app.route('/api/polls/<int:poll_id>/timeline', methods=['GET'])
+def poll_timeline(poll_id):
+    """Votes per time bucket and option (?bucket=1m, optional ?since= / ?until=), aggregated in the database"""
+    polls = supabase.table('polls').select('id, title, options(id, name)').eq('id', poll_id).execute().data
+    if not polls:
+        return jsonify({'error': 'Poll not found'}), 404
+    try:
+        params = timeline_params()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return payloads.respond({
+        'pollId': poll_id,
+        'title': polls[0]['title'],
+        **params,
+        'options': [{'id': o['id'], 'name': o['name']} for o in polls[0].get('options') or []],
+        'buckets': group_buckets(fetch_timeline(poll_id, params), 'option_id', 'options'),
+    })
+
+
+@app.route('/api/polls/timeline', methods=['GET'])
+def all_polls_timeline():
+    """Votes per time bucket and poll across every poll"""
+    try:
+        params = timeline_params()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return payloads.respond({**params, 'buckets': group_buckets(fetch_timeline(None, params), 'poll_id', 'polls')})
+
+
+@app.route('/api/polls/<int:poll_id>/tally', methods=['GET'])
+def get_poll_tally(poll_id):
+    """
+    Approvals per option, or the instant-runoff count of a ranked_choice poll round by round;
+    recomputed only when a ballot has been cast (or ballots cleared) since the last tally
+    """
+    import tally
+
+    polls = supabase.table('polls').select('id, title, poll_type, options(id, name)').eq('id', poll_id).execute().data
+    if not polls:
+        return jsonify({'error': 'Poll not found'}), 404
+    poll = polls[0]
+    if poll.get('poll_type') not in BALLOT_POLL_TYPES:
+        return jsonify({'error': 'Only approval and ranked_choice polls have a ballot tally'}), 400
+    if tally.np is None:
+        return jsonify({'error': 'Tallies need numpy on the server (pip install numpy)'}), 501
+
+    return ballot_tally(poll)[0].response()
+
+
+def ballot_tally(poll):
+    """
+    (encoded /tally Payload, tally.tally() result) of an approval or ranked_choice poll
+    ({'id', 'title', 'poll_type', 'options': [{'id', 'name'}]}), shared by /tally and /results
+    """
+    import tally
+
+    poll_id = poll['id']
+    key = (tally.last_ballot_id(supabase, poll_id), tuple(sorted(o['id'] for o in poll['options'])))
+    # Requests arriving while a tally runs wait for it instead of starting their own
+    with _ballot_tally_lock:
+        cached = _ballot_tally_cache.get(poll_id)
+        if cached is None or cached[0] != key:
+            result = tally.tally(supabase, poll)
+            body = {
+                'pollId': poll_id,
+                'title': poll['title'],
+                'poll_type': poll['poll_type'],
+                'options': [{'id': o['id'], 'name': o['name']} for o in sorted(poll['options'], key=lambda o: o['id'])],
+                **result,
+            }
+            cached = (key, payloads.Payload(body), result)
+            _ballot_tally_cache[poll_id] = cached
+    return cached[1], cached[2]
+
+
+LEADERBOARD_DEFAULT_LIMIT = 20
+LEADERBOARD_MAX_LIMIT = 200
+
+
+@app.route('/api/leaderboard', methods=['GET'])
+def leaderboard():
+    """
+    Nominees ranked by votes summed over every poll that lists them, names matched case- and
+    whitespace-insensitively; ?limit=, ?min_polls= keeps names nominated in at least that many polls
+    """
+    limit = request.args.get('limit', LEADERBOARD_DEFAULT_LIMIT, type=int)
+    min_polls = request.args.get('min_polls', 1, type=int)
+    if limit < 1 or limit > LEADERBOARD_MAX_LIMIT:
+        return jsonify({'error': f'limit must be between 1 and {LEADERBOARD_MAX_LIMIT}'}), 400
+
+    # name_leaderboard is kept current by a trigger on options (migrations/postgres/0012)
+    rows = supabase.table('name_leaderboard').select('display_name, votes, polls') \
+        .gt('votes', 0).gte('polls', min_polls).order('votes', desc=True).order('name_key') \
+        .limit(limit).execute().data
+    # Row positions stand in for option IDs so rank_options keeps the name_key order between ties
+    _, ranked = rank_options([{'id': i, 'name': r['display_name'], 'votes': r['votes']} for i, r in enumerate(rows)])
+    ranked = [{'rank': o['rank'], 'name': o['name'], 'votes': o['votes'], 'polls': rows[o['id']]['polls'], 'tied': o['tied']}
+              for o in ranked]
+    return payloads.respond({'leaderboard': ranked})
+
+
+@app.route('/api/participants', methods=['GET'])
+def event_participants():
+    """Approximate distinct voters and responders of the whole event, from its HyperLogLog sketch"""
+    return payloads.respond({'participants': participants.counts(supabase)})
+
+
+@app.route('/api/polls/<int:poll_id>/participants', methods=['GET'])
+def poll_participants(poll_id):
+    """Approximate distinct voters or responders of one poll"""
+    if not supabase.table('polls').select('id').eq('id', poll_id).execute().data:
+        return jsonify({'error': 'Poll not found'}), 404
+    return payloads.respond({'pollId': poll_id, 'participants': participants.counts(supabase, participants.poll_scope(poll_id))})
+
+
+@app.route('/api/polls/<int:poll_id>/archive', methods=['POST'])
+@admin_required
+def archive_poll(poll_id):
+    """Move a closed poll into the archive; {"force": true} also archives one that has not closed"""
+    import archive
+
+    force = bool((request.get_json(silent=True) or {}).get('force'))
+    try:
+        result = archive.archive_poll(supabase, poll_id, force=force)
+    except Exception as e:
+        code = getattr(e, 'code', None)
+        if code == archive.POLL_NOT_FOUND:
+            return jsonify({'error': 'Poll not found'}), 404
+        if code == archive.POLL_NOT_CLOSED:
+            return jsonify({'error': 'This poll has not closed yet; pass "force": true to archive it anyway'}), 409
+        print(f"Error archiving poll {poll_id}: {e}")
+        return jsonify({'error': str(e)}), 500
+    participant_sketches.forget(poll_id)
+    _final_cache.pop(poll_id, None)
+    _tally_cache.pop(poll_id, None)
+    change_hub.notify(poll_id)
+    return jsonify({'status': 'archived', **result})
+
+
+@app.route('/api/archive', methods=['GET'])
+def list_archived_polls():
+    """Archived polls, newest first, without their snapshots"""
+    import archive
+
+    rows = supabase.table('poll_archive').select(archive.ARCHIVE_LIST_COLUMNS) \
+        .order('archived_at', desc=True).execute().data
+    return jsonify({'polls': [
+        {
+            'id': r['poll_id'],
+            'title': r['title'],
+            'poll_type': r.get('poll_type') or 'multiple_choice',
+            'closesAt': format_timestamp(r.get('closes_at')),
+            'archivedAt': format_timestamp(r['archived_at']),
+            'totalVotes': r['total_votes'],
+            'responseCount': r['response_count'],
+        }
+        for r in rows
+    ]})
+
+
+def archived_tally(snapshot):
+    """
+    Tally of an archived approval or ranked_choice poll: the one frozen with its results, or a
+    recount of the ballots in the snapshot (None without numpy)
+    """
+    import tally
+
+    if 'tally' in snapshot['results']:
+        return snapshot['results']['tally']
+    if tally.np is None:
+        return None
+    poll = {**snapshot['poll'], 'options': snapshot['options']}
+    return tally.tally(None, poll, tally.group_ballots(snapshot.get('ballots') or []))
+
+
+@app.route('/api/archive/<int:poll_id>', methods=['GET'])
+def get_archived_poll(poll_id):
+    """
+    One archived poll and its results, with the ballot tally of approval and ranked_choice polls;
+    ?full=1 adds its votes, ballots and text responses
+    """
+    rows = supabase.table('poll_archive').select('snapshot, archived_at').eq('poll_id', poll_id).execute().data
+    if not rows:
+        return jsonify({'error': 'Poll not found in the archive'}), 404
+    snapshot = rows[0]['snapshot']
+    body = {
+        'poll': {**serialize_poll({**snapshot['poll'], 'options': snapshot['options']}), 'archived': True},
+        'results': snapshot['results'],
+        'archivedAt': format_timestamp(rows[0]['archived_at']),
+    }
+    if snapshot['poll'].get('poll_type') in BALLOT_POLL_TYPES:
+        body['tally'] = archived_tally(snapshot)
+    if request.args.get('full') in ('1', 'true'):
+        body['votes'] = snapshot['votes']
+        body['ballots'] = snapshot.get('ballots', [])
+        body['text_responses'] = snapshot['text_responses']
+    return payloads.respond(body)
+
+
+@app.route('/api/admin/analytics', methods=['GET'])
+@admin_required
+def voter_analytics():
+    """Turnout, voter overlap between polls and co-voting between options; ?polls=1,2,3 &top=k"""
+    import analytics
+
+    if analytics.np is None:
+        return jsonify({'error': 'Analytics needs numpy on the server (pip install numpy)'}), 501
+    try:
+        poll_ids = sorted({int(p) for p in request.args.get('polls', '').split(',') if p.strip()})
+        top = int(request.args.get('top', 20))
+    except ValueError:
+        return jsonify({'error': 'polls must be comma-separated poll IDs and top an integer'}), 400
+    if not 1 <= top <= 200:
+        return jsonify({'error': 'top must be between 1 and 200'}), 400
+
+    key = (tuple(poll_ids), top)
+    revision = current_revision()
+    cached = _analytics_cache.get(key)
+    if cached and cached[0] == revision:
+        return payloads.respond(cached[1])
+    try:
+        report = analytics.report(supabase, poll_ids or None, top)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    _analytics_cache[key] = (revision, report)
+    return payloads.respond(report)
 
 
 @app.route('/api/polls/<int:poll_id>/votes', methods=['GET'])
@@ -293,13 +1252,19 @@ def clear_poll_votes(poll_id):
         if not poll_response.data:
             return jsonify({'error': 'Poll not found'}), 404
         
-        # Delete all votes for this poll
+        # Delete all votes and ballots for this poll
         supabase.table('votes').delete().eq('poll_id', poll_id).execute()
+        supabase.table('ballots').delete().eq('poll_id', poll_id).execute()
+        supabase.table('option_vote_shards').delete().eq('poll_id', poll_id).execute()
+        # Sketches cannot forget single voters: the poll's starts over (the event's keeps them)
+        participants.reset_polls(supabase, [poll_id])
+        participant_sketches.forget(poll_id)
         
         # Reset vote counts on all options to 0
         options = supabase.table('options').select('id').eq('poll_id', poll_id).execute()
         for option in options.data:
             supabase.table('options').update({'votes': 0}).eq('id', option['id']).execute()
+        change_hub.notify(poll_id)
         
         return jsonify({'status': 'ok', 'message': 'All votes cleared successfully'})
     except Exception as e:
@@ -329,18 +1294,31 @@ def submit_text_response(poll_id):
         poll = poll_response.data[0]
         if poll.get('poll_type') != 'text_response':
             return jsonify({'error': 'This poll does not accept text responses'}), 400
+        closed = schedule_error(poll)
+        if closed:
+            return jsonify({'error': closed}), 403
         
         # Check if user already responded
-        existing = supabase.table('text_responses').select('*').eq('poll_id', poll_id).eq('username', username).execute()
+        existing = supabase.table('text_responses').select('id').eq('poll_id', poll_id).eq('username', username).execute()
         if existing.data:
             return jsonify({'error': 'You have already responded to this poll'}), 400
         
-        # Insert text response
-        supabase.table('text_responses').insert({
-            'poll_id': poll_id,
-            'username': username,
-            'response_text': response_text
-        }).execute()
+        # Insert text response, counting its words for /text-responses/terms in the same transaction
+        import text_terms
+        try:
+            response_id = text_terms.add_response(supabase, poll_id, username, response_text)
+        except Exception as e:
+            if getattr(e, 'code', None) == '23505':
+                return jsonify({'error': 'You have already responded to this poll'}), 400
+            raise
+
+        # Near-duplicate clustering; the answer is stored either way, text_clusters.py can recluster later
+        import text_clusters
+        try:
+            text_clusters.add_response(supabase, poll_id, response_id, response_text)
+        except Exception as e:
+            print(f"Error clustering text response {response_id}: {e}")
+        count_participant(poll_id, username, poll.get('participants_reset_at'))
         
         return jsonify({'status': 'ok'}), 201
     except Exception as e:
@@ -350,17 +1328,121 @@ def submit_text_response(poll_id):
         return jsonify({'error': str(e)}), 500
 
 
+TEXT_RESPONSE_COLUMNS = 'id, poll_id, username, response_text, created_at'
+TEXT_RESPONSES_PAGE_SIZE = 50
+TEXT_RESPONSES_MAX_PAGE_SIZE = 500
+
+
+def tsquery_terms(q):
+    """Search box text -> to_tsquery string matching every word, the last one as a prefix"""
+    words = re.findall(r'\w+', q.lower())
+    return ' & '.join(words[:-1] + [words[-1] + ':*']) if words else None
+
+
 @app.route('/api/polls/<int:poll_id>/text-responses', methods=['GET'])
 def get_text_responses(poll_id):
-    """Get all text responses for a poll"""
+    """
+    One page of a poll's text responses, oldest first.
+    ?q= full-text search over response_text, ?username= login prefix,
+    ?limit= page size, ?cursor= the nextCursor of the previous page.
+    """
+    limit = request.args.get('limit', TEXT_RESPONSES_PAGE_SIZE, type=int)
+    cursor = request.args.get('cursor', type=int)
+    if limit < 1 or limit > TEXT_RESPONSES_MAX_PAGE_SIZE:
+        return jsonify({'error': f'limit must be between 1 and {TEXT_RESPONSES_MAX_PAGE_SIZE}'}), 400
+    q = (request.args.get('q') or '').strip()
+    username = (request.args.get('username') or '').strip()
     try:
-        responses = supabase.table('text_responses').select('*').eq('poll_id', poll_id).order('created_at').execute()
-        return jsonify({'pollId': poll_id, 'responses': responses.data})
+        def filtered(query):
+            query = query.eq('poll_id', poll_id)
+            if q:
+                terms = tsquery_terms(q)
+                query = query.text_search('search', terms) if terms else query.in_('id', [])
+            if username:
+                query = query.ilike('username', re.sub(r'[%*]', '', username) + '*')
+            return query
+
+        # Keyset pagination on id: every page is an index range scan, however deep
+        query = filtered(supabase.table('text_responses').select(TEXT_RESPONSE_COLUMNS))
+        if cursor is not None:
+            query = query.gt('id', cursor)
+        rows = query.order('id').limit(limit + 1).execute().data
+        body = {
+            'pollId': poll_id,
+            'responses': rows[:limit],
+            'nextCursor': rows[limit - 1]['id'] if len(rows) > limit else None,
+        }
+        if cursor is None:
+            # Only the first page pays for the count
+            body['total'] = filtered(supabase.table('text_responses').select('id', count='exact')).limit(1).execute().count
+        return jsonify(body)
     except Exception as e:
         print(f"Error getting text responses: {e}")
         return jsonify({'error': str(e)}), 500
 
 
+TERMS_DEFAULT_LIMIT = 20
+TERMS_MAX_LIMIT = 200
+
+
+@app.route('/api/polls/<int:poll_id>/text-responses/terms', methods=['GET'])
+def get_text_response_terms(poll_id):
+    """
+    Most mentioned words and bigrams of a text_response poll, from the counts kept by text_terms.py.
+    ?kind=word|bigram for one list, ?limit= per list, ?as=options for the {name, votes} shape of poll options.
+    """
+    import text_terms
+
+    limit = request.args.get('limit', TERMS_DEFAULT_LIMIT, type=int)
+    if limit < 1 or limit > TERMS_MAX_LIMIT:
+        return jsonify({'error': f'limit must be between 1 and {TERMS_MAX_LIMIT}'}), 400
+    kind = request.args.get('kind')
+    if kind is not None and kind not in text_terms.KINDS:
+        return jsonify({'error': f"kind must be one of {', '.join(text_terms.KINDS)}"}), 400
+
+    if request.args.get('as') == 'options':
+        terms = text_terms.top_terms(supabase, poll_id, kind or 'word', limit)
+        return jsonify({'pollId': poll_id, 'options': [{'name': t['term'], 'votes': t['count']} for t in terms]})
+
+    total = supabase.table('text_responses').select('id', count='exact').eq('poll_id', poll_id).limit(1).execute().count
+    body = {'pollId': poll_id, 'responses': total or 0}
+    for k in ([kind] if kind else text_terms.KINDS):
+        body[f'{k}s'] = text_terms.top_terms(supabase, poll_id, k, limit)
+    return jsonify(body)
+
+
+@app.route('/api/polls/<int:poll_id>/text-responses/clusters', methods=['GET'])
+def get_text_response_clusters(poll_id):
+    """Groups of near-duplicate answers, largest first; ?limit=, ?min_size= (default 1)"""
+    limit = request.args.get('limit', TERMS_DEFAULT_LIMIT, type=int)
+    min_size = request.args.get('min_size', 1, type=int)
+    if limit < 1 or limit > TERMS_MAX_LIMIT:
+        return jsonify({'error': f'limit must be between 1 and {TERMS_MAX_LIMIT}'}), 400
+
+    rows = supabase.table('text_response_clusters').select('id, label, size', count='exact') \
+        .eq('poll_id', poll_id).gte('size', max(min_size, 1)) \
+        .order('size', desc=True).order('id').limit(limit).execute()
+    total = supabase.table('text_responses').select('id', count='exact').eq('poll_id', poll_id).limit(1).execute().count
+    return jsonify({
+        'pollId': poll_id,
+        'responses': total or 0,
+        'clusterCount': rows.count or 0,
+        'clusters': rows.data,
+    })
+
+
+@app.route('/api/polls/<int:poll_id>/text-responses/clusters/<int:cluster_id>', methods=['GET'])
+def get_text_response_cluster(poll_id, cluster_id):
+    """The answers grouped into one cluster"""
+    cluster = supabase.table('text_response_clusters').select('id, label, size') \
+        .eq('id', cluster_id).eq('poll_id', poll_id).execute().data
+    if not cluster:
+        return jsonify({'error': 'Cluster not found'}), 404
+    members = supabase.table('text_response_minhash').select(f'response_id, text_responses({TEXT_RESPONSE_COLUMNS})') \
+        .eq('cluster_id', cluster_id).order('response_id').execute().data
+    return jsonify({**cluster[0], 'pollId': poll_id, 'responses': [m['text_responses'] for m in members]})
+
+
 @app.route('/api/polls/<int:poll_id>/votes/export', methods=['GET'])
 @admin_required
 def export_poll_votes_csv(poll_id):
@@ -377,6 +1459,8 @@ def export_poll_votes_csv(poll_id):
         votes_response = supabase.table('votes').select('*, options(name), created_at').eq('poll_id', poll_id).order('created_at').execute()
         
         # Create CSV
+        import csv
+        from io import StringIO
         output = StringIO()
         writer = csv.writer(output)
         
@@ -398,7 +1482,6 @@ def export_poll_votes_csv(poll_id):
         output.close()
         
         # Clean filename - remove emojis and special characters
-        import re
         clean_title = re.sub(r'[^\w\s-]', '', poll['title'])
         clean_title = clean_title.replace(' ', '_')[:50]  # Limit length
         filename = f"poll_{poll_id}_{clean_title}_votes.csv"
@@ -422,6 +1505,8 @@ def export_all_votes_csv():
         votes_response = supabase.table('votes').select('*, polls(id, title), options(name), created_at').order('created_at').execute()
         
         # Create CSV
+        import csv
+        from io import StringIO
         output = StringIO()
         writer = csv.writer(output)
         
@@ -465,6 +1550,8 @@ def export_polls_summary_csv():
         polls_response = supabase.table('polls').select('*, options(*)').order('id').execute()
         
         # Create CSV
+        import csv
+        from io import StringIO
         output = StringIO()
         writer = csv.writer(output)
         
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Archive tier: move closed polls out of the hot tables.
+
+Archiving a poll hands it to the archive_poll database function
+(migrations/postgres/0007), which in one transaction copies the poll, its
+options, votes, text responses and final results into a compressed
+poll_archive row and deletes the poll, so /api/polls, vote counting and the
+revision lookups only ever scan active polls. Archived polls stay readable
+through GET /api/archive and GET /api/archive/<id>.
+
+Only polls whose closes_at has passed are archived unless forced (polls
+without a closing time, such as leftover test polls, need --force).
+
+Usage:
+    python archive.py --older-than-days 30             # polls closed at least 30 days ago (local backend)
+    python archive.py --older-than-days 7 --dry-run
+    python archive.py --poll 12 --force --backend supabase
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import counters
+import participants
+
+# SQLSTATEs raised by archive_poll()
+POLL_NOT_FOUND = 'P0002'
+POLL_NOT_CLOSED = '55000'
+
+ARCHIVE_LIST_COLUMNS = 'poll_id, title, poll_type, created_at, closes_at, total_votes, response_count, archived_at'
+
+
+def archive_poll(client, poll_id, force=False):
+    """Archive one poll; returns {'poll_id', 'total_votes', 'response_count'}"""
+    # Votes still on shard rows (VOTE_COUNTER_SHARDS) belong in the snapshot's counts
+    if counters.enabled():
+        counters.compact(client)
+    data = client.rpc('archive_poll', {'p_poll_id': poll_id, 'p_force': force}).execute().data
+    # The poll's participant sketch goes with it, as when a poll is deleted
+    client.table('participant_sketches').delete().eq('scope', participants.poll_scope(poll_id)).execute()
+    return data[0] if isinstance(data, list) else data
+
+
+def closed_polls(client, closed_before):
+    """Polls whose closes_at is earlier than closed_before (an aware datetime), oldest first"""
+    return client.table('polls').select('id, title, closes_at') \
+        .lt('closes_at', closed_before.isoformat()).order('closes_at').execute().data
+
+
+def main():
+    from generate_dataset import get_client
+
+    parser = argparse.ArgumentParser(description='Move closed polls into the archive')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--older-than-days', type=float, help='Archive every poll closed at least this long ago')
+    target.add_argument('--poll', type=int, action='append', help='Archive this poll ID (repeatable)')
+    parser.add_argument('--force', action='store_true', help='Also archive polls that have not closed')
+    parser.add_argument('--backend', choices=['local', 'supabase'], default='local')
+    parser.add_argument('--db', default=os.getenv('LOCAL_DB_PATH', 'polls.db'), help='SQLite file for the local backend')
+    parser.add_argument('--dry-run', action='store_true', help='List what would be archived')
+    args = parser.parse_args()
+
+    client = get_client(args.backend, args.db)
+    if args.poll:
+        ids = args.poll
+    else:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=args.older_than_days)
+        polls = closed_polls(client, cutoff)
+        for p in polls:
+            print(f"   • #{p['id']} {p['title']} (closed {p['closes_at']})")
+        ids = [p['id'] for p in polls]
+    print(f'✓ {len(ids)} poll(s) to archive')
+    if args.dry_run or not ids:
+        return 0
+
+    t0 = time.perf_counter()
+    failed = 0
+    for poll_id in ids:
+        try:
+            result = archive_poll(client, poll_id, force=args.force)
+            print(f"   • #{poll_id}: {result['total_votes']} votes, {result['response_count']} responses")
+        except Exception as e:
+            failed += 1
+            print(f'❌ #{poll_id}: {getattr(e, "message", None) or e}')
+    print(f'✅ Archived {len(ids) - failed} of {len(ids)} poll(s) in {time.perf_counter() - t0:.3f}s')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""
+Offline load-test and benchmark suite for the polls API.
+
+Runs the Flask app in-process against the SQLite stand-in backend
+(local_backend.py), so results are reproducible and never touch Supabase.
+
+Scenarios:
+    vote_burst       500 students vote within 10 seconds
+    results_refresh  300 viewers refresh /api/polls
+    delta_refresh    300 viewers sync /api/polls/changes while votes trickle in
+    export_votes     admin exports 100k votes as CSV
+    ranked_tally     instant-runoff tally of 50k ranked ballots, then served from cache
+    hot_option       vote burst with 80% of votes on one option, plain vs sharded counters
+    cold_start       fresh interpreter: import app and answer the first /api/polls
+    wire_formats     JSON vs MessagePack, row vs columnar: encode time and bytes
+
+Usage:
+    python benchmark.py                       # run every scenario
+    python benchmark.py vote_burst --fast     # ignore pacing, fire as fast as possible
+    python benchmark.py --output bench_results/baseline.json
+    python benchmark.py --compare bench_results/baseline.json bench_results/new.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# The app must be imported against the local backend, never the real database
+os.environ['POLLS_BACKEND'] = 'local'
+os.environ.setdefault('LOCAL_DB_PATH', ':memory:')
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+os.environ.setdefault('ADMIN_USERNAME', 'admin')
+os.environ.setdefault('ADMIN_PASSWORD', 'admin123')
+
+import app as polls_app  # noqa: E402
+import payloads  # noqa: E402
+import wire_format  # noqa: E402
+
+
+RESULTS_DIR = os.path.join(polls_app.BASE_DIR, 'bench_results')
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def reset_database():
+    db = polls_app.supabase
+    with db.lock:
+        for table in ('text_responses', 'ballots', 'option_vote_shards', 'participant_sketches', 'votes', 'options', 'polls'):
+            db.conn.execute(f'DELETE FROM {table}')
+    polls_app.participant_sketches.cache.clear()
+    db.reset_call_count()
+
+
+def seed_polls(poll_count=5, options_per_poll=10):
+    """Create multiple-choice polls and return [(poll_id, [option_ids])]"""
+    db = polls_app.supabase
+    polls = db.table('polls').insert([
+        {'title': f'Benchmark poll {i + 1}', 'description': 'Seeded by benchmark.py', 'poll_type': 'multiple_choice'}
+        for i in range(poll_count)
+    ]).execute().data
+    seeded = []
+    for poll in polls:
+        options = db.table('options').insert([
+            {'name': f'Nominee {j + 1}', 'poll_id': poll['id'], 'votes': 0}
+            for j in range(options_per_poll)
+        ]).execute().data
+        seeded.append((poll['id'], [o['id'] for o in options]))
+    return seeded
+
+
+def seed_votes(poll_id, option_ids, count):
+    """Bulk-insert votes directly, bypassing the API, for read-heavy scenarios"""
+    db = polls_app.supabase
+    batch = []
+    for i in range(count):
+        batch.append({'username': f'seed{i}', 'poll_id': poll_id, 'option_id': option_ids[i % len(option_ids)]})
+        if len(batch) == 5000:
+            db.table('votes').insert(batch).execute()
+            batch = []
+    if batch:
+        db.table('votes').insert(batch).execute()
+    # Keep options.votes consistent with the rows we just wrote
+    for index, option_id in enumerate(option_ids):
+        seeded = len(range(index, count, len(option_ids)))
+        db.table('options').update({'votes': seeded}).eq('id', option_id).execute()
+
+
+def admin_client():
+    client = polls_app.app.test_client()
+    client.post('/api/admin/login', json={
+        'username': os.environ['ADMIN_USERNAME'],
+        'password': os.environ['ADMIN_PASSWORD'],
+    })
+    return client
+
+
+def run_load(requests, concurrency, duration=None, fast=False, client_factory=None, offsets=None):
+    """
+    Drive a list of (method, path, json[, headers]) requests through the app.
+
+    When duration is given and fast is False, request i is released at
+    i * duration / len(requests) seconds (open-loop pacing), so a slow server
+    shows up as latency rather than as a lower offered rate. `offsets` gives
+    explicit release times in seconds instead (used by replay.py).
+    """
+    factory = client_factory or polls_app.app.test_client
+    local = threading.local()
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    if offsets is None and duration and requests and not fast:
+        offsets = [i * duration / len(requests) for i in range(len(requests))]
+    if fast:
+        offsets = None
+
+    def worker(index, request_spec):
+        if not hasattr(local, 'client'):
+            local.client = factory()
+        if offsets:
+            delay = start + offsets[index] - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        method, path, body = request_spec[:3]
+        headers = request_spec[3] if len(request_spec) > 3 else None
+        t0 = time.perf_counter()
+        response = local.client.open(path, method=method, json=body, headers=headers)
+        response.get_data()
+        elapsed = time.perf_counter() - t0
+        with lock:
+            latencies.append(elapsed)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    polls_app.supabase.reset_call_count()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(len(requests)), requests))
+    wall = time.perf_counter() - start
+    backend_calls = polls_app.supabase.reset_call_count()
+
+    latencies.sort()
+    return {
+        'requests': len(requests),
+        'concurrency': concurrency,
+        'wall_seconds': round(wall, 4),
+        'throughput_rps': round(len(requests) / wall, 2) if wall else 0.0,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50) * 1000, 3),
+            'p95': round(percentile(latencies, 95) * 1000, 3),
+            'p99': round(percentile(latencies, 99) * 1000, 3),
+            'max': round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        },
+        'backend_calls': backend_calls,
+        'backend_calls_per_request': round(backend_calls / len(requests), 3) if requests else 0.0,
+        'status_codes': {str(k): v for k, v in sorted(statuses.items())},
+    }
+
+
+# Scenarios
+
+def scenario_vote_burst(args):
+    """500 students vote within 10 seconds, spread over the award polls"""
+    students = 500 * args.scale
+    polls = seed_polls(poll_count=5, options_per_poll=12)
+    requests = []
+    for i in range(students):
+        poll_id, option_ids = polls[i % len(polls)]
+        requests.append(('POST', f'/api/polls/{poll_id}/vote', {
+            'option_id': option_ids[(i * 7) % len(option_ids)],
+            'username': f'student{i}',
+        }))
+    return run_load(requests, args.concurrency, duration=10, fast=args.fast)
+
+
+def scenario_results_refresh(args):
+    """300 viewers refresh the poll list while results are on screen"""
+    viewers = 300 * args.scale
+    polls = seed_polls(poll_count=12, options_per_poll=40)
+    for poll_id, option_ids in polls:
+        seed_votes(poll_id, option_ids, 200)
+    requests = [('GET', '/api/polls', None)] * viewers
+    return run_load(requests, args.concurrency, duration=10, fast=args.fast)
+
+
+def scenario_delta_refresh(args):
+    """300 viewers sync /api/polls/changes while a few votes trickle in"""
+    viewers = 300 * args.scale
+    polls = seed_polls(poll_count=12, options_per_poll=40)
+    for poll_id, option_ids in polls:
+        seed_votes(poll_id, option_ids, 200)
+    client = polls_app.app.test_client()
+    revision = client.get('/api/polls').get_json()['revision']
+    requests = []
+    for i in range(viewers):
+        if i % 30 == 0:
+            poll_id, option_ids = polls[(i // 30) % len(polls)]
+            requests.append(('POST', f'/api/polls/{poll_id}/vote', {'option_id': option_ids[0], 'username': f'late{i}'}))
+        requests.append(('GET', f'/api/polls/changes?since={revision}', None))
+    return run_load(requests, args.concurrency, duration=10, fast=args.fast)
+
+
+def scenario_export_votes(args):
+    """Admin exports a poll with 100k votes and the all-votes CSV"""
+    votes = 100000 * args.scale
+    [(poll_id, option_ids)] = seed_polls(poll_count=1, options_per_poll=40)
+    seed_votes(poll_id, option_ids, votes)
+    requests = [
+        ('GET', f'/api/polls/{poll_id}/votes/export', None),
+        ('GET', '/api/votes/export', None),
+    ]
+    return run_load(requests, 1, client_factory=admin_client)
+
+
+def scenario_ranked_tally(args):
+    """Instant-runoff count of 50k ranked ballots over 12 options; later requests hit the cache"""
+    import random
+
+    ballots = 50000 * args.scale
+    db = polls_app.supabase
+    poll = db.table('polls').insert({'title': 'Benchmark ranked poll', 'poll_type': 'ranked_choice'}).execute().data[0]
+    option_ids = [o['id'] for o in db.table('options').insert([
+        {'name': f'Nominee {j + 1}', 'poll_id': poll['id'], 'votes': 0} for j in range(12)
+    ]).execute().data]
+    rng = random.Random(42)
+    weights = [12 - j for j in range(12)]  # a few favourites, a long tail
+    rows = []
+    for i in range(ballots):
+        ranked = list(dict.fromkeys(rng.choices(option_ids, weights=weights, k=rng.randint(1, 6))))
+        rows.append({'poll_id': poll['id'], 'username': f'seed{i}', 'choices': ranked})
+    for i in range(0, len(rows), 5000):
+        db.table('ballots').insert(rows[i:i + 5000]).execute()
+
+    import tally
+    t0 = time.perf_counter()
+    result = tally.tally(db, {'id': poll['id'], 'poll_type': 'ranked_choice', 'options': [{'id': o} for o in option_ids]})
+    cold = time.perf_counter() - t0
+    print(f"  • {ballots} ballots, {len(result['rounds'])} rounds: {cold * 1000:.1f} ms uncached")
+    requests = [('GET', f"/api/polls/{poll['id']}/tally", None)] * (200 * args.scale)
+    report = run_load(requests, args.concurrency, fast=True)
+    report['uncached_tally_ms'] = round(cold * 1000, 3)
+    report['rounds'] = len(result['rounds'])
+    return report
+
+
+def scenario_hot_option(args):
+    """2000 votes as fast as possible, 80% for one nominee: plain options.votes updates vs sharded counters"""
+    import counters
+
+    votes = 2000 * args.scale
+    modes = {}
+    for shards in (0, 8):
+        counters.SHARDS = shards
+        [(poll_id, option_ids)] = seed_polls(poll_count=1, options_per_poll=10)
+        requests = []
+        for i in range(votes):
+            option_id = option_ids[0] if i % 5 else option_ids[1 + (i // 5) % 9]
+            requests.append(('POST', f'/api/polls/{poll_id}/vote', {'option_id': option_id, 'username': f'hot{i}'}))
+        result = run_load(requests, args.concurrency, fast=True)
+        counters.compact(polls_app.supabase)
+        counted = sum(o['votes'] for o in polls_app.supabase.table('options').select('votes')
+                      .eq('poll_id', poll_id).execute().data)
+        # Plain mode reads the count and writes count + 1, so concurrent votes can overwrite each other
+        result['lost_votes'] = result['status_codes'].get('200', 0) - counted
+        modes['sharded' if shards else 'plain'] = result
+        print(f"  • {'sharded x8' if shards else 'plain':<11} {result['throughput_rps']} votes/s, "
+              f"p99 {result['latency_ms']['p99']}ms, {result['lost_votes']} lost")
+    counters.SHARDS = int(os.getenv('VOTE_COUNTER_SHARDS', '0'))
+    return {**modes['sharded'], 'plain': modes['plain']}
+
+
+COLD_START_SNIPPET = '''
+import json, sys, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+response = app.app.test_client().get('/api/polls')
+t2 = time.perf_counter()
+print(json.dumps({
+    'import_ms': (t1 - t0) * 1000,
+    'status': response.status_code,
+    'backend_calls': app.supabase.reset_call_count(),
+    'modules': len(sys.modules),
+}))
+'''
+
+
+def scenario_cold_start(args):
+    """Fresh interpreter imports the app and answers its first /api/polls (like a spun-down instance)"""
+    runs = 10 * args.scale
+    env = dict(os.environ, POLLS_BACKEND='local', LOCAL_DB_PATH=':memory:')
+    latencies, imports, statuses, backend_calls = [], [], {}, 0
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        output = subprocess.check_output([sys.executable, '-c', COLD_START_SNIPPET], cwd=polls_app.BASE_DIR, env=env)
+        latencies.append(time.perf_counter() - t0)
+        child = json.loads(output.decode().strip().splitlines()[-1])
+        imports.append(child['import_ms'])
+        statuses[child['status']] = statuses.get(child['status'], 0) + 1
+        backend_calls += child['backend_calls']
+
+    wall = sum(latencies)
+    latencies.sort()
+    imports.sort()
+    return {
+        'requests': runs,
+        'concurrency': 1,
+        'wall_seconds': round(wall, 4),
+        'throughput_rps': round(runs / wall, 2),
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50) * 1000, 3),
+            'p95': round(percentile(latencies, 95) * 1000, 3),
+            'p99': round(percentile(latencies, 99) * 1000, 3),
+            'max': round(latencies[-1] * 1000, 3),
+        },
+        'import_ms_p50': round(percentile(imports, 50), 3),
+        'modules_loaded': child['modules'],
+        'backend_calls': backend_calls,
+        'backend_calls_per_request': round(backend_calls / runs, 3),
+        'status_codes': {str(k): v for k, v in sorted(statuses.items())},
+    }
+
+
+def scenario_wire_formats(args):
+    """/api/polls for 12 polls x 40 options in every wire format: encode/decode time and bytes"""
+    polls = seed_polls(poll_count=12, options_per_poll=40)
+    for poll_id, option_ids in polls:
+        seed_votes(poll_id, option_ids, 200)
+    data = polls_app.app.test_client().get('/api/polls').get_json()
+
+    formats, requests = {}, []
+    rounds = 200 * args.scale
+    for mimetype in [wire_format.JSON] + ([wire_format.MSGPACK] if wire_format.msgpack else []):
+        for layout in wire_format.LAYOUTS:
+            name = f"{mimetype.split('/')[-1]}_{layout}"
+            t0 = time.perf_counter()
+            for _ in range(rounds):
+                body = wire_format.encode(data, mimetype, layout)
+            encode = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            for _ in range(rounds):
+                wire_format.decode(body, mimetype)
+            decode = time.perf_counter() - t0
+            formats[name] = {
+                'encode_us': round(encode / rounds * 1e6, 1),
+                'decode_us': round(decode / rounds * 1e6, 1),
+                'bytes': len(body),
+                'gzip_bytes': len(payloads.compress(body, 'gzip', payloads.CACHED_LEVELS)),
+                'br_bytes': len(payloads.compress(body, 'br', payloads.CACHED_LEVELS)) if payloads.brotli else None,
+            }
+            print(f"  • {name:<18} encode {formats[name]['encode_us']:>8}us  decode {formats[name]['decode_us']:>8}us  "
+                  f"{formats[name]['bytes']:>7} B  gzip {formats[name]['gzip_bytes']:>6} B  br {formats[name]['br_bytes']} B")
+            requests += [('GET', f'/api/polls?layout={layout}', None, {'Accept': mimetype})] * (50 * args.scale)
+
+    # Served from the revision-keyed cache: every format costs the same once built
+    result = run_load(requests, args.concurrency, duration=10, fast=args.fast)
+    result['formats'] = formats
+    return result
+
+
+SCENARIOS = {
+    'vote_burst': scenario_vote_burst,
+    'results_refresh': scenario_results_refresh,
+    'delta_refresh': scenario_delta_refresh,
+    'export_votes': scenario_export_votes,
+    'ranked_tally': scenario_ranked_tally,
+    'hot_option': scenario_hot_option,
+    'cold_start': scenario_cold_start,
+    'wire_formats': scenario_wire_formats,
+}
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=polls_app.BASE_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def compare(baseline_path, candidate_path):
+    """Print per-scenario deltas between two saved runs"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    with open(candidate_path) as f:
+        candidate = json.load(f)
+
+    print(f"{'scenario':<18} {'metric':<26} {'baseline':>12} {'candidate':>12} {'change':>9}")
+    for name, new in candidate['scenarios'].items():
+        old = baseline['scenarios'].get(name)
+        if not old:
+            continue
+        metrics = [
+            ('throughput_rps', old['throughput_rps'], new['throughput_rps']),
+            ('latency_ms.p50', old['latency_ms']['p50'], new['latency_ms']['p50']),
+            ('latency_ms.p95', old['latency_ms']['p95'], new['latency_ms']['p95']),
+            ('latency_ms.p99', old['latency_ms']['p99'], new['latency_ms']['p99']),
+            ('backend_calls_per_request', old['backend_calls_per_request'], new['backend_calls_per_request']),
+        ]
+        for metric, a, b in metrics:
+            change = f'{(b - a) / a * 100:+.1f}%' if a else 'n/a'
+            print(f'{name:<18} {metric:<26} {a:>12} {b:>12} {change:>9}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmark suite for the polls API')
+    parser.add_argument('scenarios', nargs='*', default=[],
+                        help=f"Scenarios to run: {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent client threads')
+    parser.add_argument('--scale', type=int, default=1, help='Multiply scenario sizes')
+    parser.add_argument('--fast', action='store_true', help='Ignore pacing and send as fast as possible')
+    parser.add_argument('--output', help='Where to write the JSON report (default: bench_results/<timestamp>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CANDIDATE'), help='Compare two saved reports')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'options': {'concurrency': args.concurrency, 'scale': args.scale, 'fast': args.fast},
+        'scenarios': {},
+    }
+
+    for name in args.scenarios or list(SCENARIOS):
+        reset_database()
+        print(f'▶ {name}: {SCENARIOS[name].__doc__}')
+        result = SCENARIOS[name](args)
+        report['scenarios'][name] = result
+        print(f"  {result['throughput_rps']} req/s, p50 {result['latency_ms']['p50']}ms, "
+              f"p95 {result['latency_ms']['p95']}ms, p99 {result['latency_ms']['p99']}ms, "
+              f"{result['backend_calls_per_request']} backend calls/request, status {result['status_codes']}")
+
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime('%Y%m%d_%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'\nSaved report to {output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
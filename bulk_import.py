@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Bulk import of polls and their options from a JSON or CSV manifest.
+
+The whole manifest is validated up front, then written by the import_polls
+database function (migrations/postgres/0003) in a single call, so either every poll
+and option lands or nothing does.
+
+JSON manifest (opens_at / closes_at are optional ISO-8601 timestamps, as for POST /api/polls):
+    {"polls": [{"title": "...", "description": "...", "poll_type": "multiple_choice",
+                "opens_at": "2026-03-02T09:00:00Z", "closes_at": "2026-03-06T18:00:00Z",
+                "options": ["Alice", "Bob"]}]}
+
+CSV manifest (one row per option; text_response polls leave option empty; rows
+of the same title must not disagree on description, poll_type or the schedule):
+    title,description,poll_type,opens_at,closes_at,option
+    Best Staff Legend,Who made your Piscine better?,multiple_choice,2026-03-02T09:00:00Z,,Alice
+    Best Staff Legend,,,,,Bob
+
+Usage:
+    python bulk_import.py manifest.json                  # into polls.db (local backend)
+    python bulk_import.py manifest.csv --backend supabase
+    python bulk_import.py manifest.json --dry-run        # validate only
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from io import StringIO
+
+from poll_schedule import parse_schedule
+
+POLL_TYPES = ('multiple_choice', 'text_response', 'approval', 'ranked_choice')
+CSV_POLL_FIELDS = ('description', 'poll_type', 'opens_at', 'closes_at')
+MAX_NAME_LENGTH = 255
+
+
+class ManifestError(ValueError):
+    """Raised with every validation problem found in a manifest"""
+
+    def __init__(self, errors):
+        super().__init__(f'{len(errors)} problem(s) in manifest')
+        self.errors = errors
+
+
+def parse_manifest(text, fmt='json'):
+    """Turn manifest text into a list of raw poll dicts"""
+    if fmt == 'csv':
+        polls, by_title, first_row, errors = [], {}, {}, []
+        # Line 1 is the header; a poll's fields may be left blank after its first row
+        for line, row in enumerate(csv.DictReader(StringIO(text)), start=2):
+            title = (row.get('title') or '').strip()
+            poll = by_title.get(title)
+            if poll is None:
+                poll = {'title': title, **{field: '' for field in CSV_POLL_FIELDS}, 'options': []}
+                by_title[title] = poll
+                first_row[title] = {}
+                polls.append(poll)
+            for field in CSV_POLL_FIELDS:
+                value = (row.get(field) or '').strip()
+                if not value:
+                    continue
+                if not poll[field]:
+                    poll[field], first_row[title][field] = value, line
+                elif value != poll[field]:
+                    errors.append({'index': None, 'row': line, 'title': title,
+                                   'error': f'Row {line}: {field} "{value}" conflicts with "{poll[field]}" '
+                                            f'from row {first_row[title][field]}'})
+            if (row.get('option') or '').strip():
+                poll['options'].append(row['option'])
+        if errors:
+            raise ManifestError(errors)
+        return polls
+
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        raise ManifestError([{'index': None, 'error': f'Invalid JSON: {e}'}])
+    if isinstance(data, dict):
+        data = data.get('polls')
+    if not isinstance(data, list):
+        raise ManifestError([{'index': None, 'error': 'Manifest must be a list of polls or {"polls": [...]}'}])
+    return data
+
+
+def validate_manifest(polls):
+    """Normalize raw polls and return them, or raise ManifestError listing every problem"""
+    errors, clean = [], []
+    if not polls:
+        raise ManifestError([{'index': None, 'error': 'Manifest contains no polls'}])
+
+    for index, poll in enumerate(polls):
+        if not isinstance(poll, dict):
+            errors.append({'index': index, 'error': 'Poll must be an object'})
+            continue
+        title = str(poll.get('title') or '').strip()
+        description = str(poll.get('description') or '').strip()
+        poll_type = str(poll.get('poll_type') or 'multiple_choice').strip()
+        options = []
+        for o in poll.get('options') or []:
+            name = o.get('name') if isinstance(o, dict) else o
+            name = str(name or '').strip()
+            if name:
+                options.append(name)
+
+        def fail(message):
+            errors.append({'index': index, 'title': title, 'error': message})
+
+        try:
+            schedule = parse_schedule({k: v for k, v in poll.items() if k in ('opens_at', 'closes_at') and v})
+        except ValueError as e:
+            schedule = {}
+            fail(f'{e}.')
+
+        if not title:
+            fail('Title is required.')
+        elif len(title) > MAX_NAME_LENGTH:
+            fail(f'Title is longer than {MAX_NAME_LENGTH} characters.')
+        if poll_type not in POLL_TYPES:
+            fail('Invalid poll type')
+        if poll_type != 'text_response' and len(options) < 2:
+            fail('Polls with options require at least two options.')
+        if poll_type == 'text_response' and options:
+            fail('Text response polls do not take options.')
+        long_names = [n for n in options if len(n) > MAX_NAME_LENGTH]
+        if long_names:
+            fail(f'Option names longer than {MAX_NAME_LENGTH} characters: {long_names[0][:40]}...')
+        duplicates = sorted({n for n in options if options.count(n) > 1})
+        if duplicates:
+            fail(f"Duplicate options: {', '.join(duplicates)}")
+
+        clean.append({'title': title, 'description': description, 'poll_type': poll_type, **schedule, 'options': options})
+
+    if errors:
+        raise ManifestError(errors)
+    return clean
+
+
+def import_polls(client, polls):
+    """Write validated polls in one transactional call and return the new poll IDs"""
+    response = client.rpc('import_polls', {'manifest': polls}).execute()
+    return [row['import_polls'] if isinstance(row, dict) else row for row in response.data]
+
+
+def main():
+    from generate_dataset import get_client
+
+    parser = argparse.ArgumentParser(description='Bulk import polls and options from a manifest')
+    parser.add_argument('manifest', help='JSON or CSV manifest file')
+    parser.add_argument('--format', choices=['json', 'csv'], help='Manifest format (default: from file extension)')
+    parser.add_argument('--backend', choices=['local', 'supabase'], default='local')
+    parser.add_argument('--db', default=os.getenv('LOCAL_DB_PATH', 'polls.db'), help='SQLite file for the local backend')
+    parser.add_argument('--dry-run', action='store_true', help='Validate the manifest without writing anything')
+    args = parser.parse_args()
+
+    fmt = args.format or ('csv' if args.manifest.lower().endswith('.csv') else 'json')
+    with open(args.manifest, encoding='utf-8') as f:
+        text = f.read()
+
+    try:
+        polls = validate_manifest(parse_manifest(text, fmt))
+    except ManifestError as e:
+        print(f'❌ {e}')
+        for err in e.errors:
+            where = f"poll #{err['index'] + 1}" if err.get('index') is not None else 'manifest'
+            print(f"   • {where} {err.get('title') or ''}: {err['error']}")
+        return 1
+
+    option_count = sum(len(p['options']) for p in polls)
+    print(f'✓ Manifest OK: {len(polls)} polls, {option_count} options')
+    if args.dry_run:
+        return 0
+
+    client = get_client(args.backend, args.db)
+    t0 = time.perf_counter()
+    ids = import_polls(client, polls)
+    print(f'✅ Imported {len(ids)} polls in {time.perf_counter() - t0:.3f}s (IDs {ids[0]}-{ids[-1]})')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
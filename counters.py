@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Sharded vote counters for high-contention options.
+
+Normally a vote rewrites its option's options.votes row, so when most of an
+audience votes for the same nominee every vote queues on that one row lock.
+With VOTE_COUNTER_SHARDS=N (N > 1) a vote instead adds 1 to one of N shard
+rows of its option in option_vote_shards (a single upsert, shard picked at
+random), so concurrent votes for the same option rarely touch the same row.
+
+A compactor thread folds the shards into options.votes every
+VOTE_COMPACT_INTERVAL seconds (default 0.5, the live tally interval) with one
+database statement (migrations/postgres/0014). Poll lists, live tallies and
+the leaderboard follow options.votes and so lag by at most one interval,
+while exact reads (GET /api/polls/<id>/results, frozen final results) add the
+pending shards through pending_votes().
+
+Compaction is also safe to run from cron or by hand, from any process:
+    python counters.py                                  # local backend
+    python counters.py --backend supabase
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+SHARDS = int(os.getenv('VOTE_COUNTER_SHARDS', '0'))
+COMPACT_INTERVAL = float(os.getenv('VOTE_COMPACT_INTERVAL', '0.5'))
+
+
+def enabled():
+    return SHARDS > 1
+
+
+def increment(client, poll_id, option_id, shards=None):
+    """Count one vote on a random shard of the option"""
+    client.rpc('increment_vote_shard', {
+        'p_poll_id': poll_id,
+        'p_option_id': option_id,
+        'p_shard': random.randrange(shards or SHARDS),
+    }).execute()
+
+
+def compact(client):
+    """Fold every pending shard into options.votes; returns how many options changed"""
+    data = client.rpc('compact_vote_shards', {}).execute().data
+    return (data[0] if isinstance(data, list) else data) or 0
+
+
+def pending_votes(client, poll_id):
+    """{option_id: votes} counted on shards but not yet compacted into options.votes"""
+    pending = {}
+    for r in client.table('option_vote_shards').select('option_id, votes').eq('poll_id', poll_id).execute().data:
+        pending[r['option_id']] = pending.get(r['option_id'], 0) + r['votes']
+    return pending
+
+
+def with_pending(client, poll):
+    """The poll with its options' votes including pending shards (a copy; the input is left alone)"""
+    pending = pending_votes(client, poll['id'])
+    if not pending:
+        return poll
+    options = [{**o, 'votes': (o.get('votes') or 0) + pending.get(o['id'], 0)} for o in poll.get('options') or []]
+    return {**poll, 'options': options}
+
+
+class Compactor:
+    """Runs compact() every `interval` seconds in a daemon thread while votes keep arriving"""
+
+    def __init__(self, client, interval=COMPACT_INTERVAL, idle_exit=30.0, on_compact=None):
+        self.client = client
+        self.interval = interval
+        self.idle_exit = idle_exit
+        self.on_compact = on_compact
+        self.last_vote = 0.0
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def touch(self):
+        """Note a sharded vote; starts the thread (again after an idle exit or a fork)"""
+        with self.lock:
+            self.last_vote = time.monotonic()
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='vote-compactor', daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                if compact(self.client) and self.on_compact:
+                    self.on_compact()
+            except Exception as e:
+                print(f"Vote shard compaction failed: {e}")
+            # The pass above drained every vote seen so far; exit until the next one
+            with self.lock:
+                if time.monotonic() - self.last_vote > self.idle_exit:
+                    self.thread = None
+                    return
+
+
+def main():
+    from generate_dataset import get_client
+
+    parser = argparse.ArgumentParser(description='Fold pending vote shards into options.votes')
+    parser.add_argument('--backend', choices=['local', 'supabase'], default='local')
+    parser.add_argument('--db', default=os.getenv('LOCAL_DB_PATH', 'polls.db'), help='SQLite file for the local backend')
+    args = parser.parse_args()
+
+    client = get_client(args.backend, args.db)
+    t0 = time.perf_counter()
+    changed = compact(client)
+    print(f'✅ Compacted shards of {changed} option(s) in {time.perf_counter() - t0:.3f}s')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Synthetic dataset generator for scale testing polls, votes and text responses.
+
+Fills the schema in bulk with batched inserts, either into the local SQLite
+backend (default) or into Supabase.
+
+Examples:
+    # One Piscine cohort
+    python generate_dataset.py --polls 12 --options 40 --voters 300 --votes 3000
+
+    # 100x cohort into a separate database file
+    python generate_dataset.py --db scale.db --polls 50 --options 40 --voters 30000 --votes 300000
+
+    # Straight into Supabase (uses SUPABASE_URL / SUPABASE_KEY from .env)
+    python generate_dataset.py --backend supabase --polls 5 --voters 100 --votes 400
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+WORDS = (
+    'always helpful kind funny late nights coffee debugging segfault norminette peer evaluation '
+    'exam shell pointers malloc leaks friendship energy laughter support team push commit cluster '
+    'sunshine legend dedication champion collaboration patience brilliant calm chaotic legendary'
+).split()
+
+
+def get_client(backend, db_path):
+    if backend == 'local':
+        import local_backend
+        return local_backend.create_client(db_path)
+
+    from supabase import create_client
+
+    url, key = os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_KEY')
+    if not url or not key:
+        raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in .env file")
+    return create_client(url, key)
+
+
+def parse_range(text):
+    """'20' -> (20, 20), '5:60' -> (5, 60)"""
+    low, _, high = text.partition(':')
+    return int(low), int(high or low)
+
+
+def make_timestamps(count, start, span, distribution, rng):
+    """Return `count` sorted ISO timestamps inside [start, start + span]"""
+    seconds = span.total_seconds()
+    offsets = []
+    for _ in range(count):
+        if distribution == 'uniform':
+            x = rng.random()
+        elif distribution == 'burst':
+            # Most votes land right after the announcement at 25% of the window
+            x = min(max(rng.gauss(0.25, 0.05), 0.0), 1.0)
+        elif distribution == 'exponential':
+            # Interest decays after opening
+            x = min(rng.expovariate(5.0), 1.0)
+        else:
+            raise ValueError(f'Unknown distribution: {distribution}')
+        offsets.append(x * seconds)
+    offsets.sort()
+    return [(start + timedelta(seconds=o)).isoformat() for o in offsets]
+
+
+def zipf_weights(n, skew):
+    """Option popularity; skew 0 is uniform, larger values favour the first options"""
+    return [1.0 / math.pow(i + 1, skew) for i in range(n)]
+
+
+def insert_batched(client, table, rows, batch_size):
+    inserted = []
+    for i in range(0, len(rows), batch_size):
+        inserted.extend(client.table(table).insert(rows[i:i + batch_size]).execute().data)
+    return inserted
+
+
+def generate(client, args):
+    rng = random.Random(args.seed)
+    start = datetime.fromisoformat(args.start) if args.start else datetime.now(timezone.utc) - timedelta(hours=args.span_hours)
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    span = timedelta(hours=args.span_hours)
+    stats = {}
+    t0 = time.perf_counter()
+
+    # Polls
+    poll_rows = []
+    for i in range(args.polls):
+        is_text = i < args.text_polls
+        poll_rows.append({
+            'title': f"{'💬' if is_text else '🏆'} {args.prefix} {i + 1}",
+            'description': f'Synthetic {"text" if is_text else "multiple choice"} poll generated for scale testing',
+            'poll_type': 'text_response' if is_text else 'multiple_choice',
+            'opens_label': 'Opens today',
+            'closes_label': 'Closes in 3 days',
+        })
+    polls = insert_batched(client, 'polls', poll_rows, args.batch_size)
+    mc_polls = [p for p in polls if p['poll_type'] == 'multiple_choice']
+    text_polls = [p for p in polls if p['poll_type'] == 'text_response']
+    stats['polls'] = len(polls)
+
+    # Options
+    option_rows = [
+        {'name': f'Nominee {j + 1}', 'poll_id': p['id'], 'votes': 0}
+        for p in mc_polls for j in range(args.options)
+    ]
+    options = insert_batched(client, 'options', option_rows, args.batch_size)
+    options_by_poll = {}
+    for o in options:
+        options_by_poll.setdefault(o['poll_id'], []).append(o)
+    stats['options'] = len(options)
+
+    voters = [f'{args.prefix.lower()}_user{i}' for i in range(args.voters)]
+
+    # Votes: spread evenly over polls, at most one per voter per poll
+    votes_per_poll = min(args.votes // max(len(mc_polls), 1), len(voters))
+    weights = zipf_weights(args.options, args.skew)
+    counts = {}
+    vote_rows = []
+    for p in mc_polls:
+        poll_options = options_by_poll.get(p['id'], [])
+        if not poll_options:
+            continue
+        timestamps = make_timestamps(votes_per_poll, start, span, args.distribution, rng)
+        for username, created_at in zip(rng.sample(voters, votes_per_poll), timestamps):
+            option = rng.choices(poll_options, weights=weights)[0]
+            counts[option['id']] = counts.get(option['id'], 0) + 1
+            vote_rows.append({'username': username, 'poll_id': p['id'], 'option_id': option['id'], 'created_at': created_at})
+    vote_rows.sort(key=lambda v: v['created_at'])
+    for i in range(0, len(vote_rows), args.batch_size):
+        client.table('votes').insert(vote_rows[i:i + args.batch_size]).execute()
+    stats['votes'] = len(vote_rows)
+
+    # Keep the denormalized options.votes counters in line with the vote rows
+    counter_rows = [
+        {'id': o['id'], 'name': o['name'], 'poll_id': o['poll_id'], 'votes': counts.get(o['id'], 0)}
+        for o in options if counts.get(o['id'])
+    ]
+    for i in range(0, len(counter_rows), args.batch_size):
+        client.table('options').upsert(counter_rows[i:i + args.batch_size], on_conflict='id').execute()
+
+    # Text responses
+    low, high = parse_range(args.text_length)
+    responses_per_poll = min(args.responses, len(voters))
+    response_rows = []
+    for p in text_polls:
+        timestamps = make_timestamps(responses_per_poll, start, span, args.distribution, rng)
+        for username, created_at in zip(rng.sample(voters, responses_per_poll), timestamps):
+            words = rng.choices(WORDS, k=rng.randint(low, high))
+            response_rows.append({
+                'poll_id': p['id'],
+                'username': username,
+                'response_text': ' '.join(words).capitalize() + '.',
+                'created_at': created_at,
+            })
+    for i in range(0, len(response_rows), args.batch_size):
+        client.table('text_responses').insert(response_rows[i:i + args.batch_size]).execute()
+    stats['text_responses'] = len(response_rows)
+
+    stats['seconds'] = round(time.perf_counter() - t0, 2)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic polls, votes and text responses')
+    parser.add_argument('--backend', choices=['local', 'supabase'], default='local')
+    parser.add_argument('--db', default=os.getenv('LOCAL_DB_PATH', 'polls.db'), help='SQLite file for the local backend')
+    parser.add_argument('--polls', type=int, default=12, help='Number of polls')
+    parser.add_argument('--text-polls', type=int, default=2, help='How many of the polls are text_response polls')
+    parser.add_argument('--options', type=int, default=40, help='Options per multiple-choice poll')
+    parser.add_argument('--voters', type=int, default=300, help='Unique usernames')
+    parser.add_argument('--votes', type=int, default=3000, help='Total votes across multiple-choice polls')
+    parser.add_argument('--responses', type=int, default=200, help='Text responses per text poll')
+    parser.add_argument('--text-length', default='3:30', help='Words per text response, N or MIN:MAX')
+    parser.add_argument('--skew', type=float, default=1.0, help='Zipf skew of option popularity (0 = uniform)')
+    parser.add_argument('--distribution', choices=['uniform', 'burst', 'exponential'], default='burst',
+                        help='How vote timestamps are spread over the window')
+    parser.add_argument('--start', help='ISO start of the voting window (default: now - span)')
+    parser.add_argument('--span-hours', type=float, default=3.0, help='Length of the voting window')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Rows per insert call')
+    parser.add_argument('--prefix', default='Synthetic', help='Title/username prefix, handy for cleanup')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if args.text_polls > args.polls:
+        parser.error('--text-polls cannot exceed --polls')
+
+    client = get_client(args.backend, args.db)
+    print(f"🧪 Generating dataset into {args.backend} ({args.db if args.backend == 'local' else 'Supabase'})...")
+    stats = generate(client, args)
+    for key, value in stats.items():
+        print(f'   • {key}: {value}')
+    print('✅ Done!')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
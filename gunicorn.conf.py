@@ -0,0 +1,22 @@
+"""
+Gunicorn settings (picked up automatically from the working directory).
+
+preload_app imports app.py once in the master, and workers fork from it, so
+a cold start pays for the Flask import and the asset build once rather than
+once per worker. Backend clients are built lazily in each worker after the
+fork (see LazyClient in app.py).
+"""
+
+import os
+
+workers = int(os.getenv('WEB_CONCURRENCY', '4'))
+worker_class = 'gevent'
+worker_connections = 1000
+timeout = 120
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+
+if preload_app:
+    # The app is imported before the worker would patch, so locks and threads
+    # created at import time must already be gevent-aware
+    from gevent import monkey
+    monkey.patch_all()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Change notifications for long-polling clients (GET /api/polls/<id>/wait) and
+tally fan-out for the live WebSocket channel (/ws).
+
+A poll's tally version is the highest revision stamped on the poll or its
+options (migration 0005). Waiters park on a condition variable; a single
+background poller per process checks the database for newer revisions of the
+watched polls, so the database sees one query set per interval no matter how
+many clients are waiting. Votes handled by this process wake the poller
+immediately; votes handled by other workers are picked up on the next tick.
+
+Under gunicorn's gevent worker (see Procfile) threads are monkey-patched into
+greenlets, so a parked waiter costs a greenlet rather than a worker.
+"""
+
+import json
+import threading
+import time
+
+DELETED = -1  # what ChangeHub.wait() returns when the poll is deleted while waiting
+
+
+class ChangeHub:
+    def __init__(self, client, interval=1.0, idle_exit=30.0):
+        self.client = client
+        self.interval = interval
+        self.idle_exit = idle_exit
+        self.cond = threading.Condition()
+        self.wakeup = threading.Event()
+        self.versions = {}   # poll_id -> newest version seen by the poller
+        self.watching = {}   # poll_id -> [versions waiters are waiting to move past]
+        self.deleted = set()  # watched polls found deleted; dropped with their last waiter
+        self.poller = None
+
+    def poll_version(self, poll_id):
+        """Fetch the current tally version of one poll, or None if it does not exist"""
+        polls = self.client.table('polls').select('id, revision').eq('id', poll_id).execute().data
+        if not polls:
+            return None
+        options = (self.client.table('options').select('revision').eq('poll_id', poll_id)
+                   .order('revision', desc=True).limit(1).execute().data)
+        return max([polls[0].get('revision') or 0] + [o['revision'] for o in options])
+
+    def notify(self, poll_id=None):
+        """Ask the poller to check right away (called after local writes)"""
+        self.wakeup.set()
+
+    def wait(self, poll_id, version, timeout):
+        """
+        Block until poll_id's version moves past `version` or `timeout` seconds pass.
+        Returns the newer version, None on timeout, or DELETED.
+        """
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            self.watching.setdefault(poll_id, []).append(version)
+            self._ensure_poller()
+            try:
+                while True:
+                    if poll_id in self.deleted:
+                        return DELETED
+                    seen = self.versions.get(poll_id, 0)
+                    if seen > version:
+                        return seen
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    self.cond.wait(remaining)
+            finally:
+                waiting = self.watching[poll_id]
+                waiting.remove(version)
+                if not waiting:
+                    del self.watching[poll_id]
+                    self.deleted.discard(poll_id)
+
+    def _ensure_poller(self):
+        if self.poller is None or not self.poller.is_alive():
+            self.poller = threading.Thread(target=self._run, name='change-hub', daemon=True)
+            self.poller.start()
+
+    def _run(self):
+        idle_since = None
+        while True:
+            with self.cond:
+                watched = {pid: min(versions) for pid, versions in self.watching.items()}
+                if not watched:
+                    idle_since = idle_since or time.monotonic()
+                    if time.monotonic() - idle_since > self.idle_exit:
+                        self.poller = None
+                        return
+                else:
+                    idle_since = None
+            if watched:
+                try:
+                    self._check(watched)
+                except Exception as e:
+                    print(f"Change hub poll failed: {e}")
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+
+    def changes_since(self, watched):
+        """
+        For {poll_id: version}, return ({poll_id: newer_version}, {deleted poll_ids})
+        using one round trip per table for every watched poll.
+        """
+        ids = list(watched)
+        floor = min(watched.values())
+        changes = {}
+        for row in (self.client.table('options').select('poll_id, revision')
+                    .in_('poll_id', ids).gt('revision', floor).execute().data):
+            changes[row['poll_id']] = max(changes.get(row['poll_id'], 0), row['revision'])
+        for row in self.client.table('polls').select('id, revision').in_('id', ids).gt('revision', floor).execute().data:
+            changes[row['id']] = max(changes.get(row['id'], 0), row['revision'])
+        changes = {pid: v for pid, v in changes.items() if v > watched[pid]}
+        gone = {row['poll_id'] for row in self.client.table('poll_tombstones').select('poll_id')
+                .in_('poll_id', ids).execute().data}
+        return changes, gone
+
+    def _check(self, watched):
+        changes, gone = self.changes_since(watched)
+        with self.cond:
+            for poll_id, version in changes.items():
+                self.versions[poll_id] = max(self.versions.get(poll_id, 0), version)
+            # Only polls someone still waits on: the set empties as their waiters leave
+            self.deleted |= gone & set(self.watching)
+            if changes or gone:
+                self.cond.notify_all()
+
+
+class LiveConnection:
+    """
+    One WebSocket client. Outgoing tally frames are keyed by poll, so a slow
+    client only ever has the newest tally per poll queued, never a backlog.
+    """
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.lock = threading.Lock()
+        self.pending = {}   # poll_id -> latest tally frame
+        self.polls = set()
+
+    def push(self, poll_id, frame):
+        with self.lock:
+            self.pending[poll_id] = frame
+
+    def flush(self):
+        """Send queued frames; called from the connection's own loop only"""
+        with self.lock:
+            frames, self.pending = list(self.pending.values()), {}
+        for frame in frames:
+            self.ws.send(json.dumps(frame))
+
+    def send(self, frame):
+        self.ws.send(json.dumps(frame))
+
+
+class Broadcaster:
+    """
+    Fans tally updates out to subscribed connections. Every `interval` seconds
+    one ChangeHub query set finds subscribed polls that changed (from any
+    worker) and one query fetches their tallies, so each poll produces at most
+    one frame per interval however many votes arrive. Tallies are read from
+    options.votes: votes still on shard rows (VOTE_COUNTER_SHARDS) show up
+    once compacted, at most one compaction interval later.
+    """
+
+    def __init__(self, client, hub, interval=0.5):
+        self.client = client
+        self.hub = hub
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.subscribers = {}  # poll_id -> set of LiveConnection
+        self.versions = {}     # poll_id -> version last broadcast
+        self.thread = None
+
+    def subscribe(self, conn, poll_ids, current_versions):
+        with self.lock:
+            for poll_id in poll_ids:
+                self.subscribers.setdefault(poll_id, set()).add(conn)
+                conn.polls.add(poll_id)
+                self.versions[poll_id] = max(self.versions.get(poll_id, 0), current_versions.get(poll_id, 0))
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='broadcaster', daemon=True)
+                self.thread.start()
+
+    def unsubscribe(self, conn, poll_ids=None):
+        with self.lock:
+            for poll_id in list(poll_ids if poll_ids is not None else conn.polls):
+                conns = self.subscribers.get(poll_id)
+                if conns is not None:
+                    conns.discard(conn)
+                    if not conns:
+                        del self.subscribers[poll_id]
+                        self.versions.pop(poll_id, None)
+                conn.polls.discard(poll_id)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self.lock:
+                if not self.subscribers:
+                    self.thread = None
+                    return
+                watched = {pid: self.versions.get(pid, 0) for pid in self.subscribers}
+            try:
+                self.tick(watched)
+            except Exception as e:
+                print(f"Broadcast failed: {e}")
+
+    def tick(self, watched):
+        changes, gone = self.hub.changes_since(watched)
+        frames = {}
+        if changes:
+            rows = (self.client.table('options').select('id, poll_id, votes')
+                    .in_('poll_id', list(changes)).order('id').execute().data)
+            for poll_id, version in changes.items():
+                options = [{'id': o['id'], 'votes': o['votes']} for o in rows if o['poll_id'] == poll_id]
+                frames[poll_id] = {
+                    'type': 'tally',
+                    'poll_id': poll_id,
+                    'version': version,
+                    'total': sum(o['votes'] for o in options),
+                    'options': options,
+                }
+        for poll_id in gone:
+            frames[poll_id] = {'type': 'deleted', 'poll_id': poll_id}
+
+        with self.lock:
+            for poll_id, frame in frames.items():
+                if poll_id in changes:
+                    self.versions[poll_id] = changes[poll_id]
+                for conn in self.subscribers.get(poll_id, ()):
+                    conn.push(poll_id, frame)
+            # A deleted poll never comes back: tell its subscribers once, then stop watching it
+            for poll_id in gone:
+                for conn in self.subscribers.pop(poll_id, ()):
+                    conn.polls.discard(poll_id)
+                self.versions.pop(poll_id, None)
@@ -0,0 +1,690 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Supabase client, backed by SQLite.
+
+Implements the subset of the supabase-py query builder that app.py uses
+(table().select/insert/update/delete, eq/in_/order/limit filters and
+PostgREST-style embedded resources such as 'options(*)') so the app can run
+offline for benchmarks and scale tests.
+
+Usage:
+    POLLS_BACKEND=local LOCAL_DB_PATH=polls.db python run_server.py
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import zlib
+from datetime import datetime, timezone
+
+import migrate
+
+
+# (table, column) -> referenced table, used to resolve embedded resources
+FOREIGN_KEYS = {
+    ('options', 'poll_id'): 'polls',
+    ('votes', 'poll_id'): 'polls',
+    ('votes', 'option_id'): 'options',
+    ('text_responses', 'poll_id'): 'polls',
+    ('poll_results', 'poll_id'): 'polls',
+    ('text_response_terms', 'poll_id'): 'polls',
+    ('text_response_clusters', 'poll_id'): 'polls',
+    ('text_response_minhash', 'response_id'): 'text_responses',
+    ('text_response_minhash', 'cluster_id'): 'text_response_clusters',
+}
+
+
+# (table, tsvector column on Postgres) -> FTS5 index over the same text, used by text_search()
+FTS_INDEXES = {
+    ('text_responses', 'search'): 'text_responses_fts',
+}
+
+
+# Columns declared JSON (jsonb on Postgres) come back parsed, like PostgREST returns them
+sqlite3.register_converter('JSON', json.loads)
+# JSONZ: zlib-compressed JSON, for archive snapshots (Postgres compresses those in TOAST)
+sqlite3.register_converter('JSONZ', lambda blob: json.loads(zlib.decompress(blob)))
+
+
+def to_sql_value(value):
+    return json.dumps(value) if isinstance(value, (dict, list)) else value
+
+
+class APIError(Exception):
+    """Mirrors postgrest.exceptions.APIError closely enough for app.py"""
+
+    def __init__(self, message, code=None):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+
+
+class APIResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+def utcnow_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def fts5_query(tsquery):
+    """Translate the to_tsquery subset app.py sends ('word & pre:*') into FTS5 syntax"""
+    terms = re.findall(r'(\w+)(:\*)?', tsquery)
+    return ' '.join(f'"{word}"' + ('*' if prefix else '') for word, prefix in terms)
+
+
+def vote_timeline_query(poll_id, bucket_seconds, since=None, until=None):
+    """SQL and parameters for vote_timeline: counts per (bucket, option), or per (bucket, poll) without a poll"""
+    clauses, params = [], []
+    if poll_id is not None:
+        clauses.append('poll_id = ?')
+        params.append(poll_id)
+    if since:
+        clauses.append('created_at >= ?')
+        params.append(since)
+    if until:
+        clauses.append('created_at < ?')
+        params.append(until)
+    where = (' WHERE ' + ' AND '.join(clauses)) if clauses else ''
+    option = 'option_id' if poll_id is not None else 'NULL'
+    sql = (f"SELECT CAST(strftime('%s', created_at) AS INTEGER) / {int(bucket_seconds)} * {int(bucket_seconds)} AS start, "
+           f'poll_id, {option} AS option_id, COUNT(*) AS votes FROM votes{where} '
+           'GROUP BY 1, 2, 3 ORDER BY 1, 2, 3')
+    return sql, params
+
+
+def quote(column):
+    return '"' + column.replace('"', '""') + '"'
+
+
+def _split_top_level(text):
+    """Split a select string on commas that are not inside parentheses"""
+    parts, depth, current = [], 0, ''
+    for ch in text:
+        if ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        if ch == ',' and depth == 0:
+            parts.append(current.strip())
+            current = ''
+        else:
+            current += ch
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def parse_select(columns):
+    """Parse 'a, b, rel(x, y)' into (['a', 'b'], {'rel': <parsed rel>})"""
+    fields, embeds = [], {}
+    for part in _split_top_level(columns or '*'):
+        if '(' in part and part.endswith(')'):
+            name, inner = part.split('(', 1)
+            embeds[name.strip()] = parse_select(inner[:-1])
+        else:
+            fields.append(part)
+    return fields, embeds
+
+
+class QueryBuilder:
+    """Chainable query mirroring postgrest's SyncRequestBuilder"""
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table_name = table
+        self.method = 'select'
+        self.columns = '*'
+        self.payload = None
+        self.filters = []
+        self.orders = []
+        self.limit_count = None
+        self.offset_count = None
+        self.count_mode = None
+        self.on_conflict = None
+
+    # Verbs
+    def select(self, columns='*', count=None):
+        self.method = 'select'
+        self.columns = columns
+        self.count_mode = count
+        return self
+
+    def insert(self, payload):
+        self.method = 'insert'
+        self.payload = payload
+        return self
+
+    def upsert(self, payload, on_conflict=None):
+        self.method = 'upsert'
+        self.payload = payload
+        self.on_conflict = on_conflict
+        return self
+
+    def update(self, payload):
+        self.method = 'update'
+        self.payload = payload
+        return self
+
+    def delete(self):
+        self.method = 'delete'
+        return self
+
+    # Filters
+    def _filter(self, column, op, value):
+        self.filters.append((column, op, value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, '=', value)
+
+    def neq(self, column, value):
+        return self._filter(column, '!=', value)
+
+    def gt(self, column, value):
+        return self._filter(column, '>', value)
+
+    def gte(self, column, value):
+        return self._filter(column, '>=', value)
+
+    def lt(self, column, value):
+        return self._filter(column, '<', value)
+
+    def lte(self, column, value):
+        return self._filter(column, '<=', value)
+
+    def like(self, column, pattern):
+        return self._filter(column, 'LIKE', pattern.replace('*', '%'))
+
+    def ilike(self, column, pattern):
+        # SQLite LIKE is already case-insensitive for ASCII
+        return self._filter(column, 'LIKE', pattern.replace('*', '%'))
+
+    def in_(self, column, values):
+        return self._filter(column, 'IN', list(values))
+
+    def is_(self, column, value):
+        return self._filter(column, 'IS', None if value in (None, 'null') else value)
+
+    def text_search(self, column, query, options=None):
+        # Only to_tsquery syntax (no options), which is what app.py sends
+        return self._filter(column, 'FTS', query)
+
+    # Modifiers
+    def order(self, column, desc=False):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, count):
+        self.limit_count = count
+        return self
+
+    def range(self, start, end):
+        self.offset_count = start
+        self.limit_count = end - start + 1
+        return self
+
+    def execute(self):
+        return self.client._execute(self)
+
+
+class RPCBuilder:
+    """Deferred call to a database function, like postgrest's rpc()"""
+
+    def __init__(self, client, name, params):
+        self.client = client
+        self.name = name
+        self.params = params or {}
+
+    def execute(self):
+        return self.client._call(self.name, self.params)
+
+
+class LocalClient:
+    """SQLite-backed replacement for supabase.Client"""
+
+    def __init__(self, path=':memory:'):
+        self.path = path
+        self.lock = threading.RLock()
+        self.calls = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None,
+                                    detect_types=sqlite3.PARSE_DECLTYPES)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA foreign_keys = ON')
+        if path != ':memory:':
+            self.conn.execute('PRAGMA journal_mode = WAL')
+            self.conn.execute('PRAGMA synchronous = NORMAL')
+        self.conn.execute('PRAGMA cache_size = -65536')
+        # Schema comes from migrations/sqlite, same runner as Supabase; the driver also registers
+        # the SQL functions (leaderboard_key) their triggers call on this connection
+        migrate.migrate(migrate.SQLiteDriver(self.conn), migrate.load_migrations('sqlite'))
+        self._columns = {}
+
+    def table(self, name):
+        return QueryBuilder(self, name)
+
+    def rpc(self, name, params=None):
+        return RPCBuilder(self, name, params)
+
+    def reset_call_count(self):
+        with self.lock:
+            calls, self.calls = self.calls, 0
+        return calls
+
+    # Internals
+    def columns(self, table):
+        if table not in self._columns:
+            rows = self.conn.execute(f'PRAGMA table_info({table})').fetchall()
+            if not rows:
+                raise APIError(f'relation "{table}" does not exist', code='42P01')
+            self._columns[table] = [r['name'] for r in rows]
+        return self._columns[table]
+
+    def _check_column(self, table, column):
+        if column not in self.columns(table):
+            raise APIError(f'column {table}.{column} does not exist', code='42703')
+        return column
+
+    def _where(self, query):
+        clauses, params = [], []
+        for column, op, value in query.filters:
+            if op == 'FTS':
+                index = FTS_INDEXES.get((query.table_name, column))
+                if index is None:
+                    raise APIError(f'column {query.table_name}.{column} is not a tsvector', code='42883')
+                match = fts5_query(value)
+                clauses.append(f'id IN (SELECT rowid FROM {index} WHERE {index} MATCH ?)' if match else '0')
+                params.extend([match] if match else [])
+                continue
+            self._check_column(query.table_name, column)
+            if op == 'IN':
+                if not value:
+                    clauses.append('0')
+                    continue
+                clauses.append(f'"{column}" IN ({", ".join("?" * len(value))})')
+                params.extend(value)
+            elif op == 'IS':
+                clauses.append(f'"{column}" IS ?')
+                params.append(value)
+            else:
+                clauses.append(f'"{column}" {op} ?')
+                params.append(value)
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def _execute(self, query):
+        with self.lock:
+            self.calls += 1
+            try:
+                handler = getattr(self, '_run_' + query.method)
+                return handler(query)
+            except sqlite3.IntegrityError as e:
+                code = '23505' if 'UNIQUE' in str(e) else '23503'
+                raise APIError(str(e), code=code)
+            except sqlite3.OperationalError as e:
+                raise APIError(str(e))
+
+    def _call(self, name, params):
+        handler = getattr(self, '_rpc_' + name, None)
+        if handler is None:
+            raise APIError(f'Could not find the function public.{name}', code='PGRST202')
+        with self.lock:
+            self.calls += 1
+            self.conn.execute('BEGIN')
+            try:
+                data = handler(**params)
+                self.conn.execute('COMMIT')
+            except sqlite3.IntegrityError as e:
+                self.conn.execute('ROLLBACK')
+                raise APIError(str(e), code='23505' if 'UNIQUE' in str(e) else '23503')
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+        return APIResponse(data)
+
+    # Database functions (mirror the SQL definitions used on Supabase)
+    def _rpc_import_polls(self, manifest):
+        """See postgres/0017_import_poll_schedule.sql: insert polls and their options, return poll IDs in order"""
+        now = utcnow_iso()
+        ids = []
+        for poll in manifest:
+            row = self.conn.execute(
+                'INSERT INTO polls (title, description, poll_type, opens_label, closes_label, opens_at, closes_at, '
+                'created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?) RETURNING id',
+                (poll['title'], poll.get('description') or '', poll.get('poll_type') or 'multiple_choice',
+                 'Opens today', 'Closes in 3 days', poll.get('opens_at'), poll.get('closes_at'), now),
+            ).fetchone()
+            ids.append(row['id'])
+        self.conn.executemany(
+            'INSERT INTO options (name, poll_id, votes, created_at) VALUES (?, ?, 0, ?)',
+            [(name, poll_id, now) for poll, poll_id in zip(manifest, ids) for name in poll.get('options') or []],
+        )
+        return ids
+
+    def _rpc_add_text_response(self, p_poll_id, p_username, p_response_text, p_terms):
+        """See postgres/0009_text_response_terms.sql: insert an answer and bump its term counts"""
+        row = self.conn.execute(
+            'INSERT INTO text_responses (poll_id, username, response_text, created_at) VALUES (?, ?, ?, ?) RETURNING id',
+            (p_poll_id, p_username, p_response_text, utcnow_iso()),
+        ).fetchone()
+        self.conn.executemany(
+            'INSERT INTO text_response_terms (poll_id, kind, term, responses) VALUES (?, ?, ?, 1) '
+            'ON CONFLICT (poll_id, kind, term) DO UPDATE SET responses = responses + 1',
+            [(p_poll_id, kind, term) for kind, terms in p_terms.items() for term in terms],
+        )
+        return row['id']
+
+    def _rpc_assign_text_cluster(self, p_poll_id, p_response_id, p_cluster_id, p_label, p_signature, p_buckets):
+        """See postgres/0010_text_response_clusters.sql: record an answer's signature and grow its cluster"""
+        target_id = p_cluster_id
+        if target_id is not None:
+            updated = self.conn.execute('UPDATE text_response_clusters SET size = size + 1 WHERE id = ? AND poll_id = ?',
+                                        (target_id, p_poll_id))
+            if updated.rowcount == 0:
+                target_id = None
+        if target_id is None:
+            target_id = self.conn.execute(
+                'INSERT INTO text_response_clusters (poll_id, label, size, created_at) VALUES (?, ?, 1, ?) RETURNING id',
+                (p_poll_id, p_label, utcnow_iso()),
+            ).fetchone()['id']
+        self.conn.execute('INSERT INTO text_response_minhash (response_id, poll_id, cluster_id, signature) '
+                          'VALUES (?, ?, ?, ?)', (p_response_id, p_poll_id, target_id, json.dumps(p_signature)))
+        self.conn.executemany('INSERT OR IGNORE INTO text_response_buckets (poll_id, bucket, response_id) VALUES (?, ?, ?)',
+                              [(p_poll_id, bucket, p_response_id) for bucket in p_buckets])
+        return target_id
+
+    def _rpc_vote_timeline(self, p_poll_id, p_bucket_seconds, p_since=None, p_until=None):
+        """See postgres/0011_vote_timeline.sql: vote counts per (bucket, option) or, for all polls, per (bucket, poll)"""
+        rows = self.conn.execute(*vote_timeline_query(p_poll_id, p_bucket_seconds, p_since, p_until)).fetchall()
+        return [{'bucket_start': datetime.fromtimestamp(r['start'], timezone.utc).isoformat(), 'poll_id': r['poll_id'],
+                 'option_id': r['option_id'], 'votes': r['votes']} for r in rows]
+
+    def _rpc_cast_ballot(self, p_poll_id, p_username, p_choices):
+        """See postgres/0013_ballots.sql: store a ballot and bump its approved options or first preference"""
+        row = self.conn.execute(
+            'INSERT INTO ballots (poll_id, username, choices, created_at) VALUES (?, ?, ?, ?) RETURNING id',
+            (p_poll_id, p_username, json.dumps(p_choices), utcnow_iso()),
+        ).fetchone()
+        poll = self.conn.execute('SELECT poll_type FROM polls WHERE id = ?', (p_poll_id,)).fetchone()
+        counted = p_choices[:1] if poll and poll['poll_type'] == 'ranked_choice' else p_choices
+        self.conn.executemany('UPDATE options SET votes = votes + 1 WHERE poll_id = ? AND id = ?',
+                              [(p_poll_id, option_id) for option_id in counted])
+        return row['id']
+
+    def _rpc_ballot_counts(self, p_poll_id):
+        """See postgres/0013_ballots.sql: identical ballots grouped with their count"""
+        rows = self.conn.execute(
+            'SELECT CAST(choices AS TEXT) AS choices, COUNT(*) AS n FROM ballots WHERE poll_id = ? GROUP BY 1',
+            (p_poll_id,),
+        ).fetchall()
+        return [{'choices': json.loads(r['choices']), 'ballots': r['n']} for r in rows]
+
+    def _rpc_increment_vote_shard(self, p_poll_id, p_option_id, p_shard):
+        """See postgres/0014_vote_counter_shards.sql: one vote on one shard row"""
+        self.conn.execute(
+            'INSERT INTO option_vote_shards (option_id, shard, poll_id, votes) VALUES (?, ?, ?, 1) '
+            'ON CONFLICT (option_id, shard) DO UPDATE SET votes = votes + 1',
+            (p_option_id, p_shard, p_poll_id),
+        )
+
+    def _rpc_compact_vote_shards(self):
+        """See postgres/0014_vote_counter_shards.sql: fold every shard into options.votes"""
+        totals = self.conn.execute(
+            'DELETE FROM option_vote_shards RETURNING option_id, votes').fetchall()
+        pending = {}
+        for r in totals:
+            pending[r['option_id']] = pending.get(r['option_id'], 0) + r['votes']
+        self.conn.executemany('UPDATE options SET votes = votes + ? WHERE id = ?',
+                              [(votes, option_id) for option_id, votes in pending.items()])
+        return len(pending)
+
+    def _rpc_add_to_sketches(self, p_scopes, p_index, p_rank, p_size):
+        """See postgres/0015_participant_sketches.sql: raise one register of each sketch"""
+        now = utcnow_iso()
+        for scope in p_scopes:
+            row = self.conn.execute('SELECT registers FROM participant_sketches WHERE scope = ?', (scope,)).fetchone()
+            registers = bytearray(row['registers'] if row else bytes(p_size))
+            if registers[p_index] < p_rank:
+                registers[p_index] = p_rank
+                self.conn.execute('INSERT OR REPLACE INTO participant_sketches (scope, registers, updated_at) '
+                                  'VALUES (?, ?, ?)', (scope, bytes(registers), now))
+
+    def _rpc_merge_sketch(self, p_scope, p_registers):
+        """See postgres/0015_participant_sketches.sql: register-wise maximum with a whole sketch"""
+        incoming = bytes.fromhex(p_registers[2:]) if p_registers.startswith('\\x') else bytes.fromhex(p_registers)
+        row = self.conn.execute('SELECT registers FROM participant_sketches WHERE scope = ?', (p_scope,)).fetchone()
+        merged = bytes(map(max, row['registers'], incoming)) if row else incoming
+        self.conn.execute('INSERT OR REPLACE INTO participant_sketches (scope, registers, updated_at) VALUES (?, ?, ?)',
+                          (p_scope, merged, utcnow_iso()))
+
+    def _rpc_revision_state(self):
+        """See postgres/0016_revision_horizon.sql; writes here are serialized, so nothing is ever in flight"""
+        revision = 0
+        for table in ('polls', 'options', 'poll_tombstones'):
+            row = self.conn.execute(f'SELECT max(revision) AS revision FROM {table}').fetchone()
+            revision = max(revision, row['revision'] or 0)
+        return {'revision': revision, 'horizon': None, 'pending': False}
+
+    def _rpc_poll_changes(self, p_since, p_horizon=None):
+        """See postgres/0016_revision_horizon.sql; revisions commit in order here, so p_since alone is enough"""
+        def changed(table, columns):
+            return self._run_select(self.table(table).select(columns).gt('revision', p_since).order('id')).data
+
+        return {
+            'horizon': None,
+            'polls': changed('polls', '*, options(*)'),
+            'options': changed('options', 'id, poll_id, votes, revision'),
+            'tombstones': self._run_select(self.table('poll_tombstones').select('poll_id, revision')
+                                           .gt('revision', p_since).order('poll_id')).data,
+        }
+
+    def _rpc_archive_poll(self, p_poll_id, p_force=False):
+        """See postgres/0007_poll_archive.sql and 0022_archive_ballots.sql: move one poll and its rows into poll_archive"""
+        poll = self.conn.execute('SELECT * FROM polls WHERE id = ?', (p_poll_id,)).fetchone()
+        if poll is None:
+            raise APIError(f'Poll {p_poll_id} not found', code='P0002')
+        poll = dict(poll)
+        closes_at = poll.get('closes_at')
+        if not p_force and (not closes_at or datetime.fromisoformat(closes_at) > datetime.now(timezone.utc)):
+            raise APIError(f'Poll {p_poll_id} has not closed yet', code='55000')
+
+        def rows(sql):
+            return [dict(r) for r in self.conn.execute(sql, (p_poll_id,)).fetchall()]
+
+        options = rows('SELECT id, name, votes FROM options WHERE poll_id = ? ORDER BY id')
+        total = sum(o['votes'] or 0 for o in options)
+        text_responses = rows('SELECT id, username, response_text, created_at FROM text_responses '
+                              'WHERE poll_id = ? ORDER BY id')
+        frozen = self.conn.execute('SELECT results, frozen_at FROM poll_results WHERE poll_id = ?',
+                                   (p_poll_id,)).fetchone()
+        if frozen is not None:
+            results, frozen_at = frozen['results'], frozen['frozen_at']
+        else:
+            frozen_at = utcnow_iso()
+            results = {
+                'pollId': poll['id'],
+                'title': poll['title'],
+                'poll_type': poll.get('poll_type') or 'multiple_choice',
+                'closedAt': closes_at,
+                'totalVotes': total,
+                'options': options,
+            }
+            if poll.get('poll_type') == 'text_response':
+                results['responses'] = len(text_responses)
+        poll.pop('revision', None)
+        snapshot = {
+            'poll': poll,
+            'options': options,
+            'results': results,
+            'frozen_at': frozen_at,
+            'votes': rows('SELECT id, option_id, username, created_at FROM votes WHERE poll_id = ? ORDER BY id'),
+            'text_responses': text_responses,
+            'ballots': [{**b, 'choices': json.loads(b['choices'])} for b in
+                        rows('SELECT id, username, CAST(choices AS TEXT) AS choices, created_at FROM ballots '
+                             'WHERE poll_id = ? ORDER BY id')],
+        }
+        self.conn.execute(
+            'INSERT INTO poll_archive (poll_id, title, poll_type, created_at, closes_at, total_votes, '
+            'response_count, archived_at, snapshot) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (poll['id'], poll['title'], poll.get('poll_type'), poll.get('created_at'), closes_at, total,
+             len(text_responses), utcnow_iso(), zlib.compress(json.dumps(snapshot).encode('utf-8'))),
+        )
+        self.conn.execute('DELETE FROM polls WHERE id = ?', (p_poll_id,))
+        return {'poll_id': poll['id'], 'total_votes': total, 'response_count': len(text_responses)}
+
+    def _run_select(self, query):
+        table = query.table_name
+        fields, embeds = parse_select(query.columns)
+        where, params = self._where(query)
+        sql = f'SELECT * FROM {table}{where}'
+        if query.orders:
+            sql += ' ORDER BY ' + ', '.join(
+                f'"{self._check_column(table, c)}" {"DESC" if d else "ASC"}' for c, d in query.orders
+            )
+        if query.limit_count is not None:
+            sql += f' LIMIT {int(query.limit_count)}'
+            if query.offset_count:
+                sql += f' OFFSET {int(query.offset_count)}'
+        rows = [dict(r) for r in self.conn.execute(sql, params).fetchall()]
+
+        count = None
+        if query.count_mode:
+            count = self.conn.execute(f'SELECT COUNT(*) FROM {table}{where}', params).fetchone()[0]
+
+        for name, sub in embeds.items():
+            self._embed(table, rows, name, sub)
+        return APIResponse([self._project(table, r, fields, embeds) for r in rows], count)
+
+    def _project(self, table, row, fields, embeds):
+        if '*' in fields:
+            out = {k: v for k, v in row.items()}
+        else:
+            out = {}
+        for f in fields:
+            if f != '*':
+                out[f] = row[self._check_column(table, f)]
+        for name in embeds:
+            out[name] = row[name]
+        return out
+
+    def _embed(self, table, rows, name, sub):
+        """Resolve one embedded resource for all rows with a single IN query"""
+        sub_fields, sub_embeds = sub
+        many_to_one = [c for (t, c), ref in FOREIGN_KEYS.items() if t == table and ref == name]
+        one_to_many = [c for (t, c), ref in FOREIGN_KEYS.items() if t == name and ref == table]
+
+        if many_to_one:
+            fk = many_to_one[0]
+            keys = list({r[fk] for r in rows if r[fk] is not None})
+            related = self._fetch_in(name, 'id', keys)
+            for child in sub_embeds:
+                self._embed(name, related, child, sub_embeds[child])
+            by_id = {r['id']: self._project(name, r, sub_fields, sub_embeds) for r in related}
+            for r in rows:
+                r[name] = by_id.get(r[fk])
+        elif one_to_many:
+            fk = one_to_many[0]
+            keys = list({r['id'] for r in rows})
+            related = self._fetch_in(name, fk, keys, order='id')
+            for child in sub_embeds:
+                self._embed(name, related, child, sub_embeds[child])
+            grouped = {}
+            for r in related:
+                grouped.setdefault(r[fk], []).append(self._project(name, r, sub_fields, sub_embeds))
+            for r in rows:
+                r[name] = grouped.get(r['id'], [])
+        else:
+            raise APIError(f'Could not find a relationship between {table} and {name}', code='PGRST200')
+
+    def _fetch_in(self, table, column, keys, order=None):
+        if not keys:
+            return []
+        results = []
+        # Stay under SQLite's bound-parameter limit
+        for i in range(0, len(keys), 900):
+            chunk = keys[i:i + 900]
+            sql = f'SELECT * FROM {table} WHERE "{column}" IN ({", ".join("?" * len(chunk))})'
+            if order:
+                sql += f' ORDER BY "{order}"'
+            results.extend(dict(r) for r in self.conn.execute(sql, chunk).fetchall())
+        return results
+
+    def _prepare_rows(self, table, payload):
+        rows = payload if isinstance(payload, list) else [payload]
+        columns = self.columns(table)
+        prepared = []
+        for row in rows:
+            row = dict(row)
+            if 'created_at' in columns and not row.get('created_at'):
+                row['created_at'] = utcnow_iso()
+            for key in row:
+                self._check_column(table, key)
+            prepared.append(row)
+        return prepared
+
+    def _insert_rows(self, table, rows, conflict_clause=''):
+        """Insert rows with multi-row VALUES statements inside one transaction"""
+        inserted = []
+        self.conn.execute('BEGIN')
+        try:
+            i = 0
+            while i < len(rows):
+                keys = list(rows[i].keys())
+                # Group consecutive rows with the same columns, within SQLite's parameter limit
+                per_batch = max(1, 30000 // max(len(keys), 1))
+                j = i + 1
+                while j < len(rows) and j - i < per_batch and list(rows[j].keys()) == keys:
+                    j += 1
+                chunk = rows[i:j]
+                placeholders = '(' + ', '.join('?' * len(keys)) + ')'
+                sql = (f'INSERT INTO {table} ({", ".join(quote(k) for k in keys)}) '
+                       f'VALUES {", ".join([placeholders] * len(chunk))}{conflict_clause} RETURNING *')
+                params = [to_sql_value(row[k]) for row in chunk for k in keys]
+                inserted.extend(dict(r) for r in self.conn.execute(sql, params).fetchall())
+                i = j
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+        return inserted
+
+    def _run_insert(self, query):
+        rows = self._prepare_rows(query.table_name, query.payload)
+        return APIResponse(self._insert_rows(query.table_name, rows))
+
+    def _run_upsert(self, query):
+        payload = query.payload if isinstance(query.payload, list) else [query.payload]
+        rows = self._prepare_rows(query.table_name, payload)
+        conflict = query.on_conflict or 'id'
+        target = [c.strip() for c in conflict.split(',')]
+        # Only overwrite the columns the caller sent, not defaults such as created_at
+        updates = [k for k in payload[0].keys() if k not in target] if payload else []
+        if updates:
+            clause = (f' ON CONFLICT ({", ".join(target)}) DO UPDATE SET '
+                      + ', '.join(f'"{k}" = excluded."{k}"' for k in updates))
+        else:
+            clause = f' ON CONFLICT ({", ".join(target)}) DO NOTHING'
+        return APIResponse(self._insert_rows(query.table_name, rows, clause))
+
+    def _run_update(self, query):
+        table = query.table_name
+        for key in query.payload:
+            self._check_column(table, key)
+        where, params = self._where(query)
+        keys = list(query.payload.keys())
+        assignments = ', '.join(f'{quote(k)} = ?' for k in keys)
+        sql = f'UPDATE {table} SET {assignments}{where} RETURNING *'
+        rows = self.conn.execute(sql, [to_sql_value(query.payload[k]) for k in keys] + params).fetchall()
+        return APIResponse([dict(r) for r in rows])
+
+    def _run_delete(self, query):
+        where, params = self._where(query)
+        rows = self.conn.execute(f'DELETE FROM {query.table_name}{where} RETURNING *', params).fetchall()
+        return APIResponse([dict(r) for r in rows])
+
+
+def create_client(path=':memory:'):
+    """Drop-in for supabase.create_client when POLLS_BACKEND=local"""
+    return LocalClient(path)
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Versioned migration runner for Supabase (Postgres) and the local SQLite backend.
+
+Migrations live in migrations/<dialect>/NNNN_name.sql and are applied in
+version order. Each applied migration is recorded in schema_migrations with a
+SHA-256 checksum; editing a migration after it has been applied is an error.
+
+Every migration runs inside a transaction unless its first line is
+    -- migrate:no-transaction
+in which case its statements run one by one in autocommit mode. That is
+required for CREATE INDEX CONCURRENTLY, which builds indexes without blocking
+votes while it runs.
+
+Usage:
+    python migrate.py status                          # uses DATABASE_URL
+    python migrate.py up
+    python migrate.py up --target 0003
+    python migrate.py baseline 0002                   # mark 0001-0002 as applied without running them
+    python migrate.py up --sqlite polls.db            # local backend
+
+DATABASE_URL is the direct Postgres connection string from Supabase
+(Project Settings -> Database) and needs psycopg2 (pip install psycopg2-binary).
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+from datetime import datetime, timezone
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+MIGRATIONS_DIR = os.path.join(BASE_DIR, 'migrations')
+NO_TRANSACTION_MARKER = '-- migrate:no-transaction'
+FILENAME_RE = re.compile(r'^(\d+)_([\w-]+)\.sql$')
+
+
+class MigrationError(Exception):
+    pass
+
+
+class Migration:
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+        with open(path, encoding='utf-8') as f:
+            self.sql = f.read()
+        self.checksum = hashlib.sha256(self.sql.encode('utf-8')).hexdigest()
+        self.transactional = not self.sql.lstrip().startswith(NO_TRANSACTION_MARKER)
+
+    def __repr__(self):
+        return f'<Migration {self.version}_{self.name}>'
+
+
+def load_migrations(dialect, directory=None):
+    """Return the migrations for a dialect sorted by version"""
+    directory = directory or os.path.join(MIGRATIONS_DIR, dialect)
+    migrations, seen = [], {}
+    for filename in sorted(os.listdir(directory)):
+        match = FILENAME_RE.match(filename)
+        if not match:
+            continue
+        version, name = match.groups()
+        if version in seen:
+            raise MigrationError(f'Duplicate migration version {version}: {seen[version]} and {filename}')
+        seen[version] = filename
+        migrations.append(Migration(version, name, os.path.join(directory, filename)))
+    return sorted(migrations, key=lambda m: int(m.version))
+
+
+def split_statements(sql):
+    """Split plain SQL on statement-ending semicolons (no $$ bodies in no-transaction files)"""
+    body = '\n'.join(line for line in sql.splitlines() if not line.strip().startswith('--'))
+    return [s.strip() for s in body.split(';') if s.strip()]
+
+
+def leaderboard_key(name):
+    """Python twin of Postgres leaderboard_key() (migrations/postgres/0012), for the SQLite triggers"""
+    return re.sub(r'\s+', ' ', name.strip(' ')).lower() if name is not None else None
+
+
+# SQL functions the SQLite migrations and their triggers call; registered on every connection they run on
+SQLITE_FUNCTIONS = {'leaderboard_key': (1, leaderboard_key)}
+
+
+class SQLiteDriver:
+    dialect = 'sqlite'
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.conn.isolation_level = None
+        for name, (arity, function) in SQLITE_FUNCTIONS.items():
+            self.conn.create_function(name, arity, function, deterministic=True)
+
+    def ensure_table(self):
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS schema_migrations ('
+            'version TEXT PRIMARY KEY, name TEXT NOT NULL, checksum TEXT NOT NULL, applied_at TEXT NOT NULL)'
+        )
+
+    def applied(self):
+        return {r[0]: r[1] for r in self.conn.execute('SELECT version, checksum FROM schema_migrations')}
+
+    def _statements(self, sql):
+        # complete_statement() understands quotes and trigger bodies
+        statements, current = [], ''
+        for line in sql.splitlines(keepends=True):
+            current += line
+            if sqlite3.complete_statement(current):
+                statements.append(current.strip())
+                current = ''
+        if current.strip():
+            statements.append(current.strip())
+        return statements
+
+    def apply(self, migration, record_only=False):
+        if migration.transactional:
+            self.conn.execute('BEGIN')
+        try:
+            if not record_only:
+                for statement in self._statements(migration.sql):
+                    self.conn.execute(statement)
+            self.conn.execute(
+                'INSERT INTO schema_migrations (version, name, checksum, applied_at) VALUES (?, ?, ?, ?)',
+                (migration.version, migration.name, migration.checksum, datetime.now(timezone.utc).isoformat()),
+            )
+            if migration.transactional:
+                self.conn.execute('COMMIT')
+        except Exception:
+            if migration.transactional:
+                self.conn.execute('ROLLBACK')
+            raise
+
+    def explain(self, sql, params=()):
+        return [row[-1] for row in self.conn.execute('EXPLAIN QUERY PLAN ' + sql, params).fetchall()]
+
+
+class PostgresDriver:
+    dialect = 'postgres'
+
+    def __init__(self, dsn):
+        try:
+            import psycopg2
+        except ImportError:
+            raise MigrationError('psycopg2 is required for Postgres migrations: pip install psycopg2-binary')
+        self.conn = psycopg2.connect(dsn)
+
+    def ensure_table(self):
+        self.conn.autocommit = True
+        with self.conn.cursor() as cur:
+            cur.execute(
+                'CREATE TABLE IF NOT EXISTS schema_migrations ('
+                'version TEXT PRIMARY KEY, name TEXT NOT NULL, checksum TEXT NOT NULL, '
+                'applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW())'
+            )
+
+    def applied(self):
+        with self.conn.cursor() as cur:
+            cur.execute('SELECT version, checksum FROM schema_migrations')
+            return dict(cur.fetchall())
+
+    def _record(self, cur, migration):
+        cur.execute(
+            'INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)',
+            (migration.version, migration.name, migration.checksum),
+        )
+
+    def apply(self, migration, record_only=False):
+        if migration.transactional:
+            self.conn.autocommit = False
+            try:
+                with self.conn.cursor() as cur:
+                    if not record_only:
+                        cur.execute(migration.sql)
+                    self._record(cur, migration)
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+            finally:
+                self.conn.autocommit = True
+            return
+
+        self.conn.autocommit = True
+        with self.conn.cursor() as cur:
+            if not record_only:
+                for statement in split_statements(migration.sql):
+                    cur.execute(statement)
+                # A failed CONCURRENTLY build leaves an INVALID index behind; refuse to record success
+                cur.execute(
+                    'SELECT indexrelid::regclass::text FROM pg_index i '
+                    'JOIN pg_class c ON c.oid = i.indrelid JOIN pg_namespace n ON n.oid = c.relnamespace '
+                    "WHERE NOT i.indisvalid AND n.nspname = 'public'"
+                )
+                invalid = [r[0] for r in cur.fetchall()]
+                if invalid:
+                    raise MigrationError(
+                        f"Invalid indexes after {migration.version}_{migration.name}: {', '.join(invalid)}. "
+                        'Drop them and run the migration again.'
+                    )
+            self._record(cur, migration)
+
+    def explain(self, sql, params=()):
+        with self.conn.cursor() as cur:
+            cur.execute('EXPLAIN ' + sql, params)
+            return [row[0] for row in cur.fetchall()]
+
+
+def pending(driver, migrations):
+    """Return migrations not yet applied, after checking applied ones are unchanged"""
+    driver.ensure_table()
+    applied = driver.applied()
+    changed = [m for m in migrations if m.version in applied and applied[m.version] != m.checksum]
+    if changed:
+        names = ', '.join(f'{m.version}_{m.name}' for m in changed)
+        raise MigrationError(f'Applied migrations were modified afterwards (checksum mismatch): {names}')
+    known = {m.version for m in migrations}
+    unknown = sorted(v for v in applied if v not in known)
+    if unknown:
+        raise MigrationError(f"Database has migrations this checkout does not know about: {', '.join(unknown)}")
+    return [m for m in migrations if m.version not in applied]
+
+
+def migrate(driver, migrations, target=None, log=None):
+    """Apply pending migrations up to and including `target`; return what was applied"""
+    done = []
+    for migration in pending(driver, migrations):
+        if target is not None and int(migration.version) > int(target):
+            break
+        if log:
+            mode = '' if migration.transactional else ' (no transaction)'
+            log(f'⏳ {migration.version}_{migration.name}{mode}')
+        driver.apply(migration)
+        done.append(migration)
+    return done
+
+
+def baseline(driver, migrations, target):
+    """Record migrations up to `target` as applied without running them (existing databases)"""
+    done = []
+    for migration in pending(driver, migrations):
+        if int(migration.version) > int(target):
+            break
+        driver.apply(migration, record_only=True)
+        done.append(migration)
+    return done
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Apply versioned database migrations')
+    parser.add_argument('command', nargs='?', default='up', choices=['up', 'status', 'baseline'])
+    parser.add_argument('version', nargs='?', help='Target version for up/baseline')
+    parser.add_argument('--target', help='Stop after this version (same as the positional version)')
+    parser.add_argument('--sqlite', metavar='PATH', help='Migrate a local backend database instead of Postgres')
+    parser.add_argument('--database-url', default=os.getenv('DATABASE_URL'), help='Postgres connection string')
+    args = parser.parse_args()
+
+    if not args.sqlite:
+        from dotenv import load_dotenv
+        load_dotenv()
+        args.database_url = args.database_url or os.getenv('DATABASE_URL')
+        if not args.database_url:
+            print('❌ ERROR: DATABASE_URL must be set in .env file (or pass --sqlite PATH)')
+            return 1
+
+    try:
+        if args.sqlite:
+            driver = SQLiteDriver(sqlite3.connect(args.sqlite))
+        else:
+            driver = PostgresDriver(args.database_url)
+        migrations = load_migrations(driver.dialect)
+        target = args.version or args.target
+
+        if args.command == 'status':
+            todo = {m.version for m in pending(driver, migrations)}
+            for m in migrations:
+                state = 'pending' if m.version in todo else 'applied'
+                print(f"{'⏳' if state == 'pending' else '✅'} {m.version}_{m.name} ({state})")
+            return 0
+
+        if args.command == 'baseline':
+            if not target:
+                parser.error('baseline needs a version')
+            done = baseline(driver, migrations, target)
+            print(f'✅ Marked {len(done)} migration(s) as applied')
+            return 0
+
+        done = migrate(driver, migrations, target=target, log=print)
+        print(f'✅ Applied {len(done)} migration(s)' if done else '✅ Database is up to date')
+        return 0
+    except MigrationError as e:
+        print(f'❌ {e}')
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
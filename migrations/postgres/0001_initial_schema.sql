@@ -0,0 +1,61 @@
+-- Polls, options and votes (originally supabase_schema.sql)
+-- Safe to run against a database created from supabase_schema.sql
+
+CREATE TABLE IF NOT EXISTS polls (
+    id BIGSERIAL PRIMARY KEY,
+    title VARCHAR(255) NOT NULL,
+    description TEXT,
+    opens_label VARCHAR(255) DEFAULT 'Opens today',
+    closes_label VARCHAR(255) DEFAULT 'Closes in 3 days',
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS options (
+    id BIGSERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    votes INTEGER DEFAULT 0,
+    poll_id BIGINT NOT NULL REFERENCES polls(id) ON DELETE CASCADE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS votes (
+    id BIGSERIAL PRIMARY KEY,
+    username VARCHAR(255) NOT NULL,
+    poll_id BIGINT NOT NULL REFERENCES polls(id) ON DELETE CASCADE,
+    option_id BIGINT NOT NULL REFERENCES options(id) ON DELETE CASCADE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    UNIQUE(poll_id, username)
+);
+
+CREATE INDEX IF NOT EXISTS idx_options_poll_id ON options(poll_id);
+CREATE INDEX IF NOT EXISTS idx_votes_poll_id ON votes(poll_id);
+CREATE INDEX IF NOT EXISTS idx_votes_option_id ON votes(option_id);
+CREATE INDEX IF NOT EXISTS idx_votes_username ON votes(username);
+
+ALTER TABLE polls ENABLE ROW LEVEL SECURITY;
+ALTER TABLE options ENABLE ROW LEVEL SECURITY;
+ALTER TABLE votes ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow public read access to polls" ON polls;
+CREATE POLICY "Allow public read access to polls" ON polls FOR SELECT USING (true);
+
+DROP POLICY IF EXISTS "Allow public read access to options" ON options;
+CREATE POLICY "Allow public read access to options" ON options FOR SELECT USING (true);
+
+DROP POLICY IF EXISTS "Allow public read access to votes" ON votes;
+CREATE POLICY "Allow public read access to votes" ON votes FOR SELECT USING (true);
+
+DROP POLICY IF EXISTS "Allow public insert to polls" ON polls;
+CREATE POLICY "Allow public insert to polls" ON polls FOR INSERT WITH CHECK (true);
+
+DROP POLICY IF EXISTS "Allow public insert to options" ON options;
+CREATE POLICY "Allow public insert to options" ON options FOR INSERT WITH CHECK (true);
+
+DROP POLICY IF EXISTS "Allow public insert to votes" ON votes;
+CREATE POLICY "Allow public insert to votes" ON votes FOR INSERT WITH CHECK (true);
+
+DROP POLICY IF EXISTS "Allow public update to options" ON options;
+CREATE POLICY "Allow public update to options" ON options FOR UPDATE USING (true);
+
+DROP POLICY IF EXISTS "Allow public delete to polls" ON polls;
+CREATE POLICY "Allow public delete to polls" ON polls FOR DELETE USING (true);
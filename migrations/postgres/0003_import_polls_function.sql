@@ -0,0 +1,33 @@
+-- Transactional bulk import used by POST /api/polls/import
+
+CREATE OR REPLACE FUNCTION import_polls(manifest JSONB)
+RETURNS SETOF BIGINT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    poll JSONB;
+    new_id BIGINT;
+BEGIN
+    FOR poll IN SELECT value FROM jsonb_array_elements(manifest)
+    LOOP
+        INSERT INTO polls (title, description, poll_type, opens_label, closes_label)
+        VALUES (
+            poll->>'title',
+            COALESCE(poll->>'description', ''),
+            COALESCE(poll->>'poll_type', 'multiple_choice'),
+            'Opens today',
+            'Closes in 3 days'
+        )
+        RETURNING id INTO new_id;
+
+        -- All options of a poll in a single insert
+        INSERT INTO options (name, poll_id, votes)
+        SELECT option_name, new_id, 0
+        FROM jsonb_array_elements_text(COALESCE(poll->'options', '[]'::jsonb)) AS option_name;
+
+        RETURN NEXT new_id;
+    END LOOP;
+END;
+$$;
+
+COMMENT ON FUNCTION import_polls(JSONB) IS 'Transactional bulk import of polls and options';
@@ -0,0 +1,11 @@
+-- migrate:no-transaction
+-- Composite indexes for the hot access patterns, built without locking writes:
+--   votes(poll_id, created_at)           per-poll CSV export ordered by time
+--   text_responses(poll_id, created_at)  get_text_responses() ordered by time
+-- idx_votes_poll_id is a prefix of both the new index and UNIQUE(poll_id, username),
+-- so it only costs writes.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_votes_poll_created ON votes(poll_id, created_at);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_text_responses_poll_created ON text_responses(poll_id, created_at);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_votes_created ON votes(created_at);
+DROP INDEX CONCURRENTLY IF EXISTS idx_votes_poll_id;
@@ -0,0 +1,72 @@
+-- Monotonic revisions for delta sync (GET /api/polls/changes?since=<revision>)
+-- One database-wide sequence stamps every change:
+--   polls.revision    poll metadata changed, or its set of options changed
+--   options.revision  option row changed (vote counts)
+--   poll_tombstones   deleted polls, so clients can drop them
+
+CREATE SEQUENCE IF NOT EXISTS poll_revision_seq;
+
+ALTER TABLE polls ADD COLUMN IF NOT EXISTS revision BIGINT NOT NULL DEFAULT nextval('poll_revision_seq');
+ALTER TABLE options ADD COLUMN IF NOT EXISTS revision BIGINT NOT NULL DEFAULT nextval('poll_revision_seq');
+
+CREATE TABLE IF NOT EXISTS poll_tombstones (
+    poll_id BIGINT PRIMARY KEY,
+    revision BIGINT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_polls_revision ON polls(revision);
+CREATE INDEX IF NOT EXISTS idx_options_revision ON options(revision);
+CREATE INDEX IF NOT EXISTS idx_poll_tombstones_revision ON poll_tombstones(revision);
+
+CREATE OR REPLACE FUNCTION stamp_revision() RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.revision := nextval('poll_revision_seq');
+    RETURN NEW;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION touch_parent_poll() RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        UPDATE polls SET revision = nextval('poll_revision_seq') WHERE id = OLD.poll_id;
+    ELSE
+        UPDATE polls SET revision = nextval('poll_revision_seq') WHERE id = NEW.poll_id;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION record_poll_tombstone() RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO poll_tombstones (poll_id, revision)
+    VALUES (OLD.id, nextval('poll_revision_seq'))
+    ON CONFLICT (poll_id) DO UPDATE SET revision = EXCLUDED.revision;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS polls_stamp_revision ON polls;
+CREATE TRIGGER polls_stamp_revision BEFORE INSERT OR UPDATE ON polls
+    FOR EACH ROW EXECUTE FUNCTION stamp_revision();
+
+DROP TRIGGER IF EXISTS options_stamp_revision ON options;
+CREATE TRIGGER options_stamp_revision BEFORE INSERT OR UPDATE ON options
+    FOR EACH ROW EXECUTE FUNCTION stamp_revision();
+
+DROP TRIGGER IF EXISTS options_touch_poll ON options;
+CREATE TRIGGER options_touch_poll AFTER INSERT OR DELETE ON options
+    FOR EACH ROW EXECUTE FUNCTION touch_parent_poll();
+
+DROP TRIGGER IF EXISTS polls_tombstone ON polls;
+CREATE TRIGGER polls_tombstone AFTER DELETE ON polls
+    FOR EACH ROW EXECUTE FUNCTION record_poll_tombstone();
+
+ALTER TABLE poll_tombstones ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "Allow public read access to poll_tombstones" ON poll_tombstones;
+CREATE POLICY "Allow public read access to poll_tombstones" ON poll_tombstones FOR SELECT USING (true);
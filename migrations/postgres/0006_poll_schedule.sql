@@ -0,0 +1,35 @@
+-- Real open/close times and frozen final results
+--   polls.opens_at / closes_at   NULL means no limit; enforced by vote() and submit_text_response()
+--   poll_results                 one immutable snapshot per closed poll, written once after it closes
+
+ALTER TABLE polls ADD COLUMN IF NOT EXISTS opens_at TIMESTAMPTZ;
+ALTER TABLE polls ADD COLUMN IF NOT EXISTS closes_at TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS idx_polls_closes_at ON polls(closes_at) WHERE closes_at IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS poll_results (
+    poll_id BIGINT PRIMARY KEY REFERENCES polls(id) ON DELETE CASCADE,
+    closed_at TIMESTAMPTZ NOT NULL,
+    results JSONB NOT NULL,
+    frozen_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE OR REPLACE FUNCTION reject_poll_results_update() RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    RAISE EXCEPTION 'poll_results rows are immutable (poll %)', OLD.poll_id;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS poll_results_immutable ON poll_results;
+CREATE TRIGGER poll_results_immutable BEFORE UPDATE ON poll_results
+    FOR EACH ROW EXECUTE FUNCTION reject_poll_results_update();
+
+ALTER TABLE poll_results ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow public read access to poll_results" ON poll_results;
+CREATE POLICY "Allow public read access to poll_results" ON poll_results FOR SELECT TO public USING (true);
+
+DROP POLICY IF EXISTS "Allow public insert access to poll_results" ON poll_results;
+CREATE POLICY "Allow public insert access to poll_results" ON poll_results FOR INSERT TO public WITH CHECK (true);
@@ -0,0 +1,12 @@
+-- migrate:no-transaction
+-- Full-text search and keyset pagination for GET /api/polls/<id>/text-responses:
+--   text_responses.search             tsvector of response_text, kept up to date by Postgres
+--   idx_text_responses_search (GIN)   ?q= searches
+--   idx_text_responses_poll_id_id     pages of one poll in id order (?cursor=)
+-- The 'simple' configuration neither stems nor drops stopwords: answers mix French and English.
+
+ALTER TABLE text_responses ADD COLUMN IF NOT EXISTS search TSVECTOR
+    GENERATED ALWAYS AS (to_tsvector('simple', response_text)) STORED;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_text_responses_search ON text_responses USING GIN (search);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_text_responses_poll_id_id ON text_responses(poll_id, id);
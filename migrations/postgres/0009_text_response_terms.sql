@@ -0,0 +1,51 @@
+-- Word and bigram counts per text_response poll, maintained as answers arrive (see text_terms.py)
+--   text_response_terms      responses mentioning each term, per poll
+--   add_text_response()      inserts an answer and bumps its terms in one transaction
+
+CREATE TABLE IF NOT EXISTS text_response_terms (
+    poll_id BIGINT NOT NULL REFERENCES polls(id) ON DELETE CASCADE,
+    kind VARCHAR(10) NOT NULL CHECK (kind IN ('word', 'bigram')),
+    term TEXT NOT NULL,
+    responses INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (poll_id, kind, term)
+);
+
+-- Top-k reads walk this index and stop after `limit` rows
+CREATE INDEX IF NOT EXISTS idx_text_response_terms_top ON text_response_terms(poll_id, kind, responses DESC);
+
+CREATE OR REPLACE FUNCTION add_text_response(p_poll_id BIGINT, p_username TEXT, p_response_text TEXT, p_terms JSONB)
+RETURNS BIGINT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    new_id BIGINT;
+BEGIN
+    INSERT INTO text_responses (poll_id, username, response_text)
+    VALUES (p_poll_id, p_username, p_response_text)
+    RETURNING id INTO new_id;
+
+    -- p_terms is {"word": [...], "bigram": [...]}, each term listed once
+    INSERT INTO text_response_terms (poll_id, kind, term, responses)
+    SELECT p_poll_id, kinds.key, term, 1
+    FROM jsonb_each(p_terms) AS kinds, jsonb_array_elements_text(kinds.value) AS term
+    ON CONFLICT (poll_id, kind, term) DO UPDATE SET responses = text_response_terms.responses + 1;
+
+    RETURN new_id;
+END;
+$$;
+
+COMMENT ON FUNCTION add_text_response(BIGINT, TEXT, TEXT, JSONB) IS 'Insert a text response and count its terms';
+
+ALTER TABLE text_response_terms ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow public read access to text_response_terms" ON text_response_terms;
+CREATE POLICY "Allow public read access to text_response_terms" ON text_response_terms FOR SELECT TO public USING (true);
+
+DROP POLICY IF EXISTS "Allow public insert access to text_response_terms" ON text_response_terms;
+CREATE POLICY "Allow public insert access to text_response_terms" ON text_response_terms FOR INSERT TO public WITH CHECK (true);
+
+DROP POLICY IF EXISTS "Allow public update access to text_response_terms" ON text_response_terms;
+CREATE POLICY "Allow public update access to text_response_terms" ON text_response_terms FOR UPDATE TO public USING (true);
+
+DROP POLICY IF EXISTS "Allow public delete access to text_response_terms" ON text_response_terms;
+CREATE POLICY "Allow public delete access to text_response_terms" ON text_response_terms FOR DELETE TO public USING (true);
@@ -0,0 +1,96 @@
+-- Near-duplicate clusters of text responses, maintained as answers arrive (see text_clusters.py)
+--   text_response_clusters   one row per cluster with its size, top-k by (poll_id, size DESC)
+--   text_response_minhash    MinHash signature and cluster of every clustered answer
+--   text_response_buckets    LSH band buckets: answers sharing a bucket are candidate near-duplicates
+--   assign_text_cluster()    records one answer's signature and buckets and grows (or starts) its cluster
+
+CREATE TABLE IF NOT EXISTS text_response_clusters (
+    id BIGSERIAL PRIMARY KEY,
+    poll_id BIGINT NOT NULL REFERENCES polls(id) ON DELETE CASCADE,
+    label TEXT NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_text_response_clusters_top ON text_response_clusters(poll_id, size DESC);
+
+CREATE TABLE IF NOT EXISTS text_response_minhash (
+    response_id BIGINT PRIMARY KEY REFERENCES text_responses(id) ON DELETE CASCADE,
+    poll_id BIGINT NOT NULL REFERENCES polls(id) ON DELETE CASCADE,
+    cluster_id BIGINT NOT NULL REFERENCES text_response_clusters(id) ON DELETE CASCADE,
+    signature BIGINT[] NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_text_response_minhash_cluster ON text_response_minhash(cluster_id);
+
+CREATE TABLE IF NOT EXISTS text_response_buckets (
+    poll_id BIGINT NOT NULL REFERENCES polls(id) ON DELETE CASCADE,
+    bucket BIGINT NOT NULL,
+    response_id BIGINT NOT NULL REFERENCES text_responses(id) ON DELETE CASCADE,
+    PRIMARY KEY (poll_id, bucket, response_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_text_response_buckets_response ON text_response_buckets(response_id);
+
+-- A removed answer leaves its cluster
+CREATE OR REPLACE FUNCTION shrink_text_cluster() RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    UPDATE text_response_clusters SET size = size - 1 WHERE id = OLD.cluster_id;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS text_response_minhash_shrink ON text_response_minhash;
+CREATE TRIGGER text_response_minhash_shrink AFTER DELETE ON text_response_minhash
+    FOR EACH ROW EXECUTE FUNCTION shrink_text_cluster();
+
+CREATE OR REPLACE FUNCTION assign_text_cluster(
+    p_poll_id BIGINT, p_response_id BIGINT, p_cluster_id BIGINT,
+    p_label TEXT, p_signature BIGINT[], p_buckets BIGINT[]
+)
+RETURNS BIGINT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    target_id BIGINT := p_cluster_id;
+BEGIN
+    IF target_id IS NOT NULL THEN
+        UPDATE text_response_clusters SET size = size + 1 WHERE id = target_id AND poll_id = p_poll_id;
+        IF NOT FOUND THEN
+            target_id := NULL;  -- rebuilt since the candidates were read
+        END IF;
+    END IF;
+    IF target_id IS NULL THEN
+        INSERT INTO text_response_clusters (poll_id, label, size)
+        VALUES (p_poll_id, p_label, 1)
+        RETURNING id INTO target_id;
+    END IF;
+
+    INSERT INTO text_response_minhash (response_id, poll_id, cluster_id, signature)
+    VALUES (p_response_id, p_poll_id, target_id, p_signature);
+
+    INSERT INTO text_response_buckets (poll_id, bucket, response_id)
+    SELECT p_poll_id, bucket, p_response_id FROM unnest(p_buckets) AS bucket
+    ON CONFLICT DO NOTHING;
+
+    RETURN target_id;
+END;
+$$;
+
+COMMENT ON FUNCTION assign_text_cluster(BIGINT, BIGINT, BIGINT, TEXT, BIGINT[], BIGINT[])
+    IS 'Add one text response to a near-duplicate cluster';
+
+ALTER TABLE text_response_clusters ENABLE ROW LEVEL SECURITY;
+ALTER TABLE text_response_minhash ENABLE ROW LEVEL SECURITY;
+ALTER TABLE text_response_buckets ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow public access to text_response_clusters" ON text_response_clusters;
+CREATE POLICY "Allow public access to text_response_clusters" ON text_response_clusters FOR ALL TO public USING (true) WITH CHECK (true);
+
+DROP POLICY IF EXISTS "Allow public access to text_response_minhash" ON text_response_minhash;
+CREATE POLICY "Allow public access to text_response_minhash" ON text_response_minhash FOR ALL TO public USING (true) WITH CHECK (true);
+
+DROP POLICY IF EXISTS "Allow public access to text_response_buckets" ON text_response_buckets;
+CREATE POLICY "Allow public access to text_response_buckets" ON text_response_buckets FOR ALL TO public USING (true) WITH CHECK (true);
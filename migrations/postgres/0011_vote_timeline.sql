@@ -0,0 +1,28 @@
+-- Votes per time bucket for GET /api/polls/<id>/timeline and /api/polls/timeline
+-- One poll: counts per (bucket, option), an index range scan on idx_votes_poll_created.
+-- All polls (p_poll_id NULL): counts per (bucket, poll), option_id is NULL; idx_votes_created serves since/until.
+-- Buckets are aligned on the Unix epoch, like the local backend's integer division.
+
+CREATE OR REPLACE FUNCTION vote_timeline(
+    p_poll_id BIGINT,
+    p_bucket_seconds INTEGER,
+    p_since TIMESTAMPTZ DEFAULT NULL,
+    p_until TIMESTAMPTZ DEFAULT NULL
+)
+RETURNS TABLE (bucket_start TIMESTAMPTZ, poll_id BIGINT, option_id BIGINT, votes BIGINT)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT date_bin(make_interval(secs => p_bucket_seconds), v.created_at, TIMESTAMPTZ 'epoch'),
+           v.poll_id,
+           CASE WHEN p_poll_id IS NULL THEN NULL ELSE v.option_id END,
+           COUNT(*)
+    FROM votes v
+    WHERE (p_poll_id IS NULL OR v.poll_id = p_poll_id)
+      AND (p_since IS NULL OR v.created_at >= p_since)
+      AND (p_until IS NULL OR v.created_at < p_until)
+    GROUP BY 1, 2, 3
+    ORDER BY 1, 2, 3;
+$$;
+
+COMMENT ON FUNCTION vote_timeline(BIGINT, INTEGER, TIMESTAMPTZ, TIMESTAMPTZ) IS 'Vote counts per time bucket';
@@ -0,0 +1,64 @@
+-- Votes per nominee across polls (GET /api/leaderboard), kept current by triggers
+--   name_leaderboard     one row per normalized option name: votes summed over every poll
+--                        listing that name, and the number of those polls
+--   leaderboard_key()    "  Hank  H." and "hank h." count as the same nominee
+-- Votes only ever change options.votes, so following the options rows (insert, vote count
+-- update, rename, delete) tracks every vote without reading the votes table. Deleting or
+-- archiving a poll deletes its options and takes its votes off the board.
+
+CREATE OR REPLACE FUNCTION leaderboard_key(p_name TEXT) RETURNS TEXT
+LANGUAGE sql IMMUTABLE
+AS $$
+    SELECT lower(regexp_replace(btrim(p_name), '\s+', ' ', 'g'));
+$$;
+
+CREATE TABLE IF NOT EXISTS name_leaderboard (
+    name_key TEXT PRIMARY KEY,
+    display_name TEXT NOT NULL,
+    votes BIGINT NOT NULL DEFAULT 0,
+    polls INTEGER NOT NULL DEFAULT 0
+);
+
+-- Reads walk this index and stop after `limit` rows
+CREATE INDEX IF NOT EXISTS idx_name_leaderboard_votes ON name_leaderboard(votes DESC, name_key);
+
+CREATE OR REPLACE FUNCTION track_name_leaderboard() RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- A vote: one row, one update
+    IF TG_OP = 'UPDATE' AND leaderboard_key(NEW.name) = leaderboard_key(OLD.name) THEN
+        UPDATE name_leaderboard SET votes = votes + COALESCE(NEW.votes, 0) - COALESCE(OLD.votes, 0)
+        WHERE name_key = leaderboard_key(NEW.name);
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE name_leaderboard SET votes = votes - COALESCE(OLD.votes, 0), polls = polls - 1
+        WHERE name_key = leaderboard_key(OLD.name);
+        DELETE FROM name_leaderboard WHERE name_key = leaderboard_key(OLD.name) AND polls <= 0;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO name_leaderboard (name_key, display_name, votes, polls)
+        VALUES (leaderboard_key(NEW.name), btrim(NEW.name), COALESCE(NEW.votes, 0), 1)
+        ON CONFLICT (name_key) DO UPDATE
+        SET votes = name_leaderboard.votes + EXCLUDED.votes, polls = name_leaderboard.polls + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS options_name_leaderboard ON options;
+CREATE TRIGGER options_name_leaderboard AFTER INSERT OR DELETE OR UPDATE OF name, votes ON options
+    FOR EACH ROW EXECUTE FUNCTION track_name_leaderboard();
+
+-- Backfill after the trigger exists: its lock holds off votes until this transaction commits
+INSERT INTO name_leaderboard (name_key, display_name, votes, polls)
+SELECT leaderboard_key(name), min(btrim(name)), sum(COALESCE(votes, 0)), count(*)
+FROM options
+GROUP BY leaderboard_key(name)
+ON CONFLICT (name_key) DO UPDATE SET votes = EXCLUDED.votes, polls = EXCLUDED.polls;
+
+ALTER TABLE name_leaderboard ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "Allow public read access to name_leaderboard" ON name_leaderboard;
+CREATE POLICY "Allow public read access to name_leaderboard" ON name_leaderboard FOR SELECT USING (true);
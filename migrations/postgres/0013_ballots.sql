@@ -0,0 +1,58 @@
+-- Ballots of approval and ranked_choice polls (see tally.py)
+--   ballots          one per voter and poll: the approved options, or the options in order of preference
+--   cast_ballot()    stores a ballot and bumps options.votes in the same transaction: every approved
+--                    option, or the first preference of a ranked ballot, so option counters, live
+--                    tallies, /api/polls and the leaderboard work unchanged for these poll types
+--   ballot_counts()  identical ballots grouped with how many voters cast them, as one JSON value
+--                    (a single row, so PostgREST's max-rows never truncates it)
+
+CREATE TABLE IF NOT EXISTS ballots (
+    id BIGSERIAL PRIMARY KEY,
+    poll_id BIGINT NOT NULL REFERENCES polls(id) ON DELETE CASCADE,
+    username VARCHAR(255) NOT NULL,
+    choices BIGINT[] NOT NULL CHECK (cardinality(choices) > 0),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    UNIQUE (poll_id, username)
+);
+
+-- Newest ballot of a poll: the tally cache key
+CREATE INDEX IF NOT EXISTS idx_ballots_poll_id_id ON ballots(poll_id, id);
+
+CREATE OR REPLACE FUNCTION cast_ballot(p_poll_id BIGINT, p_username TEXT, p_choices BIGINT[])
+RETURNS BIGINT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    new_id BIGINT;
+    kind TEXT;
+BEGIN
+    SELECT poll_type INTO kind FROM polls WHERE id = p_poll_id;
+
+    INSERT INTO ballots (poll_id, username, choices)
+    VALUES (p_poll_id, p_username, p_choices)
+    RETURNING id INTO new_id;
+
+    UPDATE options SET votes = votes + 1
+    WHERE poll_id = p_poll_id
+      AND id = ANY (CASE WHEN kind = 'ranked_choice' THEN p_choices[1:1] ELSE p_choices END);
+
+    RETURN new_id;
+END;
+$$;
+
+COMMENT ON FUNCTION cast_ballot(BIGINT, TEXT, BIGINT[]) IS 'Store a ballot and count it on its options';
+
+CREATE OR REPLACE FUNCTION ballot_counts(p_poll_id BIGINT)
+RETURNS JSONB
+LANGUAGE sql STABLE
+AS $$
+    SELECT COALESCE(jsonb_agg(jsonb_build_object('choices', choices, 'ballots', n)), '[]'::jsonb)
+    FROM (
+        SELECT choices, count(*) AS n FROM ballots WHERE poll_id = p_poll_id GROUP BY choices
+    ) grouped;
+$$;
+
+ALTER TABLE ballots ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow public access to ballots" ON ballots;
+CREATE POLICY "Allow public access to ballots" ON ballots FOR ALL TO public USING (true) WITH CHECK (true);
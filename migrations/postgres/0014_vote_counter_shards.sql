@@ -0,0 +1,53 @@
+-- Sharded vote counters for hot options (see counters.py), used when VOTE_COUNTER_SHARDS > 1
+--   option_vote_shards      votes not yet folded into options.votes, spread over up to N rows per
+--                           option so concurrent votes for one nominee lock different rows
+--   increment_vote_shard()  one vote on one shard: a single upsert, no read-modify-write
+--   compact_vote_shards()   drains every shard into options.votes in one statement; the options
+--                           update stamps revisions, so caches, live tallies and the leaderboard
+--                           see compacted votes as ordinary vote count changes
+
+CREATE TABLE IF NOT EXISTS option_vote_shards (
+    option_id BIGINT NOT NULL REFERENCES options(id) ON DELETE CASCADE,
+    shard SMALLINT NOT NULL,
+    poll_id BIGINT NOT NULL REFERENCES polls(id) ON DELETE CASCADE,
+    votes INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (option_id, shard)
+);
+
+CREATE INDEX IF NOT EXISTS idx_option_vote_shards_poll_id ON option_vote_shards(poll_id);
+
+CREATE OR REPLACE FUNCTION increment_vote_shard(p_poll_id BIGINT, p_option_id BIGINT, p_shard INTEGER)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    INSERT INTO option_vote_shards (option_id, shard, poll_id, votes)
+    VALUES (p_option_id, p_shard, p_poll_id, 1)
+    ON CONFLICT (option_id, shard) DO UPDATE SET votes = option_vote_shards.votes + 1;
+$$;
+
+CREATE OR REPLACE FUNCTION compact_vote_shards()
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    compacted INTEGER;
+BEGIN
+    -- Votes landing on a shard while it is drained wait for the delete and then insert a fresh row
+    WITH drained AS (
+        DELETE FROM option_vote_shards RETURNING option_id, votes
+    ), totals AS (
+        SELECT option_id, sum(votes) AS votes FROM drained GROUP BY option_id
+    )
+    UPDATE options SET votes = options.votes + totals.votes
+    FROM totals WHERE options.id = totals.option_id;
+    GET DIAGNOSTICS compacted = ROW_COUNT;
+    RETURN compacted;
+END;
+$$;
+
+COMMENT ON FUNCTION compact_vote_shards() IS 'Fold pending vote shards into options.votes; returns the options updated';
+
+ALTER TABLE option_vote_shards ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow public access to option_vote_shards" ON option_vote_shards;
+CREATE POLICY "Allow public access to option_vote_shards" ON option_vote_shards FOR ALL TO public USING (true) WITH CHECK (true);
@@ -0,0 +1,53 @@
+-- HyperLogLog sketches of distinct participants (see participants.py)
+--   participant_sketches   one sketch per scope: 'all' (the whole event) or 'poll:<id>', as one
+--                          byte per register
+--   add_to_sketches()      raises one register of several sketches to a rank if it is lower; most
+--                          calls change nothing and write nothing once the sketches have filled in
+--   merge_sketch()         register-wise maximum with a whole sketch (rebuilds, other workers)
+-- Both only ever raise registers, so updates from any number of workers merge in any order.
+
+CREATE TABLE IF NOT EXISTS participant_sketches (
+    scope TEXT PRIMARY KEY,
+    registers BYTEA NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE OR REPLACE FUNCTION add_to_sketches(p_scopes TEXT[], p_index INTEGER, p_rank INTEGER, p_size INTEGER)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO participant_sketches (scope, registers)
+    SELECT scope, decode(repeat('00', p_size), 'hex') FROM unnest(p_scopes) AS scope
+    ON CONFLICT (scope) DO NOTHING;
+
+    UPDATE participant_sketches
+    SET registers = set_byte(registers, p_index, p_rank), updated_at = NOW()
+    WHERE scope = ANY (p_scopes) AND get_byte(registers, p_index) < p_rank;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION merge_sketch(p_scope TEXT, p_registers BYTEA)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    merged BYTEA;
+BEGIN
+    INSERT INTO participant_sketches (scope, registers) VALUES (p_scope, p_registers)
+    ON CONFLICT (scope) DO NOTHING;
+
+    SELECT registers INTO merged FROM participant_sketches WHERE scope = p_scope FOR UPDATE;
+    FOR i IN 0 .. length(p_registers) - 1 LOOP
+        IF get_byte(p_registers, i) > get_byte(merged, i) THEN
+            merged := set_byte(merged, i, get_byte(p_registers, i));
+        END IF;
+    END LOOP;
+    UPDATE participant_sketches SET registers = merged, updated_at = NOW() WHERE scope = p_scope;
+END;
+$$;
+
+ALTER TABLE participant_sketches ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow public access to participant_sketches" ON participant_sketches;
+CREATE POLICY "Allow public access to participant_sketches" ON participant_sketches FOR ALL TO public USING (true) WITH CHECK (true);
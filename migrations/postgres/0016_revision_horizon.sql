@@ -0,0 +1,90 @@
+-- Revision cursors that survive out-of-order commits (GET /api/polls/changes)
+-- Revisions come from nextval() while a transaction runs, not when it commits, so a transaction
+-- holding revision N can commit after another one holding N + 1 was already read. A cursor at
+-- N + 1 would then skip N for good. Every stamp now also records the writing transaction's ID:
+--   revision_state()   newest revision, plus the snapshot's horizon (xmin: every transaction
+--                      still in flight has an ID at least this high) and whether one is in flight
+--   poll_changes()     rows past a revision or written by a transaction at or above a horizon,
+--                      with the horizon for the next call, all read from one snapshot
+-- Clients send back both; rows of transactions in flight at the previous call come through
+-- once they commit, whatever their revision.
+-- Also lets the revision triggers write under the anon key: poll_tombstones only had a read
+-- policy, so deleting a poll was rejected by row-level security, and without an update policy on
+-- polls touch_parent_poll() silently left the poll's revision behind its options.
+
+ALTER TABLE polls ADD COLUMN IF NOT EXISTS revision_xid BIGINT;
+ALTER TABLE options ADD COLUMN IF NOT EXISTS revision_xid BIGINT;
+ALTER TABLE poll_tombstones ADD COLUMN IF NOT EXISTS revision_xid BIGINT;
+
+CREATE INDEX IF NOT EXISTS idx_polls_revision_xid ON polls(revision_xid);
+CREATE INDEX IF NOT EXISTS idx_options_revision_xid ON options(revision_xid);
+CREATE INDEX IF NOT EXISTS idx_poll_tombstones_revision_xid ON poll_tombstones(revision_xid);
+
+CREATE OR REPLACE FUNCTION stamp_revision() RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.revision := nextval('poll_revision_seq');
+    NEW.revision_xid := pg_current_xact_id()::text::bigint;
+    RETURN NEW;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION record_poll_tombstone() RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO poll_tombstones (poll_id, revision, revision_xid)
+    VALUES (OLD.id, nextval('poll_revision_seq'), pg_current_xact_id()::text::bigint)
+    ON CONFLICT (poll_id) DO UPDATE SET revision = EXCLUDED.revision, revision_xid = EXCLUDED.revision_xid;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION revision_state()
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT jsonb_build_object(
+        'revision', GREATEST(
+            (SELECT max(revision) FROM polls),
+            (SELECT max(revision) FROM options),
+            (SELECT max(revision) FROM poll_tombstones),
+            0),
+        'horizon', pg_snapshot_xmin(pg_current_snapshot())::text::bigint,
+        'pending', pg_snapshot_xmin(pg_current_snapshot()) <> pg_snapshot_xmax(pg_current_snapshot()));
+$$;
+
+CREATE OR REPLACE FUNCTION poll_changes(p_since BIGINT, p_horizon BIGINT DEFAULT NULL)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT jsonb_build_object(
+        'horizon', pg_snapshot_xmin(pg_current_snapshot())::text::bigint,
+        'polls', COALESCE((
+            SELECT jsonb_agg(to_jsonb(p) - 'revision_xid' || jsonb_build_object('options', COALESCE((
+                SELECT jsonb_agg(to_jsonb(o) - 'revision_xid' ORDER BY o.id) FROM options o WHERE o.poll_id = p.id
+            ), '[]'::jsonb)) ORDER BY p.id)
+            FROM polls p
+            WHERE p.revision > p_since OR p.revision_xid >= p_horizon
+        ), '[]'::jsonb),
+        'options', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object('id', o.id, 'poll_id', o.poll_id, 'votes', o.votes, 'revision', o.revision))
+            FROM options o
+            WHERE o.revision > p_since OR o.revision_xid >= p_horizon
+        ), '[]'::jsonb),
+        'tombstones', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object('poll_id', t.poll_id, 'revision', t.revision))
+            FROM poll_tombstones t
+            WHERE t.revision > p_since OR t.revision_xid >= p_horizon
+        ), '[]'::jsonb));
+$$;
+
+DROP POLICY IF EXISTS "Allow public update to polls" ON polls;
+CREATE POLICY "Allow public update to polls" ON polls FOR UPDATE USING (true);
+
+DROP POLICY IF EXISTS "Allow public read access to poll_tombstones" ON poll_tombstones;
+DROP POLICY IF EXISTS "Allow public access to poll_tombstones" ON poll_tombstones;
+CREATE POLICY "Allow public access to poll_tombstones" ON poll_tombstones FOR ALL TO public USING (true) WITH CHECK (true);
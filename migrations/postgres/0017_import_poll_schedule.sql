@@ -0,0 +1,34 @@
+-- Bulk import sets the schedule too (opens_at / closes_at, migration 0006);
+-- bulk_import.py validates them the same way POST /api/polls does
+
+CREATE OR REPLACE FUNCTION import_polls(manifest JSONB)
+RETURNS SETOF BIGINT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    poll JSONB;
+    new_id BIGINT;
+BEGIN
+    FOR poll IN SELECT value FROM jsonb_array_elements(manifest)
+    LOOP
+        INSERT INTO polls (title, description, poll_type, opens_label, closes_label, opens_at, closes_at)
+        VALUES (
+            poll->>'title',
+            COALESCE(poll->>'description', ''),
+            COALESCE(poll->>'poll_type', 'multiple_choice'),
+            'Opens today',
+            'Closes in 3 days',
+            (poll->>'opens_at')::timestamptz,
+            (poll->>'closes_at')::timestamptz
+        )
+        RETURNING id INTO new_id;
+
+        -- All options of a poll in a single insert
+        INSERT INTO options (name, poll_id, votes)
+        SELECT option_name, new_id, 0
+        FROM jsonb_array_elements_text(COALESCE(poll->'options', '[]'::jsonb)) AS option_name;
+
+        RETURN NEXT new_id;
+    END LOOP;
+END;
+$$;
@@ -0,0 +1,6 @@
+-- Lets archive_poll() write under the anon key: poll_archive only had a read policy, so every
+-- archive was rejected by row-level security before the poll was deleted
+
+DROP POLICY IF EXISTS "Allow public read access to poll_archive" ON poll_archive;
+DROP POLICY IF EXISTS "Allow public access to poll_archive" ON poll_archive;
+CREATE POLICY "Allow public access to poll_archive" ON poll_archive FOR ALL TO public USING (true) WITH CHECK (true);
@@ -0,0 +1,75 @@
+-- name_leaderboard.polls counted option rows, so a poll listing a name twice counted as two polls
+--   name_leaderboard_polls   options per (name, poll); a name's poll count changes only when one
+--                            of these appears or drops to zero
+-- Also lets the trigger write under the anon key: name_leaderboard only had a read policy, so
+-- every option insert, vote and delete was rejected by row-level security.
+
+CREATE TABLE IF NOT EXISTS name_leaderboard_polls (
+    name_key TEXT NOT NULL,
+    poll_id BIGINT NOT NULL,
+    options INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (name_key, poll_id)
+);
+
+CREATE OR REPLACE FUNCTION track_name_leaderboard() RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    remaining INTEGER;
+    listed INTEGER;
+BEGIN
+    -- A vote: one row, one update
+    IF TG_OP = 'UPDATE' AND leaderboard_key(NEW.name) = leaderboard_key(OLD.name) THEN
+        UPDATE name_leaderboard SET votes = votes + COALESCE(NEW.votes, 0) - COALESCE(OLD.votes, 0)
+        WHERE name_key = leaderboard_key(NEW.name);
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE name_leaderboard_polls SET options = options - 1
+        WHERE name_key = leaderboard_key(OLD.name) AND poll_id = OLD.poll_id
+        RETURNING options INTO remaining;
+        IF remaining <= 0 THEN
+            DELETE FROM name_leaderboard_polls WHERE name_key = leaderboard_key(OLD.name) AND poll_id = OLD.poll_id;
+        END IF;
+        UPDATE name_leaderboard
+        SET votes = votes - COALESCE(OLD.votes, 0), polls = polls - CASE WHEN remaining <= 0 THEN 1 ELSE 0 END
+        WHERE name_key = leaderboard_key(OLD.name);
+        DELETE FROM name_leaderboard WHERE name_key = leaderboard_key(OLD.name) AND polls <= 0;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO name_leaderboard_polls (name_key, poll_id, options)
+        VALUES (leaderboard_key(NEW.name), NEW.poll_id, 1)
+        ON CONFLICT (name_key, poll_id) DO UPDATE SET options = name_leaderboard_polls.options + 1
+        RETURNING options INTO listed;
+        INSERT INTO name_leaderboard (name_key, display_name, votes, polls)
+        VALUES (leaderboard_key(NEW.name), btrim(NEW.name), COALESCE(NEW.votes, 0), CASE WHEN listed = 1 THEN 1 ELSE 0 END)
+        ON CONFLICT (name_key) DO UPDATE
+        SET votes = name_leaderboard.votes + EXCLUDED.votes, polls = name_leaderboard.polls + EXCLUDED.polls;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+-- Recreating the trigger locks options, so no vote lands between the function swap and the backfill
+DROP TRIGGER IF EXISTS options_name_leaderboard ON options;
+CREATE TRIGGER options_name_leaderboard AFTER INSERT OR DELETE OR UPDATE OF name, votes ON options
+    FOR EACH ROW EXECUTE FUNCTION track_name_leaderboard();
+
+INSERT INTO name_leaderboard_polls (name_key, poll_id, options)
+SELECT leaderboard_key(name), poll_id, count(*)
+FROM options
+GROUP BY leaderboard_key(name), poll_id
+ON CONFLICT (name_key, poll_id) DO UPDATE SET options = EXCLUDED.options;
+
+UPDATE name_leaderboard l SET polls = c.polls
+FROM (SELECT leaderboard_key(name) AS name_key, count(DISTINCT poll_id) AS polls FROM options GROUP BY 1) c
+WHERE l.name_key = c.name_key;
+
+ALTER TABLE name_leaderboard_polls ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "Allow public access to name_leaderboard_polls" ON name_leaderboard_polls;
+CREATE POLICY "Allow public access to name_leaderboard_polls" ON name_leaderboard_polls FOR ALL TO public USING (true) WITH CHECK (true);
+
+DROP POLICY IF EXISTS "Allow public read access to name_leaderboard" ON name_leaderboard;
+DROP POLICY IF EXISTS "Allow public access to name_leaderboard" ON name_leaderboard;
+CREATE POLICY "Allow public access to name_leaderboard" ON name_leaderboard FOR ALL TO public USING (true) WITH CHECK (true);
@@ -0,0 +1,7 @@
+-- When a poll's participant sketch was last reset (see participants.py)
+--   polls.participants_reset_at   set whenever the poll's sketch row is deleted (clearing its votes,
+--                                 participants.py --rebuild --reset); workers compare it with the value
+--                                 their cached registers were read under and reload the sketch when
+--                                 it moved, instead of skipping adds against registers that are gone
+
+ALTER TABLE polls ADD COLUMN IF NOT EXISTS participants_reset_at TIMESTAMPTZ;
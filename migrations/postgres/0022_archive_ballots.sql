@@ -0,0 +1,77 @@
+-- Keep ballots in the archive: ballots cascade with their poll, so archiving an approval or
+-- ranked_choice poll lost them and, with them, its instant-runoff result
+--   archive_poll()   as in 0007, with the poll's ballots in the snapshot; GET /api/archive/<id>
+--                    tallies them again
+
+CREATE OR REPLACE FUNCTION archive_poll(p_poll_id BIGINT, p_force BOOLEAN DEFAULT FALSE)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    poll polls%ROWTYPE;
+    option_rows JSONB;
+    total INTEGER;
+    responses INTEGER;
+    final_results JSONB;
+    frozen TIMESTAMPTZ;
+BEGIN
+    SELECT * INTO poll FROM polls WHERE id = p_poll_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Poll % not found', p_poll_id USING ERRCODE = 'P0002';
+    END IF;
+    IF NOT p_force AND (poll.closes_at IS NULL OR poll.closes_at > NOW()) THEN
+        RAISE EXCEPTION 'Poll % has not closed yet', p_poll_id USING ERRCODE = '55000';
+    END IF;
+
+    SELECT COALESCE(jsonb_agg(jsonb_build_object('id', id, 'name', name, 'votes', votes) ORDER BY id), '[]'::jsonb),
+           COALESCE(SUM(votes), 0)
+    INTO option_rows, total
+    FROM options WHERE poll_id = p_poll_id;
+
+    SELECT COUNT(*) INTO responses FROM text_responses WHERE poll_id = p_poll_id;
+
+    -- The frozen snapshot if the poll has one, otherwise the same shape built from the live rows
+    SELECT r.results, r.frozen_at INTO final_results, frozen FROM poll_results r WHERE r.poll_id = p_poll_id;
+    IF final_results IS NULL THEN
+        frozen := NOW();
+        final_results := jsonb_build_object(
+            'pollId', poll.id,
+            'title', poll.title,
+            'poll_type', COALESCE(poll.poll_type, 'multiple_choice'),
+            'closedAt', poll.closes_at,
+            'totalVotes', total,
+            'options', option_rows
+        );
+        IF poll.poll_type = 'text_response' THEN
+            final_results := final_results || jsonb_build_object('responses', responses);
+        END IF;
+    END IF;
+
+    INSERT INTO poll_archive (poll_id, title, poll_type, created_at, closes_at, total_votes, response_count, snapshot)
+    VALUES (poll.id, poll.title, poll.poll_type, poll.created_at, poll.closes_at, total, responses, jsonb_build_object(
+        'poll', to_jsonb(poll) - 'revision',
+        'options', option_rows,
+        'results', final_results,
+        'frozen_at', frozen,
+        'votes', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object('id', id, 'option_id', option_id, 'username', username,
+                                                'created_at', created_at) ORDER BY id)
+            FROM votes WHERE poll_id = p_poll_id
+        ), '[]'::jsonb),
+        'text_responses', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object('id', id, 'username', username, 'response_text', response_text,
+                                                'created_at', created_at) ORDER BY id)
+            FROM text_responses WHERE poll_id = p_poll_id
+        ), '[]'::jsonb),
+        'ballots', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object('id', id, 'username', username, 'choices', choices,
+                                                'created_at', created_at) ORDER BY id)
+            FROM ballots WHERE poll_id = p_poll_id
+        ), '[]'::jsonb)
+    ));
+
+    DELETE FROM polls WHERE id = p_poll_id;
+
+    RETURN jsonb_build_object('poll_id', poll.id, 'total_votes', total, 'response_count', responses);
+END;
+$$;
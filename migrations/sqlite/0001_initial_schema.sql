@@ -0,0 +1,43 @@
+-- Local backend schema: polls, options, votes and text_responses in one step
+-- (the Postgres history splits these over 0001 and 0002)
+
+CREATE TABLE IF NOT EXISTS polls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title VARCHAR(255) NOT NULL,
+    description TEXT,
+    poll_type VARCHAR(50) DEFAULT 'multiple_choice',
+    opens_label VARCHAR(255) DEFAULT 'Opens today',
+    closes_label VARCHAR(255) DEFAULT 'Closes in 3 days',
+    created_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS options (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(255) NOT NULL,
+    votes INTEGER DEFAULT 0,
+    poll_id INTEGER NOT NULL REFERENCES polls(id) ON DELETE CASCADE,
+    created_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS votes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username VARCHAR(255) NOT NULL,
+    poll_id INTEGER NOT NULL REFERENCES polls(id) ON DELETE CASCADE,
+    option_id INTEGER NOT NULL REFERENCES options(id) ON DELETE CASCADE,
+    created_at TEXT,
+    UNIQUE(poll_id, username)
+);
+
+CREATE TABLE IF NOT EXISTS text_responses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    poll_id INTEGER NOT NULL REFERENCES polls(id) ON DELETE CASCADE,
+    username VARCHAR(255) NOT NULL,
+    response_text TEXT NOT NULL,
+    created_at TEXT,
+    UNIQUE(poll_id, username)
+);
+
+CREATE INDEX IF NOT EXISTS idx_options_poll_id ON options(poll_id);
+CREATE INDEX IF NOT EXISTS idx_votes_poll_id ON votes(poll_id);
+CREATE INDEX IF NOT EXISTS idx_votes_option_id ON votes(option_id);
+CREATE INDEX IF NOT EXISTS idx_votes_username ON votes(username);
@@ -0,0 +1,6 @@
+-- Composite indexes for the hot access patterns (see postgres/0004)
+
+CREATE INDEX IF NOT EXISTS idx_votes_poll_created ON votes(poll_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_text_responses_poll_created ON text_responses(poll_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_votes_created ON votes(created_at);
+DROP INDEX IF EXISTS idx_votes_poll_id;
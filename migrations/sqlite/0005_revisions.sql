@@ -0,0 +1,59 @@
+-- Monotonic revisions for delta sync (see postgres/0005)
+-- revision_counter plays the role of poll_revision_seq
+
+CREATE TABLE IF NOT EXISTS revision_counter (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO revision_counter (id, value) VALUES (1, 1);
+
+ALTER TABLE polls ADD COLUMN revision INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE options ADD COLUMN revision INTEGER NOT NULL DEFAULT 1;
+
+CREATE TABLE IF NOT EXISTS poll_tombstones (
+    poll_id INTEGER PRIMARY KEY,
+    revision INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_polls_revision ON polls(revision);
+CREATE INDEX IF NOT EXISTS idx_options_revision ON options(revision);
+CREATE INDEX IF NOT EXISTS idx_poll_tombstones_revision ON poll_tombstones(revision);
+
+CREATE TRIGGER IF NOT EXISTS polls_revision_insert AFTER INSERT ON polls
+BEGIN
+    UPDATE revision_counter SET value = value + 1 WHERE id = 1;
+    UPDATE polls SET revision = (SELECT value FROM revision_counter WHERE id = 1) WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS polls_revision_update
+AFTER UPDATE OF title, description, poll_type, opens_label, closes_label ON polls
+BEGIN
+    UPDATE revision_counter SET value = value + 1 WHERE id = 1;
+    UPDATE polls SET revision = (SELECT value FROM revision_counter WHERE id = 1) WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS options_revision_insert AFTER INSERT ON options
+BEGIN
+    UPDATE revision_counter SET value = value + 1 WHERE id = 1;
+    UPDATE options SET revision = (SELECT value FROM revision_counter WHERE id = 1) WHERE id = NEW.id;
+    UPDATE polls SET revision = (SELECT value FROM revision_counter WHERE id = 1) WHERE id = NEW.poll_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS options_revision_update AFTER UPDATE OF name, votes ON options
+BEGIN
+    UPDATE revision_counter SET value = value + 1 WHERE id = 1;
+    UPDATE options SET revision = (SELECT value FROM revision_counter WHERE id = 1) WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS options_revision_delete AFTER DELETE ON options
+BEGIN
+    UPDATE revision_counter SET value = value + 1 WHERE id = 1;
+    UPDATE polls SET revision = (SELECT value FROM revision_counter WHERE id = 1) WHERE id = OLD.poll_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS polls_tombstone AFTER DELETE ON polls
+BEGIN
+    UPDATE revision_counter SET value = value + 1 WHERE id = 1;
+    INSERT OR REPLACE INTO poll_tombstones (poll_id, revision)
+    VALUES (OLD.id, (SELECT value FROM revision_counter WHERE id = 1));
+END;
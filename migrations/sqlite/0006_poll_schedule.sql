@@ -0,0 +1,27 @@
+-- Real open/close times and frozen final results (see postgres/0006)
+
+ALTER TABLE polls ADD COLUMN opens_at TEXT;
+ALTER TABLE polls ADD COLUMN closes_at TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_polls_closes_at ON polls(closes_at) WHERE closes_at IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS poll_results (
+    poll_id INTEGER PRIMARY KEY REFERENCES polls(id) ON DELETE CASCADE,
+    closed_at TEXT NOT NULL,
+    results JSON NOT NULL,
+    frozen_at TEXT
+);
+
+CREATE TRIGGER IF NOT EXISTS poll_results_immutable BEFORE UPDATE ON poll_results
+BEGIN
+    SELECT RAISE(ABORT, 'poll_results rows are immutable');
+END;
+
+-- Schedule changes are metadata changes too
+DROP TRIGGER IF EXISTS polls_revision_update;
+CREATE TRIGGER polls_revision_update
+AFTER UPDATE OF title, description, poll_type, opens_label, closes_label, opens_at, closes_at ON polls
+BEGIN
+    UPDATE revision_counter SET value = value + 1 WHERE id = 1;
+    UPDATE polls SET revision = (SELECT value FROM revision_counter WHERE id = 1) WHERE id = NEW.id;
+END;
@@ -0,0 +1,16 @@
+-- Archive tier (see postgres/0007); LocalClient._rpc_archive_poll plays the role of archive_poll()
+-- snapshot is zlib-compressed JSON, declared JSONZ so it comes back parsed
+
+CREATE TABLE IF NOT EXISTS poll_archive (
+    poll_id INTEGER PRIMARY KEY,
+    title VARCHAR(255) NOT NULL,
+    poll_type VARCHAR(50),
+    created_at TEXT,
+    closes_at TEXT,
+    total_votes INTEGER NOT NULL DEFAULT 0,
+    response_count INTEGER NOT NULL DEFAULT 0,
+    archived_at TEXT NOT NULL,
+    snapshot JSONZ NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_poll_archive_archived_at ON poll_archive(archived_at);
@@ -0,0 +1,29 @@
+-- Full-text search for text responses (see postgres/0008): an external-content FTS5 index
+-- kept in sync by triggers; LocalClient.text_search() queries it
+
+CREATE VIRTUAL TABLE IF NOT EXISTS text_responses_fts USING fts5(
+    response_text,
+    content='text_responses',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 0'
+);
+
+INSERT INTO text_responses_fts (text_responses_fts) VALUES ('rebuild');
+
+CREATE TRIGGER IF NOT EXISTS text_responses_fts_insert AFTER INSERT ON text_responses
+BEGIN
+    INSERT INTO text_responses_fts (rowid, response_text) VALUES (NEW.id, NEW.response_text);
+END;
+
+CREATE TRIGGER IF NOT EXISTS text_responses_fts_delete AFTER DELETE ON text_responses
+BEGIN
+    INSERT INTO text_responses_fts (text_responses_fts, rowid, response_text) VALUES ('delete', OLD.id, OLD.response_text);
+END;
+
+CREATE TRIGGER IF NOT EXISTS text_responses_fts_update AFTER UPDATE OF response_text ON text_responses
+BEGIN
+    INSERT INTO text_responses_fts (text_responses_fts, rowid, response_text) VALUES ('delete', OLD.id, OLD.response_text);
+    INSERT INTO text_responses_fts (rowid, response_text) VALUES (NEW.id, NEW.response_text);
+END;
+
+CREATE INDEX IF NOT EXISTS idx_text_responses_poll_id_id ON text_responses(poll_id, id);
@@ -0,0 +1,12 @@
+-- Word and bigram counts per text_response poll (see postgres/0009);
+-- LocalClient._rpc_add_text_response plays the role of add_text_response()
+
+CREATE TABLE IF NOT EXISTS text_response_terms (
+    poll_id INTEGER NOT NULL REFERENCES polls(id) ON DELETE CASCADE,
+    kind VARCHAR(10) NOT NULL CHECK (kind IN ('word', 'bigram')),
+    term TEXT NOT NULL,
+    responses INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (poll_id, kind, term)
+);
+
+CREATE INDEX IF NOT EXISTS idx_text_response_terms_top ON text_response_terms(poll_id, kind, responses DESC);
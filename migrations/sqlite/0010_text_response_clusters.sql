@@ -0,0 +1,35 @@
+-- Near-duplicate clusters of text responses (see postgres/0010);
+-- LocalClient._rpc_assign_text_cluster plays the role of assign_text_cluster()
+
+CREATE TABLE IF NOT EXISTS text_response_clusters (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    poll_id INTEGER NOT NULL REFERENCES polls(id) ON DELETE CASCADE,
+    label TEXT NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_text_response_clusters_top ON text_response_clusters(poll_id, size DESC);
+
+CREATE TABLE IF NOT EXISTS text_response_minhash (
+    response_id INTEGER PRIMARY KEY REFERENCES text_responses(id) ON DELETE CASCADE,
+    poll_id INTEGER NOT NULL REFERENCES polls(id) ON DELETE CASCADE,
+    cluster_id INTEGER NOT NULL REFERENCES text_response_clusters(id) ON DELETE CASCADE,
+    signature JSON NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_text_response_minhash_cluster ON text_response_minhash(cluster_id);
+
+CREATE TABLE IF NOT EXISTS text_response_buckets (
+    poll_id INTEGER NOT NULL REFERENCES polls(id) ON DELETE CASCADE,
+    bucket INTEGER NOT NULL,
+    response_id INTEGER NOT NULL REFERENCES text_responses(id) ON DELETE CASCADE,
+    PRIMARY KEY (poll_id, bucket, response_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_text_response_buckets_response ON text_response_buckets(response_id);
+
+CREATE TRIGGER IF NOT EXISTS text_response_minhash_shrink AFTER DELETE ON text_response_minhash
+BEGIN
+    UPDATE text_response_clusters SET size = size - 1 WHERE id = OLD.cluster_id;
+END;
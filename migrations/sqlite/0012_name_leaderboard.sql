@@ -0,0 +1,50 @@
+-- Votes per nominee across polls (see postgres/0012)
+-- The key is lower(trim(name)): unlike leaderboard_key() it does not collapse inner
+-- whitespace, and SQLite's lower() only folds ASCII letters
+
+CREATE TABLE IF NOT EXISTS name_leaderboard (
+    name_key TEXT PRIMARY KEY,
+    display_name TEXT NOT NULL,
+    votes INTEGER NOT NULL DEFAULT 0,
+    polls INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_name_leaderboard_votes ON name_leaderboard(votes DESC, name_key);
+
+CREATE TRIGGER IF NOT EXISTS options_leaderboard_insert AFTER INSERT ON options
+BEGIN
+    INSERT INTO name_leaderboard (name_key, display_name, votes, polls)
+    VALUES (lower(trim(NEW.name)), trim(NEW.name), COALESCE(NEW.votes, 0), 1)
+    ON CONFLICT (name_key) DO UPDATE SET votes = votes + excluded.votes, polls = polls + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS options_leaderboard_vote AFTER UPDATE OF votes ON options
+WHEN lower(trim(NEW.name)) = lower(trim(OLD.name))
+BEGIN
+    UPDATE name_leaderboard SET votes = votes + COALESCE(NEW.votes, 0) - COALESCE(OLD.votes, 0)
+    WHERE name_key = lower(trim(NEW.name));
+END;
+
+CREATE TRIGGER IF NOT EXISTS options_leaderboard_rename AFTER UPDATE OF name ON options
+WHEN lower(trim(NEW.name)) != lower(trim(OLD.name))
+BEGIN
+    UPDATE name_leaderboard SET votes = votes - COALESCE(OLD.votes, 0), polls = polls - 1
+    WHERE name_key = lower(trim(OLD.name));
+    DELETE FROM name_leaderboard WHERE name_key = lower(trim(OLD.name)) AND polls <= 0;
+    INSERT INTO name_leaderboard (name_key, display_name, votes, polls)
+    VALUES (lower(trim(NEW.name)), trim(NEW.name), COALESCE(NEW.votes, 0), 1)
+    ON CONFLICT (name_key) DO UPDATE SET votes = votes + excluded.votes, polls = polls + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS options_leaderboard_delete AFTER DELETE ON options
+BEGIN
+    UPDATE name_leaderboard SET votes = votes - COALESCE(OLD.votes, 0), polls = polls - 1
+    WHERE name_key = lower(trim(OLD.name));
+    DELETE FROM name_leaderboard WHERE name_key = lower(trim(OLD.name)) AND polls <= 0;
+END;
+
+INSERT INTO name_leaderboard (name_key, display_name, votes, polls)
+SELECT lower(trim(name)), min(trim(name)), sum(COALESCE(votes, 0)), count(*)
+FROM options WHERE true
+GROUP BY lower(trim(name))
+ON CONFLICT (name_key) DO UPDATE SET votes = excluded.votes, polls = excluded.polls;
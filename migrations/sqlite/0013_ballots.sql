@@ -0,0 +1,13 @@
+-- Ballots of approval and ranked_choice polls (see postgres/0013);
+-- LocalClient._rpc_cast_ballot and _rpc_ballot_counts play the role of the functions
+
+CREATE TABLE IF NOT EXISTS ballots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    poll_id INTEGER NOT NULL REFERENCES polls(id) ON DELETE CASCADE,
+    username VARCHAR(255) NOT NULL,
+    choices JSON NOT NULL,
+    created_at TEXT,
+    UNIQUE (poll_id, username)
+);
+
+CREATE INDEX IF NOT EXISTS idx_ballots_poll_id_id ON ballots(poll_id, id);
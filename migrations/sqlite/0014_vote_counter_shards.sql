@@ -0,0 +1,12 @@
+-- Sharded vote counters (see postgres/0014); LocalClient._rpc_increment_vote_shard and
+-- _rpc_compact_vote_shards play the role of the functions
+
+CREATE TABLE IF NOT EXISTS option_vote_shards (
+    option_id INTEGER NOT NULL REFERENCES options(id) ON DELETE CASCADE,
+    shard INTEGER NOT NULL,
+    poll_id INTEGER NOT NULL REFERENCES polls(id) ON DELETE CASCADE,
+    votes INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (option_id, shard)
+);
+
+CREATE INDEX IF NOT EXISTS idx_option_vote_shards_poll_id ON option_vote_shards(poll_id);
@@ -0,0 +1,8 @@
+-- HyperLogLog sketches of distinct participants (see postgres/0015);
+-- LocalClient._rpc_add_to_sketches and _rpc_merge_sketch play the role of the functions
+
+CREATE TABLE IF NOT EXISTS participant_sketches (
+    scope TEXT PRIMARY KEY,
+    registers BLOB NOT NULL,
+    updated_at TEXT
+);
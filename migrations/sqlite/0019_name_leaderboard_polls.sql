@@ -0,0 +1,63 @@
+-- Count each poll once per name on the leaderboard (see postgres/0019)
+
+CREATE TABLE IF NOT EXISTS name_leaderboard_polls (
+    name_key TEXT NOT NULL,
+    poll_id INTEGER NOT NULL,
+    options INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (name_key, poll_id)
+);
+
+DROP TRIGGER IF EXISTS options_leaderboard_insert;
+DROP TRIGGER IF EXISTS options_leaderboard_rename;
+DROP TRIGGER IF EXISTS options_leaderboard_delete;
+
+CREATE TRIGGER options_leaderboard_insert AFTER INSERT ON options
+BEGIN
+    INSERT INTO name_leaderboard_polls (name_key, poll_id, options)
+    VALUES (lower(trim(NEW.name)), NEW.poll_id, 1)
+    ON CONFLICT (name_key, poll_id) DO UPDATE SET options = options + 1;
+    INSERT INTO name_leaderboard (name_key, display_name, votes, polls)
+    VALUES (lower(trim(NEW.name)), trim(NEW.name), COALESCE(NEW.votes, 0),
+            (SELECT options = 1 FROM name_leaderboard_polls WHERE name_key = lower(trim(NEW.name)) AND poll_id = NEW.poll_id))
+    ON CONFLICT (name_key) DO UPDATE SET votes = votes + excluded.votes, polls = polls + excluded.polls;
+END;
+
+CREATE TRIGGER options_leaderboard_rename AFTER UPDATE OF name ON options
+WHEN lower(trim(NEW.name)) != lower(trim(OLD.name))
+BEGIN
+    UPDATE name_leaderboard_polls SET options = options - 1
+    WHERE name_key = lower(trim(OLD.name)) AND poll_id = OLD.poll_id;
+    UPDATE name_leaderboard SET votes = votes - COALESCE(OLD.votes, 0), polls = polls - EXISTS (
+        SELECT 1 FROM name_leaderboard_polls WHERE name_key = lower(trim(OLD.name)) AND poll_id = OLD.poll_id AND options <= 0)
+    WHERE name_key = lower(trim(OLD.name));
+    DELETE FROM name_leaderboard_polls WHERE name_key = lower(trim(OLD.name)) AND poll_id = OLD.poll_id AND options <= 0;
+    DELETE FROM name_leaderboard WHERE name_key = lower(trim(OLD.name)) AND polls <= 0;
+
+    INSERT INTO name_leaderboard_polls (name_key, poll_id, options)
+    VALUES (lower(trim(NEW.name)), NEW.poll_id, 1)
+    ON CONFLICT (name_key, poll_id) DO UPDATE SET options = options + 1;
+    INSERT INTO name_leaderboard (name_key, display_name, votes, polls)
+    VALUES (lower(trim(NEW.name)), trim(NEW.name), COALESCE(NEW.votes, 0),
+            (SELECT options = 1 FROM name_leaderboard_polls WHERE name_key = lower(trim(NEW.name)) AND poll_id = NEW.poll_id))
+    ON CONFLICT (name_key) DO UPDATE SET votes = votes + excluded.votes, polls = polls + excluded.polls;
+END;
+
+CREATE TRIGGER options_leaderboard_delete AFTER DELETE ON options
+BEGIN
+    UPDATE name_leaderboard_polls SET options = options - 1
+    WHERE name_key = lower(trim(OLD.name)) AND poll_id = OLD.poll_id;
+    UPDATE name_leaderboard SET votes = votes - COALESCE(OLD.votes, 0), polls = polls - EXISTS (
+        SELECT 1 FROM name_leaderboard_polls WHERE name_key = lower(trim(OLD.name)) AND poll_id = OLD.poll_id AND options <= 0)
+    WHERE name_key = lower(trim(OLD.name));
+    DELETE FROM name_leaderboard_polls WHERE name_key = lower(trim(OLD.name)) AND poll_id = OLD.poll_id AND options <= 0;
+    DELETE FROM name_leaderboard WHERE name_key = lower(trim(OLD.name)) AND polls <= 0;
+END;
+
+INSERT INTO name_leaderboard_polls (name_key, poll_id, options)
+SELECT lower(trim(name)), poll_id, count(*)
+FROM options WHERE true
+GROUP BY lower(trim(name)), poll_id
+ON CONFLICT (name_key, poll_id) DO UPDATE SET options = excluded.options;
+
+UPDATE name_leaderboard SET polls = (
+    SELECT count(DISTINCT poll_id) FROM options WHERE lower(trim(options.name)) = name_leaderboard.name_key);
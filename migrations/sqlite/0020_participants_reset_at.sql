@@ -0,0 +1,3 @@
+-- When a poll's participant sketch was last reset (see postgres/0020)
+
+ALTER TABLE polls ADD COLUMN participants_reset_at TEXT;
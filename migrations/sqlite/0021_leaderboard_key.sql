@@ -0,0 +1,71 @@
+-- Match leaderboard names as Postgres does (see postgres/0012)
+-- lower(trim(name)) did not collapse inner whitespace, so "Ann  Lee" and "Ann Lee" were two names.
+-- leaderboard_key() is migrate.leaderboard_key, registered on the connection by migrate.SQLiteDriver.
+-- The keys change, so the board is rebuilt from options.
+
+DROP TRIGGER IF EXISTS options_leaderboard_insert;
+DROP TRIGGER IF EXISTS options_leaderboard_vote;
+DROP TRIGGER IF EXISTS options_leaderboard_rename;
+DROP TRIGGER IF EXISTS options_leaderboard_delete;
+
+CREATE TRIGGER options_leaderboard_insert AFTER INSERT ON options
+BEGIN
+    INSERT INTO name_leaderboard_polls (name_key, poll_id, options)
+    VALUES (leaderboard_key(NEW.name), NEW.poll_id, 1)
+    ON CONFLICT (name_key, poll_id) DO UPDATE SET options = options + 1;
+    INSERT INTO name_leaderboard (name_key, display_name, votes, polls)
+    VALUES (leaderboard_key(NEW.name), trim(NEW.name), COALESCE(NEW.votes, 0),
+            (SELECT options = 1 FROM name_leaderboard_polls WHERE name_key = leaderboard_key(NEW.name) AND poll_id = NEW.poll_id))
+    ON CONFLICT (name_key) DO UPDATE SET votes = votes + excluded.votes, polls = polls + excluded.polls;
+END;
+
+CREATE TRIGGER options_leaderboard_vote AFTER UPDATE OF votes ON options
+WHEN leaderboard_key(NEW.name) = leaderboard_key(OLD.name)
+BEGIN
+    UPDATE name_leaderboard SET votes = votes + COALESCE(NEW.votes, 0) - COALESCE(OLD.votes, 0)
+    WHERE name_key = leaderboard_key(NEW.name);
+END;
+
+CREATE TRIGGER options_leaderboard_rename AFTER UPDATE OF name ON options
+WHEN leaderboard_key(NEW.name) != leaderboard_key(OLD.name)
+BEGIN
+    UPDATE name_leaderboard_polls SET options = options - 1
+    WHERE name_key = leaderboard_key(OLD.name) AND poll_id = OLD.poll_id;
+    UPDATE name_leaderboard SET votes = votes - COALESCE(OLD.votes, 0), polls = polls - EXISTS (
+        SELECT 1 FROM name_leaderboard_polls WHERE name_key = leaderboard_key(OLD.name) AND poll_id = OLD.poll_id AND options <= 0)
+    WHERE name_key = leaderboard_key(OLD.name);
+    DELETE FROM name_leaderboard_polls WHERE name_key = leaderboard_key(OLD.name) AND poll_id = OLD.poll_id AND options <= 0;
+    DELETE FROM name_leaderboard WHERE name_key = leaderboard_key(OLD.name) AND polls <= 0;
+
+    INSERT INTO name_leaderboard_polls (name_key, poll_id, options)
+    VALUES (leaderboard_key(NEW.name), NEW.poll_id, 1)
+    ON CONFLICT (name_key, poll_id) DO UPDATE SET options = options + 1;
+    INSERT INTO name_leaderboard (name_key, display_name, votes, polls)
+    VALUES (leaderboard_key(NEW.name), trim(NEW.name), COALESCE(NEW.votes, 0),
+            (SELECT options = 1 FROM name_leaderboard_polls WHERE name_key = leaderboard_key(NEW.name) AND poll_id = NEW.poll_id))
+    ON CONFLICT (name_key) DO UPDATE SET votes = votes + excluded.votes, polls = polls + excluded.polls;
+END;
+
+CREATE TRIGGER options_leaderboard_delete AFTER DELETE ON options
+BEGIN
+    UPDATE name_leaderboard_polls SET options = options - 1
+    WHERE name_key = leaderboard_key(OLD.name) AND poll_id = OLD.poll_id;
+    UPDATE name_leaderboard SET votes = votes - COALESCE(OLD.votes, 0), polls = polls - EXISTS (
+        SELECT 1 FROM name_leaderboard_polls WHERE name_key = leaderboard_key(OLD.name) AND poll_id = OLD.poll_id AND options <= 0)
+    WHERE name_key = leaderboard_key(OLD.name);
+    DELETE FROM name_leaderboard_polls WHERE name_key = leaderboard_key(OLD.name) AND poll_id = OLD.poll_id AND options <= 0;
+    DELETE FROM name_leaderboard WHERE name_key = leaderboard_key(OLD.name) AND polls <= 0;
+END;
+
+DELETE FROM name_leaderboard_polls;
+DELETE FROM name_leaderboard;
+
+INSERT INTO name_leaderboard_polls (name_key, poll_id, options)
+SELECT leaderboard_key(name), poll_id, count(*)
+FROM options
+GROUP BY leaderboard_key(name), poll_id;
+
+INSERT INTO name_leaderboard (name_key, display_name, votes, polls)
+SELECT leaderboard_key(name), min(trim(name)), sum(COALESCE(votes, 0)), count(DISTINCT poll_id)
+FROM options
+GROUP BY leaderboard_key(name);
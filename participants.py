@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Approximate distinct participants, for the whole event and per poll, from
+HyperLogLog sketches.
+
+A participant is a username that voted, cast a ballot or sent a text
+response. Each username hashes to one of REGISTERS registers, and that
+register keeps the highest "rank" (leading zeros + 1 of the rest of the hash)
+seen so far. That is enough to estimate how many distinct usernames went
+through, with a standard error of 1.04 / sqrt(REGISTERS) (1.6% at
+PRECISION 12), in REGISTERS bytes per sketch however many people take part.
+
+Sketches live in participant_sketches, one row per scope: 'all' for the
+event, 'poll:<id>' per poll (migrations/postgres/0015). Registers are only
+ever raised, to the maximum of what they hold and what arrives, so sketches
+from any number of gunicorn workers merge in any order. Every worker keeps
+the registers it has seen and skips the database when a username cannot
+raise them, which is the case for almost every write once a sketch has
+filled in.
+
+A poll's sketch starts over when its votes are cleared: the row is deleted
+and polls.participants_reset_at stamped (migrations/postgres/0020). Callers
+pass that stamp along from the poll row they already read, and a worker whose
+registers were loaded under another stamp reloads them rather than skipping
+adds against registers that no longer exist.
+
+GET /api/participants and /api/polls/<id>/participants read one row and
+estimate from it, whatever the number of votes.
+
+Participation recorded without the API (imports, seeding scripts) or
+before this module existed is not counted; rebuild from the stored rows:
+    python participants.py --rebuild                   # local backend
+    python participants.py --backend supabase --poll 12
+"""
+
+import argparse
+import hashlib
+import math
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+PRECISION = 12
+REGISTERS = 1 << PRECISION
+STANDARD_ERROR = 1.04 / math.sqrt(REGISTERS)
+EVENT_SCOPE = 'all'
+CACHE_SECONDS = 30.0     # how long a worker trusts its copy of the event sketch (polls follow their reset stamp)
+PAGE_SIZE = 1000         # PostgREST's default max rows per request
+SOURCES = ('votes', 'ballots', 'text_responses')
+
+_RANK_BITS = 64 - PRECISION
+_ALPHA = 0.7213 / (1 + 1.079 / REGISTERS)
+
+
+def poll_scope(poll_id):
+    return f'poll:{poll_id}'
+
+
+def position(username):
+    """(register, rank) of a username: the first PRECISION bits of its hash pick the register"""
+    x = int.from_bytes(hashlib.blake2b(username.encode('utf-8'), digest_size=8).digest(), 'big')
+    return x >> _RANK_BITS, _RANK_BITS - (x & ((1 << _RANK_BITS) - 1)).bit_length() + 1
+
+
+def estimate(registers):
+    """Distinct usernames behind a sketch (bytes of REGISTERS registers)"""
+    m = len(registers)
+    # bytes.count per rank beats a Python loop over every register
+    z = sum(registers.count(rank) * 2.0 ** -rank for rank in range(_RANK_BITS + 2))
+    raw = _ALPHA * m * m / z
+    zeros = registers.count(0)
+    if raw <= 2.5 * m and zeros:
+        return m * math.log(m / zeros)  # linear counting: far more accurate while registers are still empty
+    return raw
+
+
+def summary(registers):
+    """Estimate with bounds of two standard errors (about 95% of the time the true count is inside)"""
+    value = estimate(registers)
+    return {
+        'estimate': round(value),
+        'standardError': round(STANDARD_ERROR, 4),
+        'low': math.floor(value * (1 - 2 * STANDARD_ERROR)),
+        'high': math.ceil(value * (1 + 2 * STANDARD_ERROR)),
+        'confidence': 0.95,
+    }
+
+
+def decode(value):
+    """Registers as bytes from a BYTEA column (PostgREST sends '\\x<hex>') or a BLOB"""
+    if value is None:
+        return bytes(REGISTERS)
+    if isinstance(value, str):
+        return bytes.fromhex(value[2:] if value.startswith('\\x') else value)
+    return bytes(value)
+
+
+def read(client, scopes):
+    """{scope: registers} of the stored sketches among scopes"""
+    rows = client.table('participant_sketches').select('scope, registers').in_('scope', list(scopes)).execute().data
+    return {r['scope']: decode(r['registers']) for r in rows}
+
+
+def counts(client, scope=EVENT_SCOPE):
+    """summary() of one stored sketch (an empty one when nothing was recorded yet)"""
+    return summary(read(client, [scope]).get(scope, bytes(REGISTERS)))
+
+
+def merge(client, scope, registers):
+    """Raise a stored sketch to the register-wise maximum with registers"""
+    client.rpc('merge_sketch', {'p_scope': scope, 'p_registers': '\\x' + bytes(registers).hex()}).execute()
+
+
+def reset_polls(client, poll_ids):
+    """Delete the sketches of polls and stamp participants_reset_at, so every worker reloads them"""
+    if not poll_ids:
+        return
+    client.table('participant_sketches').delete().in_('scope', [poll_scope(p) for p in poll_ids]).execute()
+    client.table('polls').update({'participants_reset_at': datetime.now(timezone.utc).isoformat()}) \
+        .in_('id', list(poll_ids)).execute()
+
+
+class Sketches:
+    """One worker's writer: adds participants, only calling the database when a register goes up"""
+
+    def __init__(self, client, cache_seconds=CACHE_SECONDS):
+        self.client = client
+        self.cache_seconds = cache_seconds
+        self.cache = {}  # scope -> (loaded at, reset stamp, bytearray of registers)
+        self.lock = threading.Lock()
+
+    def _stale(self, scope, stamps, now):
+        entry = self.cache.get(scope)
+        if entry is None:
+            return True
+        if scope in stamps:
+            return entry[1] != stamps[scope]
+        return now - entry[0] > self.cache_seconds
+
+    def _registers(self, scopes, stamps):
+        now = time.monotonic()
+        with self.lock:
+            missing = [s for s in scopes if self._stale(s, stamps, now)]
+        if missing:
+            stored = read(self.client, missing)
+            with self.lock:
+                for scope in missing:
+                    self.cache[scope] = (now, stamps.get(scope), bytearray(stored.get(scope, bytes(REGISTERS))))
+        with self.lock:
+            return {s: self.cache[s][2] for s in scopes}
+
+    def add(self, poll_id, username, reset_at=None):
+        """
+        Count a participant of a poll (and so of the event); reset_at is the poll's
+        participants_reset_at. Returns whether a sketch changed.
+        """
+        register, rank = position(username)
+        cached = self._registers([EVENT_SCOPE, poll_scope(poll_id)], {poll_scope(poll_id): reset_at})
+        raise_scopes = [scope for scope, registers in cached.items() if registers[register] < rank]
+        if not raise_scopes:
+            return False
+        self.client.rpc('add_to_sketches', {
+            'p_scopes': raise_scopes, 'p_index': register, 'p_rank': rank, 'p_size': REGISTERS,
+        }).execute()
+        with self.lock:
+            for scope in raise_scopes:
+                cached[scope][register] = max(cached[scope][register], rank)
+        return True
+
+    def forget(self, poll_id):
+        """Drop this worker's copy of a poll's sketch (after the stored one was deleted)"""
+        with self.lock:
+            self.cache.pop(poll_scope(poll_id), None)
+
+
+def rebuild(client, poll_ids=None, reset=False):
+    """
+    Sketch every stored participant from votes, ballots and text_responses and merge the
+    sketches in (or replace them with reset). Returns {scope: registers}.
+    """
+    sketches = {}
+    for table in SOURCES:
+        cursor = 0
+        while True:
+            query = client.table(table).select('id, poll_id, username').gt('id', cursor)
+            if poll_ids:
+                query = query.in_('poll_id', poll_ids)
+            rows = query.order('id').limit(PAGE_SIZE).execute().data
+            for r in rows:
+                register, rank = position(r['username'])
+                for scope in (EVENT_SCOPE, poll_scope(r['poll_id'])):
+                    registers = sketches.setdefault(scope, bytearray(REGISTERS))
+                    registers[register] = max(registers[register], rank)
+            if len(rows) < PAGE_SIZE:
+                break
+            cursor = rows[-1]['id']
+
+    if poll_ids:
+        # The event sketch of a partial rebuild is only merged: it misses the other polls
+        targets = [poll_scope(p) for p in poll_ids]
+        for scope in targets:
+            sketches.setdefault(scope, bytearray(REGISTERS))
+    else:
+        targets = list(sketches)
+    if reset:
+        if EVENT_SCOPE in targets:
+            client.table('participant_sketches').delete().eq('scope', EVENT_SCOPE).execute()
+        reset_polls(client, [int(scope.split(':', 1)[1]) for scope in targets if scope != EVENT_SCOPE])
+    for scope, registers in sketches.items():
+        merge(client, scope, registers)
+    return sketches
+
+
+def main():
+    from generate_dataset import get_client
+
+    parser = argparse.ArgumentParser(description='Approximate distinct participants from HyperLogLog sketches')
+    parser.add_argument('--poll', type=int, action='append', help='Poll ID (repeatable; default: the whole event)')
+    parser.add_argument('--rebuild', action='store_true', help='Sketch the stored votes, ballots and text responses')
+    parser.add_argument('--reset', action='store_true', help='With --rebuild: replace the sketches instead of merging')
+    parser.add_argument('--backend', choices=['local', 'supabase'], default='local')
+    parser.add_argument('--db', default=os.getenv('LOCAL_DB_PATH', 'polls.db'), help='SQLite file for the local backend')
+    args = parser.parse_args()
+
+    client = get_client(args.backend, args.db)
+    if args.rebuild:
+        t0 = time.perf_counter()
+        sketches = rebuild(client, args.poll, reset=args.reset)
+        print(f'✅ Rebuilt {len(sketches)} sketch(es) in {time.perf_counter() - t0:.3f}s')
+
+    scopes = [poll_scope(p) for p in args.poll] if args.poll else [EVENT_SCOPE]
+    stored = read(client, scopes)
+    for scope in scopes:
+        s = summary(stored.get(scope, bytes(REGISTERS)))
+        label = 'Event' if scope == EVENT_SCOPE else f"Poll #{scope.split(':')[1]}"
+        print(f"   • {label}: ~{s['estimate']} participants ({s['low']}–{s['high']}, ±{s['standardError']:.1%})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
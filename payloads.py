@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Fast JSON encoding and negotiated compression for API responses.
+
+init_app() swaps Flask's JSON provider for orjson (when installed) and
+compresses JSON responses larger than COMPRESS_MIN_SIZE bytes with brotli or
+gzip, whichever the client prefers. Hot cached responses are kept as a
+Payload: the body is encoded and compressed once when the cache is filled,
+so a cache hit only picks the variant the client accepts.
+
+Payload responses also honour Accept: application/msgpack and
+?layout=columnar (see wire_format.py); each representation is built the
+first time it is asked for and then reused like the JSON one.
+
+orjson, brotli and msgpack are optional; without them the stdlib json
+encoder, gzip-only compression and JSON-only responses are used.
+"""
+
+import gzip
+import json
+import os
+
+from flask import Response, request
+from flask.json.provider import DefaultJSONProvider
+
+import wire_format
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_COMPRESS_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+# Cached payloads are compressed once, so they can afford a better ratio than per-request ones
+CACHED_LEVELS = {'br': 9, 'gzip': 9}
+DYNAMIC_LEVELS = {'br': 4, 'gzip': 5}
+ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+
+
+def _default(obj):
+    return DefaultJSONProvider.default(obj)
+
+
+def dumps(obj):
+    """Encode obj as compact JSON bytes"""
+    return wire_format.dumps(obj, default=_default)
+
+
+def compress(body, encoding, levels=DYNAMIC_LEVELS):
+    if encoding == 'br':
+        return brotli.compress(body, quality=levels['br'])
+    return gzip.compress(body, compresslevel=levels['gzip'], mtime=0)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """jsonify() that writes orjson bytes straight into the response"""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s) if orjson is not None else json.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
+
+
+class Payload:
+    """
+    A response object encoded once per representation. The JSON body and its
+    compressed variants are built up front; MessagePack and columnar
+    representations are built on first request and kept.
+    """
+
+    __slots__ = ('obj', 'levels', 'representations')
+
+    def __init__(self, obj, levels=CACHED_LEVELS, eager=True):
+        self.obj = obj
+        self.levels = levels
+        self.representations = {}  # (mimetype, layout) -> {content encoding: body}
+        if eager:
+            self.variants()
+
+    def variants(self, mimetype=wire_format.JSON, layout='rows'):
+        key = (mimetype, layout)
+        variants = self.representations.get(key)
+        if variants is None:
+            body = wire_format.encode(self.obj, mimetype, layout, default=_default)
+            variants = {'identity': body}
+            if len(body) >= MIN_COMPRESS_SIZE:
+                for encoding in ENCODINGS:
+                    variants[encoding] = compress(body, encoding, self.levels)
+            self.representations[key] = variants
+        return variants
+
+    def response(self, status=200):
+        mimetype, layout = negotiate_format()
+        variants = self.variants(mimetype, layout)
+        encoding = negotiate(variants)
+        response = Response(variants[encoding], status=status, mimetype=mimetype)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept')
+        response.vary.add('Accept-Encoding')
+        return response
+
+
+def respond(obj, status=200):
+    """Negotiated response for a body that is not cached (built for this request only)"""
+    return Payload(obj, DYNAMIC_LEVELS, eager=False).response(status)
+
+
+def negotiate_format():
+    """(mimetype, layout) for the current request: Accept header plus ?layout="""
+    mimetype = request.accept_mimetypes.best_match(wire_format.offered_mimetypes(), default=wire_format.JSON)
+    layout = request.args.get('layout', 'rows')
+    return mimetype, layout if layout in wire_format.LAYOUTS else 'rows'
+
+
+def negotiate(available):
+    """Best encoding in `available` that the current request accepts"""
+    offered = [e for e in ENCODINGS if e in available]
+    if not offered:
+        return 'identity'
+    best = request.accept_encodings.best_match(offered)
+    return best or 'identity'
+
+
+def compress_response(response):
+    """after_request hook: compress large JSON bodies built per request"""
+    if (response.mimetype != 'application/json' or response.direct_passthrough
+            or 'Content-Encoding' in response.headers or response.status_code < 200
+            or response.status_code in (204, 304)):
+        return response
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    if len(body) < MIN_COMPRESS_SIZE:
+        return response
+    encoding = negotiate(ENCODINGS)
+    if encoding != 'identity':
+        response.set_data(compress(body, encoding))
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_app(app):
+    app.json = OrjsonProvider(app)
+    app.after_request(compress_response)
@@ -0,0 +1,37 @@
+"""
+Poll schedule helpers shared by app.py and bulk_import.py: opens_at / closes_at
+are optional; NULL means no limit.
+"""
+
+from datetime import datetime, timezone
+
+
+def parse_timestamp(value):
+    """ISO-8601 string or datetime -> aware UTC datetime (naive values are taken as UTC)"""
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def format_timestamp(value):
+    parsed = parse_timestamp(value)
+    return parsed.isoformat() if parsed else None
+
+
+def parse_schedule(payload):
+    """Read opens_at / closes_at from a create, update or import payload; raises ValueError"""
+    schedule = {}
+    for column in ('opens_at', 'closes_at'):
+        if column in payload:
+            try:
+                schedule[column] = format_timestamp(payload[column])
+            except (TypeError, ValueError):
+                raise ValueError(f'{column} must be an ISO-8601 timestamp')
+    opens_at, closes_at = parse_timestamp(schedule.get('opens_at')), parse_timestamp(schedule.get('closes_at'))
+    if opens_at and closes_at and closes_at <= opens_at:
+        raise ValueError('closes_at must be after opens_at')
+    return schedule
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Python client for the polls API that asks for the compact wire formats
+(MessagePack when installed, columnar layout) and decodes them back to the
+same dicts the JSON API returns. Meant for result screens and scripts that
+poll tallies every second or two.
+
+    from polls_client import PollsClient
+    client = PollsClient('https://piscine-polls.onrender.com')
+    polls = client.polls(summary=1)
+    update = client.wait(poll_id, version=polls['revision'], timeout=25)
+
+Usage:
+    python polls_client.py http://localhost:5000 --summary
+"""
+
+import argparse
+import gzip
+import json
+import sys
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import wire_format
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class PollsAPIError(Exception):
+    def __init__(self, status, body):
+        super().__init__(f'HTTP {status}: {body}')
+        self.status = status
+        self.body = body
+
+
+class PollsClient:
+    def __init__(self, base_url, mimetype=None, layout='columnar', timeout=60):
+        self.base_url = base_url.rstrip('/')
+        self.mimetype = mimetype or (wire_format.MSGPACK if wire_format.msgpack else wire_format.JSON)
+        self.layout = layout
+        self.timeout = timeout
+        self.last_response_bytes = 0  # size on the wire of the last response
+
+    def get(self, path, params=None, read_timeout=None):
+        params = dict(params or {}, layout=self.layout)
+        query = urllib.parse.urlencode({k: v for k, v in params.items() if v is not None})
+        req = urllib.request.Request(f'{self.base_url}{path}?{query}', headers={
+            'Accept': self.mimetype,
+            'Accept-Encoding': 'br, gzip' if brotli else 'gzip',
+        })
+        try:
+            with urllib.request.urlopen(req, timeout=read_timeout or self.timeout) as resp:
+                body = resp.read()
+                encoding = resp.headers.get('Content-Encoding')
+                content_type = resp.headers.get_content_type()
+        except urllib.error.HTTPError as e:
+            raise PollsAPIError(e.code, e.read().decode('utf-8', 'replace'))
+
+        self.last_response_bytes = len(body)
+        if encoding == 'br':
+            body = brotli.decompress(body)
+        elif encoding == 'gzip':
+            body = gzip.decompress(body)
+        return wire_format.decode(body, content_type)
+
+    def polls(self, fields=None, summary=None):
+        return self.get('/api/polls', {'fields': fields, 'summary': summary})
+
+    def changes(self, since):
+        return self.get('/api/polls/changes', {'since': since})
+
+    def wait(self, poll_id, version=0, timeout=25):
+        # The server holds the request for up to `timeout` seconds
+        return self.get(f'/api/polls/{poll_id}/wait', {'version': version, 'timeout': timeout}, timeout + 10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fetch polls using the compact wire formats')
+    parser.add_argument('base_url', help='e.g. http://localhost:5000')
+    parser.add_argument('--json', action='store_true', help='Ask for JSON instead of MessagePack')
+    parser.add_argument('--rows', action='store_true', help='Ask for the row layout instead of columnar')
+    parser.add_argument('--summary', action='store_true', help='Only totals and leaders')
+    args = parser.parse_args()
+
+    client = PollsClient(
+        args.base_url,
+        mimetype=wire_format.JSON if args.json else None,
+        layout='rows' if args.rows else 'columnar',
+    )
+    data = client.polls(summary=1 if args.summary else None)
+    print(json.dumps(data, indent=2, ensure_ascii=False))
+    print(f'• {client.mimetype}, {client.layout}: {client.last_response_bytes} bytes on the wire', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Replay traffic captured by request_log.py (REQUEST_LOG_PATH) against the app.
+
+By default the log is re-driven in-process against the local backend; point
+--db at a snapshot of the database the traffic was captured on so poll and
+option IDs line up. --url replays against a running server instead.
+
+Examples:
+    python replay.py requests.jsonl --db piscine_night.db              # real time
+    python replay.py requests.jsonl --db piscine_night.db --speed 10   # 10x faster
+    python replay.py requests.jsonl --speed 0 --concurrency 64         # as fast as possible
+    python replay.py requests.jsonl --url http://localhost:5001
+    python replay.py --compare bench_results/replay_main.json bench_results/replay_branch.json
+"""
+
+import argparse
+import http.cookiejar
+import json
+import os
+import shutil
+import sys
+import tempfile
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+
+class HTTPResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.body = body
+
+    def get_data(self):
+        return self.body
+
+
+class HTTPClient:
+    """Minimal stand-in for Flask's test client that talks to a live server"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar())
+        )
+
+    def open(self, path, method='GET', json=None, headers=None):
+        data = None
+        headers = dict(headers or {})
+        if json is not None:
+            data = _json_dumps(json).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        req = urllib.request.Request(self.base_url + path, data=data, method=method, headers=headers)
+        try:
+            with self.opener.open(req, timeout=60) as resp:
+                return HTTPResponse(resp.status, resp.read())
+        except urllib.error.HTTPError as e:
+            return HTTPResponse(e.code, e.read())
+
+    def post(self, path, json=None):
+        return self.open(path, method='POST', json=json)
+
+
+def _json_dumps(value):
+    return json.dumps(value)
+
+
+def build_plan(entries, speed):
+    """Turn log entries into (requests, offsets); speed 0 means no pacing"""
+    requests, offsets = [], []
+    first = entries[0].get('ts', 0) if entries else 0
+    for entry in entries:
+        # Credentials are redacted in the log; the replayer logs in itself
+        if entry['path'].startswith('/api/admin/login'):
+            continue
+        requests.append((entry['method'], entry['path'], entry.get('body')))
+        offsets.append((entry.get('ts', first) - first) / speed if speed else 0)
+    return requests, offsets
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a captured request log against the polls app')
+    parser.add_argument('log', nargs='?', help='JSONL file written by REQUEST_LOG_PATH')
+    parser.add_argument('--speed', type=float, default=1.0, help='Replay speed multiplier, 0 = as fast as possible')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--db', help='Local database snapshot to replay against (copied, never modified)')
+    parser.add_argument('--url', help='Replay against a running server instead of in-process')
+    parser.add_argument('--output', help='Where to write the JSON report')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CANDIDATE'), help='Compare two saved reports')
+    args = parser.parse_args()
+
+    if not args.compare and not args.log:
+        parser.error('a request log is required unless --compare is given')
+
+    # benchmark imports the app, so pick the database before importing it
+    if args.db:
+        snapshot = os.path.join(tempfile.mkdtemp(prefix='replay_'), 'replay.db')
+        shutil.copyfile(args.db, snapshot)
+        os.environ['LOCAL_DB_PATH'] = snapshot
+
+    import benchmark
+    import request_log
+
+    if args.compare:
+        benchmark.compare(*args.compare)
+        return 0
+
+    entries = request_log.load(args.log)
+    if not entries:
+        print(f'❌ No request records found in {args.log}')
+        return 1
+    requests, offsets = build_plan(entries, args.speed)
+
+    if args.url:
+        def factory():
+            client = HTTPClient(args.url)
+            client.post('/api/admin/login', json={
+                'username': os.environ['ADMIN_USERNAME'],
+                'password': os.environ['ADMIN_PASSWORD'],
+            })
+            return client
+    else:
+        factory = benchmark.admin_client
+
+    speed_label = 'max' if not args.speed else f'{args.speed:g}x'
+    print(f'▶ Replaying {len(requests)} requests from {args.log} at {speed_label} '
+          f'with concurrency {args.concurrency} against {args.url or "in-process app"}')
+    result = benchmark.run_load(requests, args.concurrency, client_factory=factory,
+                                offsets=offsets if args.speed else None, fast=not args.speed)
+
+    captured = sorted(e['duration_ms'] for e in entries if 'duration_ms' in e)
+    if captured:
+        result['captured_latency_ms'] = {
+            'p50': benchmark.percentile(captured, 50),
+            'p95': benchmark.percentile(captured, 95),
+            'p99': benchmark.percentile(captured, 99),
+        }
+    print(f"  {result['throughput_rps']} req/s, p50 {result['latency_ms']['p50']}ms, "
+          f"p95 {result['latency_ms']['p95']}ms, p99 {result['latency_ms']['p99']}ms, status {result['status_codes']}")
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': benchmark.git_revision(),
+        'log': os.path.abspath(args.log),
+        'options': {'speed': args.speed, 'concurrency': args.concurrency, 'url': args.url},
+        'scenarios': {'replay': result},
+    }
+    output = args.output or os.path.join(
+        benchmark.RESULTS_DIR, 'replay_' + datetime.now().strftime('%Y%m%d_%H%M%S') + '.json'
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'\nSaved report to {output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Request logging middleware: captures API traffic as JSONL for replay.py.
+
+Enable by setting REQUEST_LOG_PATH, e.g.
+    REQUEST_LOG_PATH=requests.jsonl gunicorn app:app
+
+Each line looks like:
+    {"ts": 1730000000.123, "method": "POST", "path": "/api/polls/3/vote",
+     "body": {"option_id": 7, "username": "alice"}, "status": 200, "duration_ms": 4.2}
+"""
+
+import json
+import os
+import threading
+import time
+
+from flask import g, request
+
+SENSITIVE_KEYS = ('password', 'secret', 'token', 'key')
+MAX_STRING_LENGTH = 2000
+
+
+def sanitize(value):
+    """Redact credentials and truncate huge strings before they hit the log"""
+    if isinstance(value, dict):
+        return {
+            k: '***' if any(s in str(k).lower() for s in SENSITIVE_KEYS) else sanitize(v)
+            for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [sanitize(v) for v in value]
+    if isinstance(value, str) and len(value) > MAX_STRING_LENGTH:
+        return value[:MAX_STRING_LENGTH]
+    return value
+
+
+class RequestLogger:
+    def __init__(self, path, prefix='/api/'):
+        self.path = path
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        # O_APPEND keeps whole-line writes from several gunicorn workers intact
+        self.fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+
+    def write(self, entry):
+        line = (json.dumps(entry, separators=(',', ':'), default=str) + '\n').encode('utf-8')
+        with self.lock:
+            os.write(self.fd, line)
+
+    def before_request(self):
+        g.request_log_start = time.perf_counter()
+
+    def after_request(self, response):
+        start = g.pop('request_log_start', None)
+        if start is None or not request.path.startswith(self.prefix):
+            return response
+        path = request.full_path if request.query_string else request.path
+        self.write({
+            'ts': round(time.time(), 6),
+            'method': request.method,
+            'path': path,
+            'body': sanitize(request.get_json(silent=True)) if request.is_json else None,
+            'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - start) * 1000, 3),
+        })
+        return response
+
+
+def init_app(app, path):
+    """Register the logger on a Flask app and return it"""
+    logger = RequestLogger(path)
+    app.before_request(logger.before_request)
+    app.after_request(logger.after_request)
+    return logger
+
+
+def load(path):
+    """Read a captured log, skipping lines that are not request records"""
+    entries = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(entry, dict) and 'method' in entry and 'path' in entry:
+                entries.append(entry)
+    entries.sort(key=lambda e: e.get('ts', 0))
+    return entries
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Fingerprinted, precompressed frontend assets.
+
+build() copies style.css and app.js to build/assets/ under content-hashed
+names (app.3f2a9c1b7d4e.js), writes .gz and .br variants next to them, and
+rewrites the references in index.html, admin.html and login.html to point at
+the hashed URLs. Because a changed file gets a new name, /assets/ responses are
+cached forever (Cache-Control: immutable) and repeat visits make no asset
+requests; only the small HTML page is revalidated.
+
+app.py runs the build at startup (it is cheap and idempotent), or run it ahead
+of time as part of the deploy build:
+    python static_assets.py
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+
+from flask import send_from_directory
+
+import payloads
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+BUILD_DIR = os.getenv('STATIC_BUILD_DIR', os.path.join(BASE_DIR, 'build'))
+ASSETS = ('style.css', 'app.js')
+PAGES = ('index.html', 'admin.html', 'login.html')
+MIMETYPES = {'.css': 'text/css', '.js': 'text/javascript', '.html': 'text/html'}
+IMMUTABLE = 'public, max-age=31536000, immutable'
+ENCODINGS = {'br': '.br', 'gzip': '.gz'}
+
+
+def _write(path, data):
+    # Workers may build at the same time; never expose a half-written file
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _write_compressed(path, data):
+    _write(path + ENCODINGS['gzip'], gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        _write(path + ENCODINGS['br'], brotli.compress(data, quality=11))
+
+
+def fingerprint(name, data):
+    stem, ext = os.path.splitext(name)
+    return f'{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}'
+
+
+def rewrite_references(html, manifest):
+    """Point href/src attributes for known assets at their fingerprinted URLs"""
+    def replace(match):
+        return f'{match.group(1)}="/assets/{manifest[match.group(2)]}"'
+    names = '|'.join(re.escape(name) for name in manifest)
+    return re.sub(rf'\b(href|src)="(?:\./|/)?({names})(?:\?[^"]*)?"', replace, html)
+
+
+def build(source_dir=BASE_DIR, build_dir=BUILD_DIR, force=False):
+    """Write fingerprinted assets and rewritten pages; return {asset: fingerprinted name}"""
+    manifest_path = os.path.join(build_dir, 'manifest.json')
+    if not force and os.path.exists(manifest_path):
+        # Nothing edited since the last build (e.g. the deploy build step): reuse it
+        sources = [os.path.join(source_dir, name) for name in ASSETS + PAGES]
+        if os.path.getmtime(manifest_path) >= max(os.path.getmtime(path) for path in sources):
+            with open(manifest_path, encoding='utf-8') as f:
+                return json.load(f)
+
+    assets_dir = os.path.join(build_dir, 'assets')
+    os.makedirs(assets_dir, exist_ok=True)
+
+    manifest = {}
+    for name in ASSETS:
+        with open(os.path.join(source_dir, name), 'rb') as f:
+            data = f.read()
+        manifest[name] = fingerprint(name, data)
+        path = os.path.join(assets_dir, manifest[name])
+        if not os.path.exists(path):
+            _write_compressed(path, data)
+            _write(path, data)
+
+    for page in PAGES:
+        with open(os.path.join(source_dir, page), encoding='utf-8') as f:
+            html = rewrite_references(f.read(), manifest).encode('utf-8')
+        path = os.path.join(build_dir, page)
+        _write_compressed(path, html)
+        _write(path, html)
+
+    _write(manifest_path, json.dumps(manifest, indent=2).encode('utf-8'))
+    return manifest
+
+
+def send_precompressed(directory, filename, cache_control):
+    """Serve filename, or its .br/.gz sibling when the client accepts it"""
+    available = [e for e, suffix in ENCODINGS.items() if os.path.exists(os.path.join(directory, filename + suffix))]
+    encoding = payloads.negotiate(available)
+    mimetype = MIMETYPES.get(os.path.splitext(filename)[1])
+    if encoding == 'identity':
+        response = send_from_directory(directory, filename, mimetype=mimetype)
+    else:
+        response = send_from_directory(directory, filename + ENCODINGS[encoding], mimetype=mimetype)
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Cache-Control'] = cache_control
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def send_page(page, build_dir=BUILD_DIR):
+    # Pages keep their URLs, so they are revalidated (cheap 304s via ETag) on every visit
+    return send_precompressed(build_dir, page, 'no-cache')
+
+
+def send_asset(filename, build_dir=BUILD_DIR):
+    return send_precompressed(os.path.join(build_dir, 'assets'), filename, IMMUTABLE)
+
+
+def main():
+    manifest = build(force=True)
+    for name, hashed in manifest.items():
+        print(f'✅ {name} -> assets/{hashed}')
+    print(f"✅ Rewrote {', '.join(PAGES)} in {BUILD_DIR}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,3 +1,4 @@
+-- Superseded by migrations/postgres (python migrate.py up); kept for reference.
 -- Supabase Schema for Polls Application
 -- Run this SQL in your Supabase SQL Editor to create the tables
 
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Ballots and tallies of approval and ranked_choice polls.
+
+A ballot lists option IDs: every option the voter approves of, or the options
+in order of preference. cast_ballot() stores it through the cast_ballot
+database function (migrations/postgres/0013), which also bumps
+options.votes: approvals for approval polls, first preferences for ranked
+ones.
+
+Tallies start from ballot_counts(), which groups identical ballots in the
+database, so a tally reads one row per distinct ballot rather than one per
+voter. Instant-runoff then works on a (distinct ballots × depth) array of
+option indexes weighted by how many voters cast each ballot. Every round
+finds each ballot's highest-ranked continuing option with one argmax over the
+array and counts with one weighted bincount. Options tied for last place are
+eliminated together, and a round ends the count as soon as an option holds a
+majority of the ballots still in play.
+
+numpy is optional for the rest of the app (pip install numpy); without it
+ballots are refused and GET /api/polls/<id>/tally answers 501.
+
+Usage:
+    python tally.py --poll 12                           # local backend
+    python tally.py --poll 12 --backend supabase
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+BALLOT_POLL_TYPES = ('approval', 'ranked_choice')
+
+
+def validate_ballot(poll_type, option_ids, choices):
+    """The ballot as a list of option IDs, or raises ValueError"""
+    if not isinstance(choices, list) or not choices:
+        raise ValueError('option_ids must be a non-empty list of option IDs')
+    try:
+        ballot = [int(c) for c in choices]
+    except (TypeError, ValueError):
+        raise ValueError('option_ids must be a non-empty list of option IDs')
+    if len(set(ballot)) != len(ballot):
+        raise ValueError('Each option can only appear once on a ballot')
+    unknown = set(ballot) - set(option_ids)
+    if unknown:
+        raise ValueError(f'Unknown option(s) for this poll: {", ".join(map(str, sorted(unknown)))}')
+    # Approvals have no order: sorted, identical ballots group together in ballot_counts()
+    return sorted(ballot) if poll_type == 'approval' else ballot
+
+
+def cast_ballot(client, poll_id, username, ballot):
+    """Store a validated ballot; returns the new row's ID"""
+    data = client.rpc('cast_ballot', {'p_poll_id': poll_id, 'p_username': username, 'p_choices': ballot}).execute().data
+    return data[0] if isinstance(data, list) else data
+
+
+def ballot_counts(client, poll_id):
+    """[{'choices': [option IDs], 'ballots': voters}], one entry per distinct ballot"""
+    return client.rpc('ballot_counts', {'p_poll_id': poll_id}).execute().data or []
+
+
+def last_ballot_id(client, poll_id):
+    """Changes whenever a ballot is cast or ballots are cleared: the tally cache key"""
+    rows = client.table('ballots').select('id').eq('poll_id', poll_id).order('id', desc=True).limit(1).execute().data
+    return rows[0]['id'] if rows else 0
+
+
+def encode(option_ids, counts):
+    """
+    (ballots, weights): ballots is a (distinct ballots × depth) int32 array of
+    option indexes, padded with len(option_ids) past the end of each ballot.
+    Choices of options that no longer exist get the padding index too, so
+    the count skips them like an exhausted preference.
+    """
+    n = len(option_ids)
+    lengths = np.fromiter((len(entry['choices']) for entry in counts), dtype=np.int64, count=len(counts))
+    flat = np.fromiter(itertools.chain.from_iterable(entry['choices'] for entry in counts),
+                       dtype=np.int64, count=int(lengths.sum()))
+    ids = np.asarray(option_ids, dtype=np.int64)
+    order = np.argsort(ids)
+    found = np.minimum(np.searchsorted(ids[order], flat), max(n - 1, 0))
+    known = ids[order][found] == flat if n else np.zeros(len(flat), dtype=bool)
+    index = np.where(known, order[found] if n else 0, n)
+
+    ballots = np.full((len(counts), int(lengths.max(initial=1))), n, dtype=np.int32)
+    starts = np.cumsum(lengths) - lengths
+    rows = np.repeat(np.arange(len(counts)), lengths)
+    ballots[rows, np.arange(len(flat)) - np.repeat(starts, lengths)] = index
+    weights = np.fromiter((entry['ballots'] for entry in counts), dtype=np.int64, count=len(counts))
+    return ballots, weights
+
+
+def approval(option_ids, counts):
+    """{'ballots', 'options': [{'id', 'approvals'}]}, most approved first"""
+    ballots, weights = encode(option_ids, counts)
+    n = len(option_ids)
+    cast = ballots < n
+    approvals = np.bincount(ballots[cast], weights=np.broadcast_to(weights[:, None], ballots.shape)[cast], minlength=n + 1)
+    return {
+        'ballots': int(weights.sum()),
+        'options': sorted(({'id': int(option_id), 'approvals': int(approvals[i])} for i, option_id in enumerate(option_ids)),
+                          key=lambda o: (-o['approvals'], o['id'])),
+    }
+
+
+def instant_runoff(option_ids, counts):
+    """
+    Round-by-round instant-runoff count:
+        {'ballots', 'rounds': [{'round', 'counts': [{'id', 'votes'}], 'exhausted', 'eliminated'}],
+         'winner' (option ID or None), 'tied' (option IDs sharing the win when the count ends in a tie)}
+    """
+    ballots, weights = encode(option_ids, counts)
+    n = len(option_ids)
+    total = int(weights.sum())
+    # Index n is the padding past each ballot's last choice: always out of the count
+    eliminated = np.zeros(n + 1, dtype=bool)
+    eliminated[n] = True
+    rows = np.arange(len(ballots))
+    rounds, winner, tied = [], None, []
+    while True:
+        live = ~eliminated[ballots]
+        current = ballots[rows, live.argmax(axis=1)]  # padding when nothing on the ballot is left
+        tally = np.bincount(current, weights=weights, minlength=n + 1)[:n].astype(np.int64)
+        standing = np.flatnonzero(~eliminated[:n])
+        in_play = int(tally[standing].sum())
+        entry = {
+            'round': len(rounds) + 1,
+            'counts': [{'id': int(option_ids[i]), 'votes': int(tally[i])}
+                       for i in standing[np.argsort(-tally[standing], kind='stable')]],
+            'exhausted': total - in_play,
+            'eliminated': [],
+        }
+        rounds.append(entry)
+        if not in_play:
+            break  # no ballots, or every one exhausted
+        leader = standing[np.argmax(tally[standing])]
+        if 2 * tally[leader] > in_play:
+            winner = int(option_ids[leader])
+            break
+        lowest = tally[standing].min()
+        losers = standing[tally[standing] == lowest]
+        if len(losers) == len(standing):
+            tied = [int(option_ids[i]) for i in standing]
+            break
+        eliminated[losers] = True
+        entry['eliminated'] = [int(option_ids[i]) for i in losers]
+    return {'ballots': total, 'rounds': rounds, 'winner': winner, 'tied': tied}
+
+
+def group_ballots(ballots):
+    """ballot_counts() of ballot rows held in memory ([{'choices'}], e.g. from an archive snapshot)"""
+    grouped = {}
+    for ballot in ballots:
+        key = tuple(ballot['choices'])
+        grouped[key] = grouped.get(key, 0) + 1
+    return [{'choices': list(choices), 'ballots': n} for choices, n in grouped.items()]
+
+
+def tally(client, poll, counts=None):
+    """
+    Tally of an approval or ranked_choice poll ({'id', 'poll_type', 'options': [{'id'}]}), from
+    its stored ballots or from `counts` shaped like ballot_counts()
+    """
+    option_ids = [o['id'] for o in sorted(poll.get('options') or [], key=lambda o: o['id'])]
+    if counts is None:
+        counts = ballot_counts(client, poll['id'])
+    if poll.get('poll_type') == 'ranked_choice':
+        return {'method': 'instant_runoff', **instant_runoff(option_ids, counts)}
+    return {'method': 'approval', **approval(option_ids, counts)}
+
+
+def main():
+    from generate_dataset import get_client
+
+    parser = argparse.ArgumentParser(description='Tally an approval or ranked_choice poll')
+    parser.add_argument('--poll', type=int, required=True, help='Poll ID')
+    parser.add_argument('--json', action='store_true', help='Print the full tally as JSON')
+    parser.add_argument('--backend', choices=['local', 'supabase'], default='local')
+    parser.add_argument('--db', default=os.getenv('LOCAL_DB_PATH', 'polls.db'), help='SQLite file for the local backend')
+    args = parser.parse_args()
+
+    if np is None:
+        print('❌ Tallies need numpy: pip install numpy')
+        return 1
+    client = get_client(args.backend, args.db)
+    polls = client.table('polls').select('id, title, poll_type, options(id, name)').eq('id', args.poll).execute().data
+    if not polls or polls[0].get('poll_type') not in BALLOT_POLL_TYPES:
+        print(f'❌ Poll #{args.poll} is not an approval or ranked_choice poll')
+        return 1
+    poll = polls[0]
+    t0 = time.perf_counter()
+    result = tally(client, poll)
+    elapsed = time.perf_counter() - t0
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0
+
+    names = {o['id']: o['name'] for o in poll['options']}
+    print(f"✅ {poll['title']}: {result['ballots']} ballots tallied in {elapsed:.3f}s")
+    if result['method'] == 'approval':
+        for o in result['options']:
+            print(f"   • {names[o['id']]}: {o['approvals']}")
+        return 0
+    for r in result['rounds']:
+        counts = ', '.join(f"{names[c['id']]} {c['votes']}" for c in r['counts'])
+        out = f" (out: {', '.join(names[o] for o in r['eliminated'])})" if r['eliminated'] else ''
+        print(f"   • Round {r['round']}: {counts}{out}")
+    if result['winner'] is not None:
+        print(f"   • Winner: {names[result['winner']]}")
+    elif result['tied']:
+        print(f"   • Tie: {', '.join(names[o] for o in result['tied'])}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,577 @@
+#!/usr/bin/env python3
+"""
+API tests for app.py, run in-process against the SQLite stand-in backend.
+Run with: python -m pytest -q test_api.py
+"""
+
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+# The app must be imported against the local backend, never the real database
+os.environ['POLLS_BACKEND'] = 'local'
+os.environ['LOCAL_DB_PATH'] = ':memory:'
+
+import app as polls_app  # noqa: E402
+import wire_format  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    db = polls_app.supabase
+    with db.lock:
+        for table in ('text_responses', 'votes', 'options', 'polls', 'poll_archive', 'participant_sketches'):
+            db.conn.execute(f'DELETE FROM {table}')
+    polls_app.participant_sketches.cache.clear()
+    polls_app._polls_cache.clear()
+    polls_app._tally_cache.clear()
+    polls_app._final_cache.clear()
+    polls_app._ballot_tally_cache.clear()
+    polls_app._analytics_cache.clear()
+    return polls_app.app.test_client()
+
+
+def make_poll(title, votes, **extra):
+    db = polls_app.supabase
+    poll = db.table('polls').insert({'title': title, 'poll_type': 'multiple_choice', **extra}).execute().data[0]
+    options = db.table('options').insert(
+        [{'name': f'Nominee {i}', 'poll_id': poll['id'], 'votes': v} for i, v in enumerate(votes)]
+    ).execute().data
+    return poll, options
+
+
+def test_fields_projection(client):
+    make_poll('Best Staff Legend', [3, 5], description='Who made your Piscine better?')
+
+    polls = client.get('/api/polls?fields=title,options.votes').get_json()['polls']
+    assert polls[0]['title'] == 'Best Staff Legend'
+    assert 'description' not in polls[0]
+    assert [set(o) for o in polls[0]['options']] == [{'id', 'votes'}, {'id', 'votes'}]
+
+    response = client.get('/api/polls?fields=title,secret')
+    assert response.status_code == 400
+    assert 'secret' in response.get_json()['error']
+
+
+def test_summary_mode(client):
+    _, options = make_poll('Best Staff Legend', [3, 5, 1])
+    make_poll('Quietest Cluster', [0, 0])
+
+    first, second = client.get('/api/polls?summary=1').get_json()['polls']
+    assert first['totalVotes'] == 9 and first['optionCount'] == 3
+    assert first['leader'] == {'id': options[1]['id'], 'name': 'Nominee 1', 'votes': 5}
+    assert 'options' not in first
+    assert second['leader'] is None
+
+    client.post(f"/api/polls/{first['id']}/vote", json={'option_id': options[0]['id'], 'username': 'alice'})
+    assert client.get('/api/polls?summary=1').get_json()['polls'][0]['totalVotes'] == 10
+
+
+def test_msgpack_columnar_matches_json(client):
+    pytest.importorskip('msgpack')
+    make_poll('Best Staff Legend', [3, 5])
+    expected = client.get('/api/polls').get_json()
+    response = client.get('/api/polls?layout=columnar', headers={'Accept': 'application/msgpack'})
+    assert response.mimetype == 'application/msgpack'
+    assert wire_format.decode(response.data, response.mimetype) == expected
+
+
+def test_delta_sync_sends_only_changes(client, monkeypatch):
+    first, first_options = make_poll('Best Staff', [0, 0])
+    second, _ = make_poll('Best Tutor', [1, 1])
+    listing = client.get('/api/polls').get_json()
+    cursor = listing['revision']
+
+    assert client.get('/api/polls/changes').get_json() == {'full_reload': True, 'revision': None, 'horizon': None}
+    assert client.get('/api/polls/changes?since=-1').get_json()['full_reload'] is True
+    unchanged = client.get(f'/api/polls/changes?since={cursor}').get_json()
+    assert (unchanged['revision'], unchanged['polls'], unchanged['options'], unchanged['deleted']) == (cursor, [], [], [])
+
+    # A vote moves one option count: the poll is not sent again
+    client.post(f"/api/polls/{first['id']}/vote", json={'option_id': first_options[1]['id'], 'username': 'alice'})
+    delta = client.get(f'/api/polls/changes?since={cursor}').get_json()
+    assert delta['polls'] == [] and delta['deleted'] == []
+    assert delta['options'] == [{'id': first_options[1]['id'], 'poll_id': first['id'], 'votes': 1}]
+    assert delta['revision'] > cursor
+    cursor = delta['revision']
+
+    # A deletion comes through as a tombstone
+    with client.session_transaction() as session:
+        session['admin_logged_in'] = True
+    client.delete(f"/api/polls/{second['id']}")
+    delta = client.get(f'/api/polls/changes?since={cursor}').get_json()
+    assert (delta['polls'], delta['deleted']) == ([], [second['id']])
+    assert client.get(f"/api/polls/changes?since={delta['revision']}").get_json()['deleted'] == []
+
+    # A new poll is sent whole, its options only within it
+    third, _ = make_poll('Best Peer', [0, 0, 0])
+    delta = client.get(f"/api/polls/changes?since={delta['revision']}").get_json()
+    assert [(p['id'], len(p['options'])) for p in delta['polls']] == [(third['id'], 3)]
+    assert delta['options'] == []
+
+    # The horizon goes back to the database, which re-sends what was in flight at the last call
+    import local_backend
+
+    seen = []
+    original = local_backend.LocalClient._rpc_poll_changes
+    monkeypatch.setattr(local_backend.LocalClient, '_rpc_poll_changes',
+                        lambda db, p_since, p_horizon=None: seen.append(p_horizon) or original(db, p_since, p_horizon))
+    client.get(f"/api/polls/changes?since={delta['revision']}&horizon=4242")
+    assert seen == [4242]
+
+
+def test_long_poll_wait(client):
+    import threading
+    import time
+
+    poll, options = make_poll('Best Staff', [0, 0])
+    version = polls_app.change_hub.poll_version(poll['id'])
+    assert client.get('/api/polls/999999/wait?timeout=0').status_code == 404
+
+    # A stale version answers at once with the poll
+    body = client.get(f"/api/polls/{poll['id']}/wait?version={version - 1}&timeout=5").get_json()
+    assert body['changed'] is True and body['version'] == version
+
+    # Nothing new before the timeout
+    t0 = time.monotonic()
+    body = client.get(f"/api/polls/{poll['id']}/wait?version={version}&timeout=0.2").get_json()
+    assert body == {'pollId': poll['id'], 'version': version, 'changed': False}
+    assert time.monotonic() - t0 >= 0.2
+
+    def later(action):
+        threading.Timer(0.2, action).start()
+
+    # A vote wakes the waiter long before its timeout, with the new tally
+    voter = polls_app.app.test_client()
+    later(lambda: voter.post(f"/api/polls/{poll['id']}/vote",
+                             json={'option_id': options[0]['id'], 'username': 'alice'}))
+    t0 = time.monotonic()
+    body = client.get(f"/api/polls/{poll['id']}/wait?version={version}&timeout=10").get_json()
+    assert time.monotonic() - t0 < 5
+    assert body['changed'] is True and body['version'] > version
+    assert [o['votes'] for o in body['poll']['options']] == [1, 0]
+
+    # The cached answer expires when the poll closes, although its version does not move
+    closes_at = datetime.now(timezone.utc) + timedelta(seconds=0.5)
+    polls_app.supabase.table('polls').update({'closes_at': closes_at.isoformat()}).eq('id', poll['id']).execute()
+    assert client.get(f"/api/polls/{poll['id']}/wait?version=0&timeout=0").get_json()['poll']['status'] == 'open'
+    time.sleep(max((closes_at - datetime.now(timezone.utc)).total_seconds(), 0) + 0.05)
+    assert client.get(f"/api/polls/{poll['id']}/wait?version=0&timeout=0").get_json()['poll']['status'] == 'closed'
+
+    # Deleting the poll ends the wait with 404, and the hub forgets it once nobody waits
+    admin = polls_app.app.test_client()
+    with admin.session_transaction() as session:
+        session['admin_logged_in'] = True
+    later(lambda: admin.delete(f"/api/polls/{poll['id']}"))
+    version = polls_app.change_hub.poll_version(poll['id'])
+    response = client.get(f"/api/polls/{poll['id']}/wait?version={version}&timeout=10")
+    assert response.status_code == 404
+    assert poll['id'] not in polls_app.change_hub.deleted and poll['id'] not in polls_app.change_hub.watching
+
+
+def test_schedule_is_enforced_and_results_freeze(client):
+    now = datetime.now(timezone.utc)
+    upcoming, upcoming_options = make_poll('Upcoming', [0, 0], opens_at=(now + timedelta(hours=1)).isoformat())
+    closed, closed_options = make_poll('Closed', [4, 2], closes_at=(now - timedelta(minutes=1)).isoformat())
+
+    response = client.post(f"/api/polls/{upcoming['id']}/vote",
+                           json={'option_id': upcoming_options[0]['id'], 'username': 'alice'})
+    assert response.status_code == 403 and 'opens at' in response.get_json()['error']
+    response = client.post(f"/api/polls/{closed['id']}/vote",
+                           json={'option_id': closed_options[0]['id'], 'username': 'alice'})
+    assert response.status_code == 403 and 'closed at' in response.get_json()['error']
+    assert [p['status'] for p in client.get('/api/polls').get_json()['polls']] == ['scheduled', 'closed']
+
+    assert client.get(f"/api/polls/{upcoming['id']}/final-results").status_code == 409
+    final = client.get(f"/api/polls/{closed['id']}/final-results")
+    assert final.headers['Cache-Control'] == polls_app.FINAL_RESULTS_CACHE_CONTROL
+    assert final.get_json()['totalVotes'] == 6
+
+    # Later changes to the live rows do not touch the frozen record
+    polls_app.supabase.table('options').update({'votes': 100}).eq('id', closed_options[0]['id']).execute()
+    polls_app._final_cache.clear()
+    assert client.get(f"/api/polls/{closed['id']}/final-results").get_json()['totalVotes'] == 6
+
+
+def test_archive_moves_closed_polls_out_of_the_hot_tables(client):
+    now = datetime.now(timezone.utc)
+    closed, options = make_poll('Closed', [0, 0], closes_at=(now + timedelta(seconds=30)).isoformat())
+    open_poll, _ = make_poll('Still Open', [1])
+    client.post(f"/api/polls/{closed['id']}/vote", json={'option_id': options[1]['id'], 'username': 'alice'})
+    polls_app.supabase.table('polls').update({'closes_at': (now - timedelta(days=1)).isoformat()}) \
+        .eq('id', closed['id']).execute()
+
+    with client.session_transaction() as session:
+        session['admin_logged_in'] = True
+    assert client.post(f"/api/polls/{open_poll['id']}/archive").status_code == 409
+    response = client.post(f"/api/polls/{closed['id']}/archive")
+    assert response.get_json()['total_votes'] == 1
+
+    # Gone from the hot tables and the default list, still readable from the archive
+    assert [p['title'] for p in client.get('/api/polls').get_json()['polls']] == ['Still Open']
+    assert polls_app.supabase.table('votes').select('id').eq('poll_id', closed['id']).execute().data == []
+    assert polls_app.supabase.table('participant_sketches').select('scope') \
+        .eq('scope', f"poll:{closed['id']}").execute().data == []
+    listed = client.get('/api/archive').get_json()['polls']
+    assert [(p['id'], p['totalVotes']) for p in listed] == [(closed['id'], 1)]
+    archived = client.get(f"/api/archive/{closed['id']}?full=1").get_json()
+    assert archived['poll']['archived'] and archived['results']['totalVotes'] == 1
+    assert [v['username'] for v in archived['votes']] == ['alice']
+    assert client.get(f"/api/polls/{closed['id']}/final-results").get_json()['totalVotes'] == 1
+    results = client.get(f"/api/polls/{closed['id']}/results").get_json()
+    assert results['status'] == 'archived' and results['leaders'] == [options[1]['id']]
+
+    assert client.post(f"/api/polls/{open_poll['id']}/archive", json={'force': True}).status_code == 200
+    assert client.get('/api/polls').get_json()['polls'] == []
+
+
+def test_sharded_vote_counters(client, monkeypatch):
+    import counters
+
+    monkeypatch.setattr(counters, 'SHARDS', 4)
+    monkeypatch.setattr(polls_app.vote_compactor, 'touch', lambda: None)  # compact by hand below
+    poll, options = make_poll('Best Staff', [0, 0])
+    for i in range(10):
+        option = options[0] if i < 8 else options[1]
+        client.post(f"/api/polls/{poll['id']}/vote", json={'option_id': option['id'], 'username': f'u{i}'})
+
+    # Votes sit on shard rows until compaction, but exact reads already count them
+    db = polls_app.supabase
+    assert [o['votes'] for o in db.table('options').select('votes').eq('poll_id', poll['id']).order('id').execute().data] == [0, 0]
+    assert sum(counters.pending_votes(db, poll['id']).values()) == 10
+    results = client.get(f"/api/polls/{poll['id']}/results").get_json()
+    assert [(o['id'], o['votes']) for o in results['options']] == [(options[0]['id'], 8), (options[1]['id'], 2)]
+
+    assert counters.compact(db) == 2
+    assert [o['votes'] for o in db.table('options').select('votes').eq('poll_id', poll['id']).order('id').execute().data] == [8, 2]
+    assert counters.pending_votes(db, poll['id']) == {}
+    board = client.get('/api/leaderboard').get_json()['leaderboard']
+    assert [(r['name'], r['votes']) for r in board] == [('Nominee 0', 8), ('Nominee 1', 2)]
+
+    # Archiving folds votes still on shard rows into the snapshot
+    client.post(f"/api/polls/{poll['id']}/vote", json={'option_id': options[1]['id'], 'username': 'u10'})
+    with client.session_transaction() as session:
+        session['admin_logged_in'] = True
+    archived = client.post(f"/api/polls/{poll['id']}/archive", json={'force': True}).get_json()
+    assert archived['total_votes'] == 11
+
+
+def test_participant_sketches(client):
+    import participants
+
+    staff, staff_options = make_poll('Best Staff', [0, 0])
+    tutor, tutor_options = make_poll('Best Tutor', [0, 0])
+    for i in range(30):
+        client.post(f"/api/polls/{staff['id']}/vote", json={'option_id': staff_options[i % 2]['id'], 'username': f'u{i}'})
+    for i in range(20, 50):
+        client.post(f"/api/polls/{tutor['id']}/vote", json={'option_id': tutor_options[0]['id'], 'username': f'u{i}'})
+
+    event = client.get('/api/participants').get_json()['participants']
+    assert event['estimate'] == 50 and event['low'] <= 50 <= event['high']
+    assert event['standardError'] == round(participants.STANDARD_ERROR, 4)
+    assert client.get(f"/api/polls/{staff['id']}/participants").get_json()['participants']['estimate'] == 30
+    assert client.get('/api/polls/999999/participants').status_code == 404
+
+    # Another worker (an empty cache) merges into the same stored sketch; repeats change nothing
+    other = participants.Sketches(polls_app.supabase)
+    assert not other.add(tutor['id'], 'u20')
+    assert other.add(tutor['id'], 'newcomer')
+    assert not other.add(staff['id'], 'u0')
+    assert client.get('/api/participants').get_json()['participants']['estimate'] == 51
+
+    with client.session_transaction() as session:
+        session['admin_logged_in'] = True
+    client.delete(f"/api/polls/{staff['id']}/votes")
+    assert client.get(f"/api/polls/{staff['id']}/participants").get_json()['participants']['estimate'] == 0
+    # The other worker still holds the cleared registers; the poll's new reset stamp makes it reload them
+    reset_at = polls_app.supabase.table('polls').select('participants_reset_at').eq('id', staff['id']).execute().data[0]
+    assert reset_at['participants_reset_at'] is not None
+    assert other.add(staff['id'], 'u0', reset_at['participants_reset_at'])
+    assert client.get(f"/api/polls/{staff['id']}/participants").get_json()['participants']['estimate'] == 1
+    participants.rebuild(polls_app.supabase, [staff['id'], tutor['id']], reset=True)
+    assert client.get(f"/api/polls/{tutor['id']}/participants").get_json()['participants']['estimate'] == 30
+
+    # Past linear counting the estimate stays within its error bounds
+    registers = bytearray(participants.REGISTERS)
+    for i in range(100_000):
+        register, rank = participants.position(f'voter-{i}')
+        registers[register] = max(registers[register], rank)
+    s = participants.summary(bytes(registers))
+    assert s['low'] <= 100_000 <= s['high']
+
+
+def test_ranked_choice_ballots_and_instant_runoff(client):
+    pytest.importorskip('numpy')
+    with client.session_transaction() as session:
+        session['admin_logged_in'] = True
+    response = client.post('/api/polls', json={'title': 'Best Tutor', 'poll_type': 'ranked_choice',
+                                               'options': ['Alice', 'Bob', 'Carol']})
+    poll_id = response.get_json()['id']
+    alice, bob, carol = [o['id'] for o in polls_app.supabase.table('options').select('id')
+                         .eq('poll_id', poll_id).order('id').execute().data]
+    ballots = [[alice, bob]] * 4 + [[bob, alice]] * 3 + [[carol, bob]] * 2 + [[carol]]
+    for i, ballot in enumerate(ballots):
+        response = client.post(f'/api/polls/{poll_id}/vote', json={'option_ids': ballot, 'username': f'u{i}'})
+        assert response.status_code == 200
+
+    assert client.post(f'/api/polls/{poll_id}/vote', json={'option_ids': [alice], 'username': 'u0'}).status_code == 400
+    assert client.post(f'/api/polls/{poll_id}/vote', json={'option_ids': [alice, alice], 'username': 'x'}).status_code == 400
+    assert client.post(f'/api/polls/{poll_id}/vote', json={'option_id': alice, 'username': 'x'}).status_code == 400
+
+    # First preferences land on the option counters
+    results = client.get(f'/api/polls/{poll_id}/results').get_json()
+    assert [(o['id'], o['votes']) for o in results['options']] == [(alice, 4), (bob, 3), (carol, 3)]
+
+    result = client.get(f'/api/polls/{poll_id}/tally').get_json()
+    assert result['method'] == 'instant_runoff' and result['ballots'] == 10
+    first, second = result['rounds']
+    assert first['counts'] == [{'id': alice, 'votes': 4}, {'id': bob, 'votes': 3}, {'id': carol, 'votes': 3}]
+    assert first['eliminated'] == [bob, carol]
+    # Bob's voters move to Alice, Carol's to Bob (out) or nobody: three ballots exhaust
+    assert second['counts'] == [{'id': alice, 'votes': 7}] and second['exhausted'] == 3
+    assert result['winner'] == alice
+
+    # Cached until the next ballot
+    client.post(f'/api/polls/{poll_id}/vote', json={'option_ids': [carol], 'username': 'late'})
+    assert client.get(f'/api/polls/{poll_id}/tally').get_json()['ballots'] == 11
+
+    # Archiving keeps the ballots, and with them the instant-runoff result
+    assert client.post(f'/api/polls/{poll_id}/archive', json={'force': True}).status_code == 200
+    assert polls_app.supabase.table('ballots').select('id').eq('poll_id', poll_id).execute().data == []
+    archived = client.get(f'/api/archive/{poll_id}?full=1').get_json()
+    assert archived['tally']['winner'] == alice and archived['tally']['ballots'] == 11
+    assert [b['choices'] for b in archived['ballots']][:2] == [[alice, bob], [alice, bob]]
+
+
+def test_ranked_choice_leaders_come_from_the_runoff(client):
+    pytest.importorskip('numpy')
+    with client.session_transaction() as session:
+        session['admin_logged_in'] = True
+    poll_id = client.post('/api/polls', json={'title': 'Best Tutor', 'poll_type': 'ranked_choice',
+                                              'options': ['Alice', 'Bob', 'Carol']}).get_json()['id']
+    alice, bob, carol = [o['id'] for o in polls_app.supabase.table('options').select('id')
+                         .eq('poll_id', poll_id).order('id').execute().data]
+    # Alice leads on first preferences, but Carol's voters carry Bob past her
+    for i, ballot in enumerate([[alice]] * 4 + [[bob]] * 3 + [[carol, bob]] * 2):
+        client.post(f'/api/polls/{poll_id}/vote', json={'option_ids': ballot, 'username': f'u{i}'})
+
+    results = client.get(f'/api/polls/{poll_id}/results').get_json()
+    assert results['options'][0]['id'] == alice
+    assert results['leaders'] == [bob] and results['tally']['winner'] == bob
+
+    polls_app.supabase.table('polls').update({'closes_at': (datetime.now(timezone.utc) - timedelta(minutes=1)).isoformat()}) \
+        .eq('id', poll_id).execute()
+    results = client.get(f'/api/polls/{poll_id}/results').get_json()
+    assert results['final'] and results['leaders'] == [bob]
+    assert client.get(f'/api/polls/{poll_id}/final-results').get_json()['tally']['winner'] == bob
+
+
+def test_approval_ballots(client):
+    pytest.importorskip('numpy')
+    with client.session_transaction() as session:
+        session['admin_logged_in'] = True
+    poll_id = client.post('/api/polls', json={'title': 'Snacks', 'poll_type': 'approval',
+                                              'options': ['Coffee', 'Tea', 'Water']}).get_json()['id']
+    coffee, tea, water = [o['id'] for o in polls_app.supabase.table('options').select('id')
+                          .eq('poll_id', poll_id).order('id').execute().data]
+    for i, ballot in enumerate([[coffee, tea], [tea], [water, coffee, tea]]):
+        client.post(f'/api/polls/{poll_id}/vote', json={'option_ids': ballot, 'username': f'u{i}'})
+
+    result = client.get(f'/api/polls/{poll_id}/tally').get_json()
+    assert result['ballots'] == 3
+    assert [(o['id'], o['approvals']) for o in result['options']] == [(tea, 3), (coffee, 2), (water, 1)]
+    results = client.get(f'/api/polls/{poll_id}/results').get_json()
+    assert [(o['id'], o['votes']) for o in results['options']] == [(tea, 3), (coffee, 2), (water, 1)]
+
+
+def test_leaderboard_sums_votes_by_name_across_polls(client):
+    db = polls_app.supabase
+    staff = db.table('polls').insert({'title': 'Best Staff', 'poll_type': 'multiple_choice'}).execute().data[0]
+    tutor = db.table('polls').insert({'title': 'Best Tutor', 'poll_type': 'multiple_choice'}).execute().data[0]
+    staff_options = db.table('options').insert(
+        [{'name': name, 'poll_id': staff['id'], 'votes': 0} for name in ('Hank', 'Alice')]).execute().data
+    tutor_options = db.table('options').insert(
+        [{'name': name, 'poll_id': tutor['id'], 'votes': 0} for name in (' hank ', 'Bob')]).execute().data
+    for username, poll, option in [('u1', staff, staff_options[0]), ('u2', staff, staff_options[1]),
+                                   ('u1', tutor, tutor_options[0]), ('u2', tutor, tutor_options[1])]:
+        client.post(f"/api/polls/{poll['id']}/vote", json={'option_id': option['id'], 'username': username})
+
+    board = client.get('/api/leaderboard').get_json()['leaderboard']
+    assert [(r['name'], r['votes'], r['polls'], r['rank'], r['tied']) for r in board] == [
+        ('Hank', 2, 2, 1, False), ('Alice', 1, 1, 2, True), ('Bob', 1, 1, 2, True)]
+    assert [r['name'] for r in client.get('/api/leaderboard?min_polls=2').get_json()['leaderboard']] == ['Hank']
+
+    # Deleting a poll takes its votes off the board
+    db.table('polls').delete().eq('id', tutor['id']).execute()
+    board = client.get('/api/leaderboard?limit=2').get_json()['leaderboard']
+    assert [(r['name'], r['votes'], r['polls']) for r in board] == [('Alice', 1, 1), ('Hank', 1, 1)]
+    assert client.get('/api/leaderboard?limit=0').status_code == 400
+
+    # A poll listing a name twice counts once, and stays counted until both options are gone
+    twin = db.table('options').insert({'name': 'ALICE', 'poll_id': staff['id'], 'votes': 0}).execute().data[0]
+    board = client.get('/api/leaderboard?limit=2').get_json()['leaderboard']
+    assert [(r['name'], r['votes'], r['polls']) for r in board] == [('Alice', 1, 1), ('Hank', 1, 1)]
+    db.table('options').delete().eq('id', staff_options[1]['id']).execute()
+    db.table('options').update({'votes': 3}).eq('id', twin['id']).execute()
+    board = client.get('/api/leaderboard?limit=2').get_json()['leaderboard']
+    assert [(r['name'], r['votes'], r['polls']) for r in board] == [('Alice', 3, 1), ('Hank', 1, 1)]
+
+    # Inner whitespace collapses too, as in Postgres leaderboard_key()
+    mentor = db.table('polls').insert({'title': 'Best Mentor', 'poll_type': 'multiple_choice'}).execute().data[0]
+    db.table('options').insert([{'name': 'Ann  Lee', 'poll_id': staff['id'], 'votes': 4},
+                                {'name': 'ann lee', 'poll_id': mentor['id'], 'votes': 1}]).execute()
+    board = client.get('/api/leaderboard?limit=1').get_json()['leaderboard']
+    assert [(r['name'], r['votes'], r['polls']) for r in board] == [('Ann  Lee', 5, 2)]
+
+
+def test_ballots_without_numpy_answer_501(client, monkeypatch):
+    import tally
+
+    monkeypatch.setattr(tally, 'np', None)
+    with client.session_transaction() as session:
+        session['admin_logged_in'] = True
+    poll_id = client.post('/api/polls', json={'title': 'Snacks', 'poll_type': 'approval',
+                                              'options': ['Coffee', 'Tea']}).get_json()['id']
+    coffee = polls_app.supabase.table('options').select('id').eq('poll_id', poll_id).order('id').execute().data[0]['id']
+    response = client.post(f'/api/polls/{poll_id}/vote', json={'option_ids': [coffee], 'username': 'u0'})
+    assert response.status_code == 501 and 'numpy' in response.get_json()['error']
+    assert client.get(f'/api/polls/{poll_id}/tally').status_code == 501
+    assert polls_app.supabase.table('ballots').select('id').eq('poll_id', poll_id).execute().data == []
+
+
+def test_voter_analytics(client):
+    pytest.importorskip('numpy')
+    staff, staff_options = make_poll('Best Staff', [0, 0])
+    tutor, tutor_options = make_poll('Best Tutor', [0, 0])
+    ballots = {'alice': (0, 0), 'bob': (0, 0), 'carol': (1, 1), 'dave': (0, None)}
+    for username, (staff_pick, tutor_pick) in ballots.items():
+        client.post(f"/api/polls/{staff['id']}/vote", json={'option_id': staff_options[staff_pick]['id'], 'username': username})
+        if tutor_pick is not None:
+            client.post(f"/api/polls/{tutor['id']}/vote", json={'option_id': tutor_options[tutor_pick]['id'], 'username': username})
+
+    assert client.get('/api/admin/analytics').status_code == 401
+    with client.session_transaction() as session:
+        session['admin_logged_in'] = True
+    report = client.get('/api/admin/analytics?top=5').get_json()
+    assert report['votes'] == 7 and report['voters'] == 4
+    assert [(p['title'], p['voters'], p['turnout']) for p in report['polls']] == [('Best Staff', 4, 1.0), ('Best Tutor', 3, 0.75)]
+    assert report['pollOverlap']['matrix'] == [[4, 3], [3, 3]]
+    best = report['topOptionPairs'][0]
+    assert (best['a']['id'], best['b']['id'], best['sharedVoters']) == (staff_options[0]['id'], tutor_options[0]['id'], 2)
+    assert best['jaccard'] == round(2 / 3, 4)
+
+    only_staff = client.get(f"/api/admin/analytics?polls={staff['id']}").get_json()
+    assert only_staff['votes'] == 4 and only_staff['topPollPairs'] == []
+    assert client.get('/api/admin/analytics?polls=abc').status_code == 400
+
+
+def test_text_responses_are_paged_and_searchable(client):
+    poll = polls_app.supabase.table('polls').insert({'title': 'Feedback', 'poll_type': 'text_response'}).execute().data[0]
+    answers = ['More coffee in the cluster', 'Exams were hard', 'Coffee machine broke again', 'Great staff']
+    polls_app.supabase.table('text_responses').insert([
+        {'poll_id': poll['id'], 'username': f'user{i}', 'response_text': text} for i, text in enumerate(answers)
+    ]).execute()
+    url = f"/api/polls/{poll['id']}/text-responses"
+
+    first = client.get(f'{url}?limit=3').get_json()
+    assert first['total'] == 4 and len(first['responses']) == 3
+    rest = client.get(f"{url}?limit=3&cursor={first['nextCursor']}").get_json()
+    assert [r['response_text'] for r in rest['responses']] == ['Great staff'] and rest['nextCursor'] is None
+
+    found = client.get(f'{url}?q=coff').get_json()
+    assert [r['username'] for r in found['responses']] == ['user0', 'user2'] and found['total'] == 2
+    assert client.get(f'{url}?q=coffee+machine').get_json()['total'] == 1
+    assert client.get(f'{url}?q=coffee&username=USER2').get_json()['responses'][0]['username'] == 'user2'
+    assert client.get(f'{url}?q=%21%21').get_json()['total'] == 0
+    assert client.get(f'{url}?limit=0').status_code == 400
+
+
+def test_text_response_terms_are_counted_on_submit(client):
+    poll = polls_app.supabase.table('polls').insert({'title': 'Feedback', 'poll_type': 'text_response'}).execute().data[0]
+    url = f"/api/polls/{poll['id']}"
+    for username, text in [('alice', 'More coffee machines, coffee coffee!'), ('bob', 'The coffee machines are broken'),
+                           ('carol', 'Les exams sont durs')]:
+        assert client.post(f'{url}/text-response', json={'username': username, 'response_text': text}).status_code == 201
+    assert client.post(f'{url}/text-response', json={'username': 'bob', 'response_text': 'again'}).status_code == 400
+
+    terms = client.get(f'{url}/text-responses/terms').get_json()
+    assert terms['responses'] == 3
+    assert terms['words'][:2] == [{'term': 'coffee', 'count': 2}, {'term': 'machines', 'count': 2}]
+    assert {'term': 'coffee machines', 'count': 2} in terms['bigrams']
+    assert not {'the', 'are', 'les', 'sont'} & {t['term'] for t in terms['words']}
+
+    options = client.get(f'{url}/text-responses/terms?as=options&limit=1').get_json()['options']
+    assert options == [{'name': 'coffee', 'votes': 2}]
+
+    # A rebuild from the stored answers gives the same counts
+    import text_terms
+    assert text_terms.rebuild(polls_app.supabase, poll['id']) == 3
+    assert client.get(f'{url}/text-responses/terms').get_json() == terms
+
+
+def test_near_duplicate_answers_are_clustered(client):
+    poll = polls_app.supabase.table('polls').insert({'title': 'Best Staff', 'poll_type': 'text_response'}).execute().data[0]
+    url = f"/api/polls/{poll['id']}"
+    answers = ['Hank', 'hank!', 'Hank H.', '  HANK ', 'Frank', 'Héloïse', 'heloise']
+    for i, text in enumerate(answers):
+        client.post(f'{url}/text-response', json={'username': f'user{i}', 'response_text': text})
+
+    body = client.get(f'{url}/text-responses/clusters').get_json()
+    assert body['responses'] == 7 and body['clusterCount'] == 3
+    assert [(c['label'], c['size']) for c in body['clusters']] == [('Hank', 4), ('Héloïse', 2), ('Frank', 1)]
+    assert client.get(f'{url}/text-responses/clusters?min_size=2').get_json()['clusterCount'] == 2
+
+    members = client.get(f"{url}/text-responses/clusters/{body['clusters'][1]['id']}").get_json()['responses']
+    assert [m['response_text'] for m in members] == ['Héloïse', 'heloise']
+
+    # Reclustering from scratch agrees with the incremental result
+    import text_clusters
+    assert text_clusters.rebuild(polls_app.supabase, poll['id']) == (7, 3)
+    rebuilt = client.get(f'{url}/text-responses/clusters').get_json()
+    assert [(c['label'], c['size']) for c in rebuilt['clusters']] == [('Hank', 4), ('Héloïse', 2), ('Frank', 1)]
+
+
+def test_results_rank_ties_and_top_k(client):
+    poll, options = make_poll('Best Staff Legend', [5, 9, 5, 0, 1])
+    url = f"/api/polls/{poll['id']}/results"
+
+    body = client.get(url).get_json()
+    assert body['totalVotes'] == 20 and body['optionCount'] == 5 and not body['final']
+    assert [(o['votes'], o['rank'], o['tied']) for o in body['options']] == [
+        (9, 1, False), (5, 2, True), (5, 2, True), (1, 4, False), (0, 5, False)]
+    assert body['options'][0]['percent'] == 45.0 and body['leaders'] == [options[1]['id']]
+    assert 'username' not in str(body)
+
+    # Ties at the cutoff are kept
+    assert [o['votes'] for o in client.get(f'{url}?top=2').get_json()['options']] == [9, 5, 5]
+    assert client.get(f'{url}?top=0').status_code == 400
+    assert client.get('/api/polls/999999/results').status_code == 404
+
+
+def test_vote_timeline_buckets(client):
+    poll, options = make_poll('Best Staff Legend', [0, 0])
+    other, other_options = make_poll('Quietest Cluster', [0])
+    db = polls_app.supabase
+    db.table('votes').insert([
+        {'poll_id': poll['id'], 'option_id': options[0]['id'], 'username': 'a', 'created_at': '2026-03-01T10:00:05+00:00'},
+        {'poll_id': poll['id'], 'option_id': options[1]['id'], 'username': 'b', 'created_at': '2026-03-01T10:00:50+00:00'},
+        {'poll_id': poll['id'], 'option_id': options[1]['id'], 'username': 'c', 'created_at': '2026-03-01T10:03:00+00:00'},
+        {'poll_id': other['id'], 'option_id': other_options[0]['id'], 'username': 'a', 'created_at': '2026-03-01T10:00:10+00:00'},
+    ]).execute()
+
+    body = client.get(f"/api/polls/{poll['id']}/timeline?bucket=1m").get_json()
+    assert body['bucketSeconds'] == 60
+    assert body['buckets'] == [
+        {'start': '2026-03-01T10:00:00+00:00', 'total': 2,
+         'options': {str(options[0]['id']): 1, str(options[1]['id']): 1}},
+        {'start': '2026-03-01T10:03:00+00:00', 'total': 1, 'options': {str(options[1]['id']): 1}},
+    ]
+    since = client.get(f"/api/polls/{poll['id']}/timeline?bucket=1h&since=2026-03-01T10:01:00Z").get_json()
+    assert since['buckets'] == [{'start': '2026-03-01T10:00:00+00:00', 'total': 1,
+                                 'options': {str(options[1]['id']): 1}}]
+
+    everything = client.get('/api/polls/timeline?bucket=1h').get_json()['buckets']
+    assert everything == [{'start': '2026-03-01T10:00:00+00:00', 'total': 4,
+                           'polls': {str(poll['id']): 3, str(other['id']): 1}}]
+    assert client.get('/api/polls/timeline?bucket=5y').status_code == 400
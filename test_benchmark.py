@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Smoke tests for the offline benchmark suite (benchmark.py), at a tiny scale.
+Run with: python -m pytest -q test_benchmark.py
+"""
+
+import argparse
+import json
+import threading
+
+from werkzeug.serving import make_server
+
+import benchmark
+import replay
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 101))
+    assert benchmark.percentile(values, 50) == 50
+    assert benchmark.percentile(values, 99) == 99
+    assert benchmark.percentile([], 95) == 0.0
+    assert benchmark.percentile([7], 1) == 7
+
+
+def test_vote_burst_counts_every_vote():
+    benchmark.reset_database()
+    result = benchmark.scenario_vote_burst(argparse.Namespace(scale=1, concurrency=4, fast=True))
+    assert result['requests'] == 500 and result['status_codes'] == {'200': 500}
+    assert result['backend_calls_per_request'] > 0
+    db = benchmark.polls_app.supabase
+    assert len(db.table('votes').select('id').execute().data) == 500
+    assert sum(o['votes'] for o in db.table('options').select('votes').execute().data) == 500
+
+
+def test_compare_prints_deltas(tmp_path, capsys):
+    run = {'scenarios': {'vote_burst': {
+        'throughput_rps': 100.0, 'backend_calls_per_request': 4.0,
+        'latency_ms': {'p50': 1.0, 'p95': 2.0, 'p99': 4.0},
+    }}}
+    faster = json.loads(json.dumps(run))
+    faster['scenarios']['vote_burst']['throughput_rps'] = 150.0
+    (tmp_path / 'a.json').write_text(json.dumps(run))
+    (tmp_path / 'b.json').write_text(json.dumps(faster))
+    benchmark.compare(str(tmp_path / 'a.json'), str(tmp_path / 'b.json'))
+    assert '+50.0%' in capsys.readouterr().out
+
+
+def test_run_load_drives_a_live_server():
+    benchmark.reset_database()
+    server = make_server('127.0.0.1', 0, benchmark.polls_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f'http://127.0.0.1:{server.server_port}'
+        requests = [('GET', '/api/polls', None), ('GET', '/api/polls', None, {'Accept': 'application/json'})]
+        result = benchmark.run_load(requests, 2, fast=True, client_factory=lambda: replay.HTTPClient(url))
+    finally:
+        server.shutdown()
+    assert result['status_codes'] == {'200': 2}
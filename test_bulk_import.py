@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for manifest validation and the transactional import (bulk_import.py).
+Run with: python -m pytest -q test_bulk_import.py
+"""
+
+import pytest
+
+import bulk_import
+import local_backend
+
+
+def test_csv_manifest_groups_options_by_title():
+    text = ('title,description,poll_type,option\n'
+            'Volume Icon,Loudest laugh,multiple_choice,Alice\n'
+            'Volume Icon,Loudest laugh,multiple_choice,Bob\n'
+            'Shout-outs,,text_response,\n')
+    polls = bulk_import.validate_manifest(bulk_import.parse_manifest(text, 'csv'))
+    assert [(p['title'], p['options']) for p in polls] == [('Volume Icon', ['Alice', 'Bob']), ('Shout-outs', [])]
+
+
+def test_csv_rows_of_one_poll_must_agree():
+    text = ('title,description,poll_type,option\n'
+            'Volume Icon,Loudest laugh,multiple_choice,Alice\n'
+            'Volume Icon,,,Bob\n'
+            'Volume Icon,Quietest cluster,multiple_choice,Carol\n'
+            'Volume Icon,Loudest laugh,text_response,Dan\n')
+    with pytest.raises(bulk_import.ManifestError) as exc:
+        bulk_import.parse_manifest(text, 'csv')
+    assert [(e['row'], e['error']) for e in exc.value.errors] == [
+        (4, 'Row 4: description "Quietest cluster" conflicts with "Loudest laugh" from row 2'),
+        (5, 'Row 5: poll_type "text_response" conflicts with "multiple_choice" from row 2'),
+    ]
+
+
+def test_validation_reports_every_problem():
+    with pytest.raises(bulk_import.ManifestError) as exc:
+        bulk_import.validate_manifest([
+            {'title': 'ok', 'options': ['a', 'b']},
+            {'title': '', 'options': ['a', 'b']},
+            {'title': 'dupes', 'options': ['a', 'a']},
+        ])
+    assert [e['index'] for e in exc.value.errors] == [1, 2]
+
+
+def test_import_is_all_or_nothing():
+    db = local_backend.create_client(':memory:')
+    ids = bulk_import.import_polls(db, [{'title': 'A', 'options': ['x', 'y']}, {'title': 'B', 'options': ['z', 'w']}])
+    assert len(ids) == 2
+    assert db.table('options').select('id', count='exact').execute().count == 4
+
+    with pytest.raises(Exception):
+        # A missing title violates NOT NULL halfway through the batch
+        bulk_import.import_polls(db, [{'title': 'C', 'options': ['x', 'y']}, {'title': None}])
+    assert db.table('polls').select('id', count='exact').execute().count == 2
+
+
+def test_schedule_is_validated_and_imported():
+    text = ('title,description,poll_type,opens_at,closes_at,option\n'
+            'Volume Icon,Loudest laugh,multiple_choice,2026-03-02T09:00:00Z,2026-03-06T18:00:00Z,Alice\n'
+            'Volume Icon,,,,,Bob\n')
+    polls = bulk_import.validate_manifest(bulk_import.parse_manifest(text, 'csv'))
+    assert (polls[0]['opens_at'], polls[0]['closes_at']) == ('2026-03-02T09:00:00+00:00', '2026-03-06T18:00:00+00:00')
+
+    with pytest.raises(bulk_import.ManifestError) as exc:
+        bulk_import.validate_manifest([
+            {'title': 'bad', 'opens_at': 'next monday', 'options': ['a', 'b']},
+            {'title': 'backwards', 'opens_at': '2026-03-06T00:00:00Z', 'closes_at': '2026-03-02T00:00:00Z',
+             'options': ['a', 'b']},
+        ])
+    assert [e['error'] for e in exc.value.errors] == ['opens_at must be an ISO-8601 timestamp.',
+                                                      'closes_at must be after opens_at.']
+
+    db = local_backend.create_client(':memory:')
+    ids = bulk_import.import_polls(db, polls + [{'title': 'Anytime', 'options': ['x', 'y']}])
+    rows = db.table('polls').select('id, opens_at, closes_at').in_('id', ids).order('id').execute().data
+    assert [(r['opens_at'], r['closes_at']) for r in rows] == [
+        ('2026-03-02T09:00:00+00:00', '2026-03-06T18:00:00+00:00'), (None, None)]
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Tests for the synthetic dataset generator (generate_dataset.py), loaded through local_backend.
+Run with: python -m pytest -q test_generate_dataset.py
+"""
+
+import argparse
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import generate_dataset
+import local_backend
+
+
+def make_args(**overrides):
+    args = dict(polls=4, text_polls=1, options=5, voters=30, votes=60, responses=10, text_length='2:4',
+                skew=1.0, distribution='burst', start='2026-01-01T09:00:00+00:00', span_hours=2.0,
+                batch_size=7, prefix='Test', seed=1)
+    args.update(overrides)
+    return argparse.Namespace(**args)
+
+
+def test_small_dataset_loads_consistently():
+    db = local_backend.create_client(':memory:')
+    stats = generate_dataset.generate(db, make_args())
+    assert (stats['polls'], stats['options'], stats['votes'], stats['text_responses']) == (4, 15, 60, 10)
+
+    polls = db.table('polls').select('id, poll_type, options(id, votes)').order('id').execute().data
+    assert [p['poll_type'] for p in polls] == ['text_response'] + ['multiple_choice'] * 3
+    votes = db.table('votes').select('username, poll_id, option_id, created_at').execute().data
+    assert len(votes) == 60
+    # One vote per voter per poll, and options.votes matches the vote rows
+    assert len({(v['username'], v['poll_id']) for v in votes}) == 60
+    for p in polls[1:]:
+        for o in p['options']:
+            assert o['votes'] == sum(v['option_id'] == o['id'] for v in votes)
+    assert all('2026-01-01T09:00:00' <= v['created_at'] <= '2026-01-01T11:00:00+00:00' for v in votes)
+
+    responses = db.table('text_responses').select('poll_id, response_text').execute().data
+    assert {r['poll_id'] for r in responses} == {polls[0]['id']}
+    assert all(2 <= len(r['response_text'].split()) <= 4 for r in responses)
+
+
+def test_same_seed_same_dataset():
+    first, second = local_backend.create_client(':memory:'), local_backend.create_client(':memory:')
+    generate_dataset.generate(first, make_args())
+    generate_dataset.generate(second, make_args())
+    columns = 'username, poll_id, option_id, created_at'
+    assert first.table('votes').select(columns).order('id').execute().data == \
+        second.table('votes').select(columns).order('id').execute().data
+
+
+def test_timestamps_and_ranges():
+    assert generate_dataset.parse_range('20') == (20, 20)
+    assert generate_dataset.parse_range('5:60') == (5, 60)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    stamps = generate_dataset.make_timestamps(200, start, timedelta(hours=1), 'exponential', random.Random(3))
+    assert stamps == sorted(stamps) and stamps[0] >= start.isoformat() and stamps[-1] <= '2026-01-01T01:00:00+00:00'
+    with pytest.raises(ValueError):
+        generate_dataset.make_timestamps(1, start, timedelta(hours=1), 'sideways', random.Random(3))
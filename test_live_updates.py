@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for tally fan-out (live_updates.py) against the local backend.
+Run with: python -m pytest -q test_live_updates.py
+"""
+
+import local_backend
+import live_updates
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, data):
+        self.sent.append(data)
+
+
+def test_votes_within_an_interval_produce_one_frame():
+    db = local_backend.create_client(':memory:')
+    poll = db.table('polls').insert({'title': 'Best language', 'poll_type': 'multiple_choice'}).execute().data[0]
+    options = db.table('options').insert(
+        [{'name': n, 'poll_id': poll['id'], 'votes': 0} for n in ('Python', 'C')]
+    ).execute().data
+    hub = live_updates.ChangeHub(db)
+    broadcaster = live_updates.Broadcaster(db, hub, interval=60)
+    conn = live_updates.LiveConnection(FakeSocket())
+    broadcaster.subscribe(conn, [poll['id']], {poll['id']: hub.poll_version(poll['id'])})
+
+    for votes in range(1, 6):
+        db.table('options').update({'votes': votes}).eq('id', options[0]['id']).execute()
+    broadcaster.tick({poll['id']: broadcaster.versions[poll['id']]})
+    broadcaster.tick({poll['id']: broadcaster.versions[poll['id']]})  # nothing new
+    conn.flush()
+
+    assert len(conn.ws.sent) == 1
+    assert '"total": 5' in conn.ws.sent[0]
+
+    broadcaster.unsubscribe(conn)
+    assert broadcaster.subscribers == {} and conn.polls == set()
+
+
+def test_deleted_poll_is_announced_once():
+    db = local_backend.create_client(':memory:')
+    polls = db.table('polls').insert(
+        [{'title': t, 'poll_type': 'multiple_choice'} for t in ('Best language', 'Best editor')]
+    ).execute().data
+    hub = live_updates.ChangeHub(db)
+    broadcaster = live_updates.Broadcaster(db, hub, interval=60)
+    conn = live_updates.LiveConnection(FakeSocket())
+    broadcaster.subscribe(conn, [p['id'] for p in polls], {p['id']: hub.poll_version(p['id']) for p in polls})
+
+    db.table('polls').delete().eq('id', polls[0]['id']).execute()
+    broadcaster.tick({pid: broadcaster.versions[pid] for pid in broadcaster.subscribers})
+    conn.flush()
+    assert conn.ws.sent == [f'{{"type": "deleted", "poll_id": {polls[0]["id"]}}}']
+    assert set(broadcaster.subscribers) == {polls[1]['id']} and conn.polls == {polls[1]['id']}
+
+    broadcaster.tick({pid: broadcaster.versions[pid] for pid in broadcaster.subscribers})
+    conn.flush()
+    assert len(conn.ws.sent) == 1
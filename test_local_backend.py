@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite stand-in backend (local_backend.py).
+Run with: python -m pytest -q test_local_backend.py
+"""
+
+import pytest
+
+import local_backend
+
+
+@pytest.fixture
+def db():
+    return local_backend.create_client(':memory:')
+
+
+def make_poll(db, options=('Python', 'C')):
+    poll = db.table('polls').insert({'title': 'Best language', 'poll_type': 'multiple_choice'}).execute().data[0]
+    rows = db.table('options').insert([{'name': n, 'poll_id': poll['id'], 'votes': 0} for n in options]).execute().data
+    return poll, rows
+
+
+def test_embeds_one_to_many_and_many_to_one(db):
+    poll, options = make_poll(db)
+    db.table('votes').insert({'username': 'alice', 'poll_id': poll['id'], 'option_id': options[1]['id']}).execute()
+
+    polls = db.table('polls').select('*, options(*)').order('id').execute().data
+    assert [o['name'] for o in polls[0]['options']] == ['Python', 'C']
+
+    votes = db.table('votes').select('*, polls(id, title), options(name)').execute().data
+    assert votes[0]['polls'] == {'id': poll['id'], 'title': 'Best language'}
+    assert votes[0]['options'] == {'name': 'C'}
+
+
+def test_unique_violation_raises_api_error(db):
+    poll, options = make_poll(db)
+    vote = {'username': 'alice', 'poll_id': poll['id'], 'option_id': options[0]['id']}
+    db.table('votes').insert(vote).execute()
+    with pytest.raises(local_backend.APIError) as exc:
+        db.table('votes').insert(vote).execute()
+    assert exc.value.code == '23505'
+
+
+def test_delete_cascades_and_counts_calls(db):
+    poll, _ = make_poll(db)
+    db.reset_call_count()
+    db.table('polls').delete().eq('id', poll['id']).execute()
+    assert db.table('options').select('id', count='exact').execute().count == 0
+    assert db.reset_call_count() == 2
+
+
+def test_revisions_track_changes(db):
+    poll, options = make_poll(db)
+    start = db.table('polls').select('revision').eq('id', poll['id']).execute().data[0]['revision']
+
+    db.table('options').update({'votes': 1}).eq('id', options[0]['id']).execute()
+    changed = db.table('options').select('id').gt('revision', start).execute().data
+    assert [o['id'] for o in changed] == [options[0]['id']]
+
+    db.table('polls').delete().eq('id', poll['id']).execute()
+    tombstones = db.table('poll_tombstones').select('poll_id').gt('revision', start).execute().data
+    assert tombstones == [{'poll_id': poll['id']}]
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for the migration runner (migrate.py), including EXPLAIN checks that the
+hot queries use the composite indexes from 0004_performance_indexes.
+
+The Postgres test runs only when TEST_DATABASE_URL points at a scratch database.
+Run with: python -m pytest -q test_migrate.py
+"""
+
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+import local_backend
+import migrate
+
+EXPORT_QUERY = 'SELECT * FROM votes WHERE poll_id = {p} ORDER BY created_at'
+TEXT_RESPONSES_QUERY = 'SELECT * FROM text_responses WHERE poll_id = {p} ORDER BY created_at'
+
+
+@pytest.fixture
+def driver():
+    return migrate.SQLiteDriver(sqlite3.connect(':memory:'))
+
+
+def test_applies_in_order_and_is_idempotent(driver):
+    migrations = migrate.load_migrations('sqlite')
+    done = migrate.migrate(driver, migrations)
+    assert [m.version for m in done] == [m.version for m in migrations]
+    assert [int(m.version) for m in done] == sorted(int(m.version) for m in done)
+    assert migrate.migrate(driver, migrations) == []
+    assert driver.applied() == {m.version: m.checksum for m in migrations}
+
+
+def test_modified_migration_is_rejected(driver, tmp_path):
+    directory = tmp_path / 'sqlite'
+    shutil.copytree(os.path.join(migrate.MIGRATIONS_DIR, 'sqlite'), directory)
+    migrate.migrate(driver, migrate.load_migrations('sqlite', str(directory)))
+
+    first = sorted(directory.iterdir())[0]
+    first.write_text(first.read_text() + '\n-- edited after release\n')
+    with pytest.raises(migrate.MigrationError, match='checksum mismatch'):
+        migrate.migrate(driver, migrate.load_migrations('sqlite', str(directory)))
+
+
+def test_failed_migration_rolls_back(driver, tmp_path):
+    directory = tmp_path / 'sqlite'
+    directory.mkdir()
+    (directory / '0001_ok.sql').write_text('CREATE TABLE a (id INTEGER);')
+    (directory / '0002_broken.sql').write_text('CREATE TABLE b (id INTEGER);\nSELECT * FROM missing_table;')
+    with pytest.raises(sqlite3.OperationalError):
+        migrate.migrate(driver, migrate.load_migrations('sqlite', str(directory)))
+    assert list(driver.applied()) == ['0001']
+    tables = {r[0] for r in driver.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert 'b' not in tables
+
+
+def test_export_query_uses_composite_index(driver):
+    migrate.migrate(driver, migrate.load_migrations('sqlite'))
+    plan = ' '.join(driver.explain(EXPORT_QUERY.format(p='?'), (1,)))
+    assert 'idx_votes_poll_created' in plan
+    assert 'TEMP B-TREE' not in plan  # no separate sort step
+
+
+def test_timeline_query_scans_one_polls_time_range(driver):
+    migrate.migrate(driver, migrate.load_migrations('sqlite'))
+    plan = ' '.join(driver.explain(*local_backend.vote_timeline_query(1, 60, since='2026-03-01')))
+    assert 'idx_votes_poll_created (poll_id=? AND created_at>?)' in plan
+
+
+def test_text_responses_query_uses_composite_index(driver):
+    migrate.migrate(driver, migrate.load_migrations('sqlite'))
+    plan = ' '.join(driver.explain(TEXT_RESPONSES_QUERY.format(p='?'), (1,)))
+    assert 'idx_text_responses_poll_created' in plan
+    assert 'TEMP B-TREE' not in plan
+
+
+@pytest.mark.skipif(not os.getenv('TEST_DATABASE_URL'), reason='TEST_DATABASE_URL not set')
+def test_postgres_explain_uses_composite_indexes():
+    pytest.importorskip('psycopg2')
+    driver = migrate.PostgresDriver(os.environ['TEST_DATABASE_URL'])
+    migrate.migrate(driver, migrate.load_migrations('postgres'))
+    with driver.conn.cursor() as cur:
+        # Tiny test tables would otherwise always be sequentially scanned
+        cur.execute('SET enable_seqscan = off')
+    export_plan = '\n'.join(driver.explain(EXPORT_QUERY.format(p='%s'), (1,)))
+    text_plan = '\n'.join(driver.explain(TEXT_RESPONSES_QUERY.format(p='%s'), (1,)))
+    assert 'idx_votes_poll_created' in export_plan and 'Sort' not in export_plan
+    assert 'idx_text_responses_poll_created' in text_plan and 'Sort' not in text_plan
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Tests for JSON encoding and response compression (payloads.py).
+Run with: python -m pytest -q test_payloads.py
+"""
+
+import gzip
+import json
+
+import pytest
+from flask import Flask, jsonify
+
+import payloads
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    payloads.init_app(app)
+    cached = payloads.Payload({'rows': list(range(1000))})
+
+    @app.route('/dynamic')
+    def dynamic():
+        return jsonify({'rows': list(range(1000))})
+
+    @app.route('/small')
+    def small():
+        return jsonify({'ok': True})
+
+    @app.route('/cached')
+    def cached_route():
+        return cached.response()
+
+    return app.test_client()
+
+
+@pytest.mark.parametrize('path', ['/dynamic', '/cached'])
+def test_large_responses_are_compressed_when_accepted(client, path):
+    plain = client.get(path)
+    assert 'Content-Encoding' not in plain.headers
+    assert json.loads(plain.data)['rows'][-1] == 999
+
+    zipped = client.get(path, headers={'Accept-Encoding': 'gzip'})
+    assert zipped.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in zipped.headers['Vary']
+    assert json.loads(gzip.decompress(zipped.data)) == json.loads(plain.data)
+
+
+def test_small_responses_and_refused_encodings_stay_plain(client):
+    assert 'Content-Encoding' not in client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers
+    refused = client.get('/cached', headers={'Accept-Encoding': 'gzip;q=0'})
+    assert 'Content-Encoding' not in refused.headers
+
+
+def test_payload_is_encoded_once():
+    payload = payloads.Payload({'title': 'Déjà vu', 'rows': list(range(1000))})
+    assert set(payload.variants()) == {'identity', *payloads.ENCODINGS}
+    assert json.loads(payload.variants()['identity'])['title'] == 'Déjà vu'
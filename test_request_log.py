@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests for request capture (request_log.py).
+Run with: python -m pytest -q test_request_log.py
+"""
+
+import json
+
+from flask import Flask, jsonify
+
+import request_log
+
+
+def test_sanitize_redacts_credentials_and_truncates():
+    body = {
+        'username': 'admin',
+        'password': 'hunter2',
+        'nested': {'api_key': 'abc', 'items': [{'Token': 't'}, 'x' * (request_log.MAX_STRING_LENGTH + 50)]},
+    }
+    clean = request_log.sanitize(body)
+    assert clean['username'] == 'admin' and clean['password'] == '***'
+    assert clean['nested']['api_key'] == '***'
+    assert clean['nested']['items'][0] == {'Token': '***'}
+    assert clean['nested']['items'][1] == 'x' * request_log.MAX_STRING_LENGTH
+    assert body['password'] == 'hunter2'  # the request body itself is left alone
+
+
+def test_load_skips_bad_lines_and_orders_by_time(tmp_path):
+    path = tmp_path / 'requests.jsonl'
+    path.write_text('\n'.join([
+        json.dumps({'ts': 2.0, 'method': 'GET', 'path': '/api/polls'}),
+        'not json',
+        json.dumps({'ts': 3.0, 'note': 'no method or path'}),
+        '',
+        json.dumps(['a', 'list']),
+        json.dumps({'ts': 1.0, 'method': 'POST', 'path': '/api/polls/1/vote'}),
+    ]) + '\n')
+    assert [(e['ts'], e['method']) for e in request_log.load(str(path))] == [(1.0, 'POST'), (2.0, 'GET')]
+
+
+def test_middleware_logs_api_requests_only(tmp_path):
+    app = Flask(__name__)
+    path = tmp_path / 'requests.jsonl'
+    request_log.init_app(app, str(path))
+
+    @app.route('/api/admin/login', methods=['POST'])
+    def login():
+        return jsonify({'status': 'ok'})
+
+    @app.route('/')
+    def index():
+        return 'home'
+
+    client = app.test_client()
+    client.post('/api/admin/login?next=1', json={'username': 'admin', 'password': 'secret'})
+    client.get('/')
+    entries = request_log.load(str(path))
+    assert len(entries) == 1
+    assert entries[0]['path'] == '/api/admin/login?next=1' and entries[0]['status'] == 200
+    assert entries[0]['body'] == {'username': 'admin', 'password': '***'}
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Cold-start budget for importing app.py, measured with python -X importtime in
+a fresh interpreter. The backend client and its dependencies must not load
+until the first query.
+
+IMPORT_BUDGET_MS overrides the budget on slow machines.
+Run with: python -m pytest -q test_startup.py
+"""
+
+import os
+import subprocess
+import sys
+
+IMPORT_BUDGET_MS = float(os.getenv('IMPORT_BUDGET_MS', '500'))
+DEFERRED_MODULES = ('supabase', 'httpx', 'gotrue', 'postgrest', 'local_backend')
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+
+
+def import_profile():
+    """Return {top-level module: cumulative microseconds} for `import app`"""
+    env = dict(os.environ, SUPABASE_URL='https://example.supabase.co', SUPABASE_KEY='test-key')
+    env.pop('POLLS_BACKEND', None)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+
+def test_import_stays_within_budget_and_defers_backend():
+    profile = import_profile()
+    assert not [m for m in DEFERRED_MODULES if m in profile]
+    assert profile['app'] / 1000 < IMPORT_BUDGET_MS
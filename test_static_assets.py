@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Tests for fingerprinted frontend assets (static_assets.py).
+Run with: python -m pytest -q test_static_assets.py
+"""
+
+import gzip
+import re
+
+import pytest
+from flask import Flask
+
+import static_assets
+
+
+@pytest.fixture
+def built(tmp_path):
+    source = tmp_path / 'src'
+    source.mkdir()
+    (source / 'style.css').write_text('body { color: red; }' * 100)
+    (source / 'app.js').write_text('console.log("hi");' * 100)
+    for page in static_assets.PAGES:
+        (source / page).write_text('<link rel="stylesheet" href="style.css" /><script src="app.js?v=2"></script>')
+    build_dir = tmp_path / 'build'
+    return source, build_dir, static_assets.build(str(source), str(build_dir))
+
+
+def test_pages_reference_hashed_assets(built):
+    source, build_dir, manifest = built
+    html = (build_dir / 'index.html').read_text()
+    assert re.findall(r'(?:href|src)="([^"]+)"', html) == [
+        f"/assets/{manifest['style.css']}", f"/assets/{manifest['app.js']}",
+    ]
+    assert gzip.decompress((build_dir / 'assets' / (manifest['app.js'] + '.gz')).read_bytes()) == \
+        (source / 'app.js').read_bytes()
+
+    # Changing a file changes its name; unchanged files keep theirs
+    (source / 'app.js').write_text('console.log("changed");')
+    rebuilt = static_assets.build(str(source), str(build_dir), force=True)
+    assert rebuilt['app.js'] != manifest['app.js']
+    assert rebuilt['style.css'] == manifest['style.css']
+
+
+def test_assets_are_immutable_and_precompressed(built):
+    _, build_dir, manifest = built
+    app = Flask(__name__)
+
+    @app.route('/assets/<path:filename>')
+    def asset(filename):
+        return static_assets.send_asset(filename, str(build_dir))
+
+    client = app.test_client()
+    response = client.get(f"/assets/{manifest['style.css']}", headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Cache-Control'] == static_assets.IMMUTABLE
+    assert response.mimetype == 'text/css'
+    assert client.get(f"/assets/{manifest['style.css']}").headers.get('Content-Encoding') is None
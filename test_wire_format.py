@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Tests for the columnar and MessagePack wire formats (wire_format.py).
+Run with: python -m pytest -q test_wire_format.py
+"""
+
+import pytest
+
+import wire_format
+
+POLLS = {
+    'polls': [
+        {'id': 1, 'title': 'Best Staff Legend', 'options': [{'id': 1, 'votes': 3}, {'id': 2, 'votes': 5}]},
+        {'id': 2, 'title': 'Text poll', 'options': []},
+    ],
+    'revision': 7,
+}
+
+
+def test_columnar_layout_round_trips():
+    columnar = wire_format.to_columnar(POLLS)
+    assert columnar['polls']['_columns'] == ['id', 'title', 'options']
+    assert columnar['polls']['_values'][2][0] == {'_columns': ['id', 'votes'], '_values': [[1, 2], [3, 5]]}
+    assert wire_format.from_columnar(columnar) == POLLS
+
+    # Rows with different keys are left alone
+    mixed = [{'id': 1}, {'id': 2, 'extra': True}]
+    assert wire_format.to_columnar(mixed) == mixed
+
+
+@pytest.mark.parametrize('mimetype', [wire_format.JSON, wire_format.MSGPACK])
+@pytest.mark.parametrize('layout', wire_format.LAYOUTS)
+def test_encode_decode(mimetype, layout):
+    if mimetype == wire_format.MSGPACK:
+        pytest.importorskip('msgpack')
+    body = wire_format.encode(POLLS, mimetype, layout)
+    assert wire_format.decode(body, mimetype) == POLLS
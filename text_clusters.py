@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate clustering of text responses ("Hank", "hank!", "Hank H.").
+
+Each answer is normalized (case, accents, punctuation), cut into character
+trigrams and summarized by a MinHash signature of NUM_PERM values. The
+signature is split into BANDS bands of ROWS values. Every band hashes to an
+LSH bucket, so answers that share a bucket are candidate near-duplicates.
+Only candidates are compared (the MAX_CANDIDATES sharing the most bands),
+and a new answer joins the cluster of its most similar one if their
+estimated Jaccard similarity reaches THRESHOLD. Otherwise it starts a
+cluster of its own. An answer only enters buckets that hold fewer than
+BUCKET_CAPACITY answers, and none if its exact signature is already stored,
+so lookups stay bounded however often a spelling repeats.
+
+Clustering is incremental: submit_text_response() calls add_response(),
+which reads the candidates from text_response_buckets (an index lookup,
+however many answers the poll has) and writes the signature, buckets and
+cluster size through the assign_text_cluster database function
+(migrations/postgres/0010). GET /api/polls/<id>/text-responses/clusters
+then reads precomputed cluster sizes.
+
+Answers written without going through the API are not clustered; rebuild:
+    python text_clusters.py --poll 12                   # local backend
+    python text_clusters.py --all --backend supabase
+"""
+
+import argparse
+import functools
+import hashlib
+import operator
+import os
+import re
+import struct
+import sys
+import time
+import unicodedata
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+THRESHOLD = 0.5
+SHINGLE_SIZE = 3
+# Answers kept per bucket and compared per new answer: without a bound, the buckets of a common
+# spelling collect thousands of variants and every new answer would be compared with all of them
+BUCKET_CAPACITY = 16
+MAX_CANDIDATES = 32
+
+_WORD = struct.Struct(f'<{NUM_PERM}I')
+
+
+def normalize(text):
+    """'  Hank H.! ' -> 'hank h'"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    words = re.findall(r'[^\W_]+', text)
+    return ' '.join(words) if words else (text or '').strip()
+
+
+def shingles(normalized):
+    padded = f' {normalized} '
+    if len(padded) <= SHINGLE_SIZE:
+        return {padded}
+    return {padded[i:i + SHINGLE_SIZE] for i in range(len(padded) - SHINGLE_SIZE + 1)}
+
+
+def signature(text):
+    """MinHash signature: NUM_PERM ints below 2**32"""
+    return list(_signature(normalize(text)))
+
+
+@functools.lru_cache(maxsize=8192)
+def _signature(normalized):
+    # The i-th hash function of a shingle is the i-th 32-bit word of its SHAKE-128 output,
+    # so all of them come from one C call; the minimum is then taken column-wise.
+    # Cached because nominee polls repeat the same few spellings over and over.
+    rows = [_WORD.unpack(hashlib.shake_128(s.encode('utf-8')).digest(_WORD.size)) for s in shingles(normalized)]
+    return tuple(map(min, zip(*rows)))
+
+
+def buckets(poll_id, sig):
+    """One LSH bucket key per band; the poll ID is part of the key, so polls never share buckets"""
+    keys = []
+    for band in range(BANDS):
+        chunk = ','.join(map(str, sig[band * ROWS:(band + 1) * ROWS]))
+        digest = hashlib.blake2b(f'{poll_id}:{band}:{chunk}'.encode('ascii'), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'little') >> 1)  # fits a signed BIGINT
+    return keys
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of the two answers' trigram sets"""
+    return sum(map(operator.eq, sig_a, sig_b)) / NUM_PERM
+
+
+def best_match(sig, candidates):
+    """(cluster_id, similarity) of the most similar candidate {'cluster_id', 'signature'}, or (None, 0)"""
+    best, best_score = None, 0.0
+    for candidate in candidates:
+        score = similarity(sig, candidate['signature'])
+        if score > best_score:
+            best, best_score = candidate['cluster_id'], score
+            if score == 1.0:
+                break
+    return (best, best_score) if best_score >= THRESHOLD else (None, best_score)
+
+
+def closest(bucket_hits):
+    """The MAX_CANDIDATES answers sharing the most buckets (bands) with the new one"""
+    counts = {}
+    for response_id in bucket_hits:
+        counts[response_id] = counts.get(response_id, 0) + 1
+    return sorted(counts, key=lambda r: (-counts[r], r))[:MAX_CANDIDATES]
+
+
+def open_buckets(keys, occupancy, score):
+    """The buckets a new answer is added to"""
+    if score == 1.0:
+        return []  # an identical signature is already in every one of them
+    return [key for key in keys if occupancy.get(key, 0) < BUCKET_CAPACITY]
+
+
+def add_response(client, poll_id, response_id, response_text):
+    """Cluster one stored answer; returns its cluster ID"""
+    sig = signature(response_text)
+    keys = buckets(poll_id, sig)
+    rows = client.table('text_response_buckets').select('bucket, response_id') \
+        .eq('poll_id', poll_id).in_('bucket', keys).execute().data
+    occupancy = {}
+    for r in rows:
+        occupancy[r['bucket']] = occupancy.get(r['bucket'], 0) + 1
+    candidates = []
+    if rows:
+        candidates = client.table('text_response_minhash').select('cluster_id, signature') \
+            .in_('response_id', closest(r['response_id'] for r in rows)).execute().data
+    cluster_id, score = best_match(sig, candidates)
+    data = client.rpc('assign_text_cluster', {
+        'p_poll_id': poll_id,
+        'p_response_id': response_id,
+        'p_cluster_id': cluster_id,
+        'p_label': response_text.strip(),
+        'p_signature': sig,
+        'p_buckets': open_buckets(keys, occupancy, score),
+    }).execute().data
+    return data[0] if isinstance(data, list) else data
+
+
+def cluster_all(poll_id, responses):
+    """
+    Cluster [{'id', 'response_text'}] from scratch, in memory, the way add_response() does one at a time.
+    Returns (clusters, members): clusters as [{'label', 'size'}] and one
+    (response_id, cluster index, signature, buckets) per answer.
+    """
+    by_bucket, clusters, members = {}, [], []
+    exact = {}  # signature -> cluster: repeated spellings skip the bucket lookup
+    for row in responses:
+        sig = signature(row['response_text'])
+        key = tuple(sig)
+        if key in exact:
+            clusters[exact[key]]['size'] += 1
+            members.append((row['id'], exact[key], sig, []))
+            continue
+        keys = buckets(poll_id, sig)
+        hits = [i for key in keys for i in by_bucket.get(key, ())]
+        candidates = [{'cluster_id': members[i][1], 'signature': members[i][2]} for i in closest(hits)]
+        cluster, score = best_match(sig, candidates)
+        if cluster is None:
+            cluster = len(clusters)
+            clusters.append({'label': row['response_text'].strip(), 'size': 0})
+        clusters[cluster]['size'] += 1
+        exact[key] = cluster
+        keys = open_buckets(keys, {key: len(by_bucket.get(key, ())) for key in keys}, score)
+        for key in keys:
+            by_bucket.setdefault(key, []).append(len(members))
+        members.append((row['id'], cluster, sig, keys))
+    return clusters, members
+
+
+def rebuild(client, poll_id, page_size=1000):
+    """Recluster every stored answer of a poll; returns (answers, clusters)"""
+    responses, cursor = [], 0
+    while True:
+        rows = client.table('text_responses').select('id, response_text').eq('poll_id', poll_id) \
+            .gt('id', cursor).order('id').limit(page_size).execute().data
+        responses.extend(rows)
+        if len(rows) < page_size:
+            break
+        cursor = rows[-1]['id']
+
+    clusters, members = cluster_all(poll_id, responses)
+    # Deleting the clusters cascades to text_response_minhash; buckets go by poll
+    client.table('text_response_buckets').delete().eq('poll_id', poll_id).execute()
+    client.table('text_response_clusters').delete().eq('poll_id', poll_id).execute()
+    ids = []
+    for i in range(0, len(clusters), page_size):
+        inserted = client.table('text_response_clusters').insert(
+            [{'poll_id': poll_id, **c} for c in clusters[i:i + page_size]]
+        ).execute().data
+        ids.extend(r['id'] for r in inserted)
+
+    minhash = [{'response_id': rid, 'poll_id': poll_id, 'cluster_id': ids[c], 'signature': sig}
+               for rid, c, sig, _ in members]
+    bucket_rows = [{'poll_id': poll_id, 'bucket': key, 'response_id': rid} for rid, _, _, keys in members for key in keys]
+    for i in range(0, len(minhash), page_size):
+        client.table('text_response_minhash').insert(minhash[i:i + page_size]).execute()
+    for i in range(0, len(bucket_rows), page_size * BANDS):
+        client.table('text_response_buckets').insert(bucket_rows[i:i + page_size * BANDS]).execute()
+    return len(responses), len(clusters)
+
+
+def main():
+    from generate_dataset import get_client
+
+    parser = argparse.ArgumentParser(description='Recluster near-duplicate text responses')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--poll', type=int, action='append', help='Poll ID (repeatable)')
+    target.add_argument('--all', action='store_true', help='Every text_response poll')
+    parser.add_argument('--backend', choices=['local', 'supabase'], default='local')
+    parser.add_argument('--db', default=os.getenv('LOCAL_DB_PATH', 'polls.db'), help='SQLite file for the local backend')
+    args = parser.parse_args()
+
+    client = get_client(args.backend, args.db)
+    ids = args.poll or [p['id'] for p in client.table('polls').select('id')
+                        .eq('poll_type', 'text_response').order('id').execute().data]
+    for poll_id in ids:
+        t0 = time.perf_counter()
+        answers, clusters = rebuild(client, poll_id)
+        print(f'✅ Poll #{poll_id}: {answers} answers in {clusters} clusters ({time.perf_counter() - t0:.3f}s)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
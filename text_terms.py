@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Word and phrase counts for text_response polls.
+
+Every answer is tokenized once, when it is submitted: the add_text_response
+database function (migrations/postgres/0009) inserts the answer and bumps
+text_response_terms for each distinct word and bigram in it in the same
+transaction, so GET /api/polls/<id>/text-responses/terms is a top-k index
+read however many answers there are.
+
+Counts are per response (someone writing "coffee coffee coffee" counts
+once). Stopwords (English and French) are dropped, and bigrams are only
+formed from words that are next to each other in the answer.
+
+Responses written without going through the API (generate_dataset.py, SQL)
+are not counted; rebuild the counts from the stored answers with:
+    python text_terms.py --poll 12                      # local backend
+    python text_terms.py --all --backend supabase
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+KINDS = ('word', 'bigram')
+MIN_WORD_LENGTH = 2
+WORD_RE = re.compile(r'[^\W_]+')
+
+STOPWORDS = frozenset('''
+a about after again all also am an and any are as at be because been before being between both but by
+can could did do does doing done down during each even ever few for from further get got had has have
+having he her here hers him his how i if in into is it its itself just like me more most much my no nor
+not now of off on once only or other our out over own really same she should so some such than that the
+their them then there these they this those through to too under until up very was we were what when where
+which while who whom why will with would yes you your yours
+ai au aux avec c ce ces cet cette comme d dans de des du elle elles en est et etait était être eu il ils
+j je l la le les leur leurs lui m ma mais me mes moi mon n ne ni nos notre nous on ont ou où par pas pour
+qu que qui s sa sans se ses si son sont sur t ta te tes toi ton tous tout tres très tu un une vos votre vous
+y ça
+'''.split())
+
+
+def tokenize(text):
+    return WORD_RE.findall((text or '').lower())
+
+
+def extract_terms(text):
+    """{'word': [...], 'bigram': [...]}: the distinct terms of one answer, sorted"""
+    words, bigrams = set(), set()
+    previous = None
+    for token in tokenize(text):
+        if token in STOPWORDS or len(token) < MIN_WORD_LENGTH or token.isdigit():
+            previous = None
+            continue
+        words.add(token)
+        if previous:
+            bigrams.add(f'{previous} {token}')
+        previous = token
+    return {'word': sorted(words), 'bigram': sorted(bigrams)}
+
+
+def add_response(client, poll_id, username, response_text):
+    """Insert a text response and count its terms in one transaction; returns the new row's ID"""
+    data = client.rpc('add_text_response', {
+        'p_poll_id': poll_id,
+        'p_username': username,
+        'p_response_text': response_text,
+        'p_terms': extract_terms(response_text),
+    }).execute().data
+    return data[0] if isinstance(data, list) else data
+
+
+def top_terms(client, poll_id, kind, limit):
+    rows = client.table('text_response_terms').select('term, responses').eq('poll_id', poll_id).eq('kind', kind) \
+        .order('responses', desc=True).order('term').limit(limit).execute().data
+    return [{'term': r['term'], 'count': r['responses']} for r in rows]
+
+
+def rebuild(client, poll_id, page_size=1000):
+    """Recount a poll's terms from its stored answers; returns the number of answers read"""
+    counts, cursor, answers = Counter(), 0, 0
+    while True:
+        rows = client.table('text_responses').select('id, response_text').eq('poll_id', poll_id) \
+            .gt('id', cursor).order('id').limit(page_size).execute().data
+        for row in rows:
+            for kind, terms in extract_terms(row['response_text']).items():
+                counts.update((kind, term) for term in terms)
+        answers += len(rows)
+        if len(rows) < page_size:
+            break
+        cursor = rows[-1]['id']
+
+    client.table('text_response_terms').delete().eq('poll_id', poll_id).execute()
+    rows = [{'poll_id': poll_id, 'kind': kind, 'term': term, 'responses': n} for (kind, term), n in counts.items()]
+    for i in range(0, len(rows), page_size):
+        client.table('text_response_terms').insert(rows[i:i + page_size]).execute()
+    return answers
+
+
+def main():
+    from generate_dataset import get_client
+
+    parser = argparse.ArgumentParser(description='Rebuild word and bigram counts of text_response polls')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--poll', type=int, action='append', help='Poll ID (repeatable)')
+    target.add_argument('--all', action='store_true', help='Every text_response poll')
+    parser.add_argument('--backend', choices=['local', 'supabase'], default='local')
+    parser.add_argument('--db', default=os.getenv('LOCAL_DB_PATH', 'polls.db'), help='SQLite file for the local backend')
+    args = parser.parse_args()
+
+    client = get_client(args.backend, args.db)
+    ids = args.poll or [p['id'] for p in client.table('polls').select('id')
+                        .eq('poll_type', 'text_response').order('id').execute().data]
+    for poll_id in ids:
+        t0 = time.perf_counter()
+        answers = rebuild(client, poll_id)
+        print(f'✅ Poll #{poll_id}: {answers} answers recounted in {time.perf_counter() - t0:.3f}s')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Wire formats for poll data, shared by the API (payloads.py) and polls_client.py.
+
+    application/json       default
+    application/msgpack    MessagePack (optional: pip install msgpack)
+
+Either format can use the columnar layout (?layout=columnar): a list of
+objects with the same keys becomes one array per key, so key names are sent
+once per list instead of once per row:
+
+    [{"id": 1, "votes": 3}, {"id": 2, "votes": 5}]
+    -> {"_columns": ["id", "votes"], "_values": [[1, 2], [3, 5]]}
+
+decode() always returns the row layout, whatever was sent.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON = 'application/json'
+MSGPACK = 'application/msgpack'
+MSGPACK_TYPES = (MSGPACK, 'application/x-msgpack')
+LAYOUTS = ('rows', 'columnar')
+
+
+def _nested(values):
+    return any(isinstance(value, (dict, list)) for value in values)
+
+
+def to_columnar(obj):
+    if isinstance(obj, dict):
+        if not _nested(obj.values()):
+            return obj
+        return {key: to_columnar(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        if not _nested(obj):
+            return obj
+        if all(isinstance(row, dict) for row in obj):
+            keys = list(obj[0])
+            if all(row.keys() == obj[0].keys() for row in obj):
+                return {'_columns': keys, '_values': [to_columnar([row[k] for row in obj]) for k in keys]}
+        return [to_columnar(value) for value in obj]
+    return obj
+
+
+def from_columnar(obj):
+    if isinstance(obj, dict):
+        if obj.keys() == {'_columns', '_values'}:
+            values = [from_columnar(column) for column in obj['_values']]
+            return [dict(zip(obj['_columns'], row)) for row in zip(*values)]
+        if not _nested(obj.values()):
+            return obj
+        return {key: from_columnar(value) for key, value in obj.items()}
+    if isinstance(obj, list) and _nested(obj):
+        return [from_columnar(value) for value in obj]
+    return obj
+
+
+def dumps(obj, default=None):
+    """Compact JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+    return json.dumps(obj, default=default, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def encode(obj, mimetype=JSON, layout='rows', default=None):
+    if layout == 'columnar':
+        obj = to_columnar(obj)
+    if mimetype in MSGPACK_TYPES:
+        return msgpack.packb(obj, default=default)
+    return dumps(obj, default)
+
+
+def decode(body, mimetype=JSON):
+    if mimetype in MSGPACK_TYPES:
+        obj = msgpack.unpackb(body)
+    else:
+        obj = orjson.loads(body) if orjson is not None else json.loads(body)
+    # Row-layout bodies need no walk at all
+    return from_columnar(obj) if b'_columns' in body else obj
+
+
+def offered_mimetypes():
+    return [JSON] + (list(MSGPACK_TYPES) if msgpack is not None else [])